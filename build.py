@@ -5,12 +5,29 @@ Entry point for the Learning Mechanics static site generator.
 Build logic lives in the ssg/ package:
   ssg/config.py       — site-wide constants
   ssg/contributors.py — contributor loading and author HTML
+  ssg/scan.py         — one-pass index of the source trees, shared by every stage
   ssg/metadata.py     — frontmatter extraction and sequence metadata
+  ssg/site.py         — SiteContext: the first pass (post metadata, URLs, sequences)
+  ssg/sequence_graph.py — per-sequence positions, prev/next and pre-rendered TOC
   ssg/post.py         — pandoc invocation and post-processing
-  ssg/index.py        — homepage generator
+  ssg/index.py        — homepage, paginated listings, year and tag archives
   ssg/questions.py    — open-questions page generator
-  ssg/rss.py          — RSS feed generator
-  ssg/static.py       — static file copying and CSS concatenation
+  ssg/rss.py          — streaming RSS, Atom and JSON Feed writer
+  ssg/search.py       — sharded full-text search index and search page
+  ssg/related.py      — TF-IDF related-reading links (vectorized with NumPy if installed)
+  ssg/static.py       — static file copying, CSS concatenation and splitting
+  ssg/math_render.py  — optional build-time math rendering (KaTeX or MathML)
+  ssg/includes.py     — per-page pruning of unused script/style includes
+  ssg/icons.py        — inline SVG icon sprites from the vendored icon set
+  ssg/images.py       — responsive WebP/AVIF image variants (optional, Pillow)
+  ssg/critical.py     — above-the-fold CSS inlining
+  ssg/minify.py       — HTML/CSS/JS minification
+  ssg/fingerprint.py  — content-hashed asset names and reference rewriting
+  ssg/service_worker.py — offline service worker generated from the build output
+  ssg/cache.py        — persistent content-addressed build cache
+  ssg/scheduler.py    — dependency-graph stage runner with critical-path report
+  ssg/devfs.py        — in-memory dev-server output and large-media passthrough
+  ssg/lazy.py         — on-demand page rendering for the dev server (--lazy)
   ssg/main.py         — two-pass build orchestration
 """
 
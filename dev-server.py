@@ -4,22 +4,44 @@ Development server with auto-reload functionality
 """
 
 import os
+import errno
 import sys
 import time
 import json
+import io
+import contextlib
+import traceback
+import shutil
 import subprocess
 import threading
 import http.server
 import socketserver
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import urlparse, unquote
+
+from ssg.config import CONTRIBUTORS_FILE, OPEN_QUESTIONS_DIR
+from ssg.devfs import dev_output_dir, load_tree, open_entry, resolve
+from ssg.lazy import LazySite
+from ssg.main import main as build_site, rebuild
 
 # Global variable to track last build time
 last_build_time = time.time()
 
+# Dev builds go to a RAM scratch dir; the server serves a snapshot of it
+output_dir = dev_output_dir()
+site_tree = {}
+
+# With --lazy, pages are rendered when first requested (see ssg/lazy.py)
+lazy_site = None
+
+def lookup(url_path):
+    """(snapshot, key) serving url_path; key is None if nothing does"""
+    if lazy_site:
+        return lazy_site.lookup(url_path)
+    return site_tree, resolve(site_tree, url_path)
+
 class DevServerHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="build", **kwargs)
+    """Serves the in-memory snapshot of the latest dev build (see ssg/devfs.py)"""
     
     def end_headers(self):
         # Add CORS headers for dev server
@@ -41,29 +63,24 @@ class DevServerHandler(http.server.SimpleHTTPRequestHandler):
             self.wfile.write(json.dumps(response).encode())
             return
         
+        # Resolve the URL against the current snapshot (swapped whole on rebuild)
+        try:
+            tree, key = lookup(unquote(urlparse(self.path).path))
+        except Exception:
+            traceback.print_exc()
+            self.send_error(500, "Rendering failed")
+            return
+        if key is None:
+            self.send_error(404, "File not found")
+            return
+        entry = tree[key]
+        
         # Handle HTML files - inject auto-reload script
-        if self.path.endswith('.html') or self.path == '/' or self.path.endswith('/') or '.' not in self.path.split('/')[-1]:
-            # Determine the actual file path
-            if self.path == '/':
-                file_path = Path("build") / "index.html"
-            elif self.path.endswith('/'):
-                # Directory request: look for index.html in that directory
-                file_path = Path("build") / self.path.lstrip('/') / "index.html"
-            elif self.path.endswith('.html'):
-                file_path = Path("build") / self.path.lstrip('/')
-            else:
-                # Extensionless URL: try {path}.html, then {path}/index.html
-                html_path  = Path("build") / (self.path.lstrip('/') + '.html')
-                index_path = Path("build") / self.path.lstrip('/') / "index.html"
-                file_path  = html_path if html_path.exists() else index_path
+        if key.endswith('.html'):
+            content = entry[0].decode('utf-8')
             
-            if file_path.exists() and file_path.suffix == '.html':
-                # Read the HTML file
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Inject auto-reload script before closing </head> tag
-                auto_reload_script = '''
+            # Inject auto-reload script before closing </head> tag
+            auto_reload_script = '''
 <script>
 (function() {
     let lastBuildTime = null;
@@ -97,25 +114,48 @@ class DevServerHandler(http.server.SimpleHTTPRequestHandler):
 })();
 </script>
 '''
-                
-                # Insert script before </head> or before </body> if no </head>
-                if '</head>' in content:
-                    content = content.replace('</head>', auto_reload_script + '\n</head>')
-                elif '</body>' in content:
-                    content = content.replace('</body>', auto_reload_script + '\n</body>')
-                else:
-                    content = content + auto_reload_script
-                
-                # Send the modified content
-                self.send_response(200)
-                self.send_header('Content-Type', 'text/html; charset=utf-8')
-                self.send_header('Content-Length', str(len(content.encode('utf-8'))))
-                self.end_headers()
-                self.wfile.write(content.encode('utf-8'))
-                return
+            
+            # Insert script before </head> or before </body> if no </head>
+            if '</head>' in content:
+                content = content.replace('</head>', auto_reload_script + '\n</head>')
+            elif '</body>' in content:
+                content = content.replace('</body>', auto_reload_script + '\n</body>')
+            else:
+                content = content + auto_reload_script
+            
+            # Send the modified content
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(content.encode('utf-8'))))
+            self.end_headers()
+            self.wfile.write(content.encode('utf-8'))
+            return
         
-        # For all other files, use default behavior
-        super().do_GET()
+        # Everything else straight from memory; passthrough media from its source file
+        data, source, mtime = entry
+        size = os.path.getsize(source) if source else len(data)
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(key))
+        self.send_header('Content-Length', str(size))
+        self.send_header('Last-Modified', self.date_time_string(mtime))
+        self.end_headers()
+        with open_entry(entry) as f:
+            shutil.copyfileobj(f, self.wfile)
+    
+    def do_HEAD(self):
+        # Answer from the snapshot too, never from the working directory
+        try:
+            _, key = lookup(unquote(urlparse(self.path).path))
+        except Exception:
+            traceback.print_exc()
+            self.send_error(500, "Rendering failed")
+            return
+        if key is None:
+            self.send_error(404, "File not found")
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8' if key.endswith('.html') else self.guess_type(key))
+        self.end_headers()
 
 class SimpleFileWatcher:
     def __init__(self, directories):
@@ -123,6 +163,10 @@ class SimpleFileWatcher:
         self.file_times = {}
         self.last_rebuild = 0
         self.rebuild_delay = 1.0  # Debounce rebuilds
+        # Once build code changed, this process's generator is stale for good
+        self.code_changed = False
+        # Paths seen since the last rebuild, kept across debounced calls
+        self.pending = {}
         
     def get_file_times(self):
         """Get modification times for all watched files"""
@@ -130,67 +174,100 @@ class SimpleFileWatcher:
         for directory in self.directories:
             if not Path(directory).exists():
                 continue
-                
-            for file_path in Path(directory).rglob('*'):
-                if file_path.is_file():
-                    # Only watch relevant files
-                    if file_path.suffix in {'.md', '.html', '.css', '.js', '.py', '.json'}:
-                        try:
-                            times[str(file_path)] = file_path.stat().st_mtime
-                        except OSError:
-                            pass
+            
+            # A watched file (build.py) stands for itself
+            paths = [Path(directory)] if Path(directory).is_file() else Path(directory).rglob('*')
+            for file_path in paths:
+                # build_post's scratch copies of posts come and go mid-build
+                if file_path.is_file() and not file_path.name.startswith('_tmp_'):
+                    # Every file: new images, videos and .yaml files must reach
+                    # the scan index too. Skip bytecode and editor temporaries
+                    if ('__pycache__' in file_path.parts
+                            or file_path.name.startswith('.') or file_path.name.endswith('~')):
+                        continue
+                    try:
+                        times[str(file_path)] = file_path.stat().st_mtime
+                    except OSError:
+                        pass
         return times
     
     def check_changes(self):
-        """Check if any files have changed"""
+        """Return the paths that changed or were deleted since the last check"""
         current_times = self.get_file_times()
         
         # First run - just store times
         if not self.file_times:
             self.file_times = current_times
-            return False
+            return []
             
         # Check for changes
-        changed = False
+        changed = []
         for file_path, mtime in current_times.items():
             if file_path not in self.file_times or self.file_times[file_path] != mtime:
-                changed = True
+                changed.append(file_path)
                 print(f"📝 Changed: {file_path}")
-                break
                 
         # Check for deleted files
         for file_path in self.file_times:
             if file_path not in current_times:
-                changed = True
+                changed.append(file_path)
                 print(f"🗑️  Deleted: {file_path}")
-                break
                 
         self.file_times = current_times
         return changed
     
-    def rebuild_site(self):
+    def rebuild_site(self, changed):
         """Rebuild the site and show status"""
-        global last_build_time
+        global last_build_time, site_tree
         
-        # Debounce rapid changes
+        # Debounce rapid changes; their paths wait for the next rebuild
+        self.pending.update(dict.fromkeys(changed))
         current_time = time.time()
         if current_time - self.last_rebuild < self.rebuild_delay:
             return
             
         self.last_rebuild = current_time
+        changed = list(self.pending)
+        self.pending.clear()
         
         try:
+            if lazy_site:
+                # Drop the affected pages; each re-renders on its next request
+                count = lazy_site.invalidate(changed)
+                last_build_time = time.time()
+                print(f"♻️  {count} page(s) invalidated. Browser will auto-reload.")
+                if any(path.endswith('.py') for path in changed):
+                    print("⚠ Build code changed: restart the server to pick it up")
+                return
+            
             print(f"\n🔄 Rebuilding site... ({time.strftime('%H:%M:%S')})")
             
-            # Run build script
-            result = subprocess.run([sys.executable, 'build.py'],
-                                  capture_output=True, text=True)
+            if any(path.endswith('.py') for path in changed):
+                self.code_changed = True
+            if self.code_changed:
+                # Build code changed: run a fresh build process to pick it up
+                result = subprocess.run(
+                    [sys.executable, '-c',
+                     'import sys; from ssg.main import main; main(sys.argv[1], dev=True)',
+                     str(output_dir)],
+                    capture_output=True, text=True)
+                ok, error = result.returncode == 0, result.stderr
+            else:
+                # Rebuild in-process, reusing the source scan index
+                log = io.StringIO()
+                try:
+                    with contextlib.redirect_stdout(log):
+                        rebuild(changed, output_dir, dev=True)
+                    ok, error = True, ''
+                except Exception:
+                    ok, error = False, log.getvalue() + traceback.format_exc()
             
-            if result.returncode == 0:
+            if ok:
+                site_tree = load_tree(output_dir)
                 last_build_time = time.time()
                 print("✅ Build complete! Browser will auto-reload.")
             else:
-                print(f"❌ Build failed: {result.stderr}")
+                print(f"❌ Build failed: {error}")
                 
         except Exception as e:
             print(f"❌ Build error: {e}")
@@ -212,7 +289,7 @@ def start_dev_server(port=8000):
                     print("\n🛑 Stopping development server...")
                 break
         except OSError as e:
-            if e.errno == 48:  # Address already in use
+            if e.errno == errno.EADDRINUSE:
                 continue
             else:
                 raise
@@ -226,9 +303,16 @@ def main():
     print("🔄 Auto-reload enabled - no need to refresh browser!")
     print("🛑 Press Ctrl+C to stop\n")
     
-    # Initial build
-    print("🔄 Initial build...")
-    subprocess.run([sys.executable, 'build.py'])
+    global site_tree, lazy_site
+    if '--lazy' in sys.argv[1:]:
+        # Nothing is built up front: pages render on their first request
+        print(f"💤 Lazy mode: pages render on demand (in {output_dir})")
+        lazy_site = LazySite(output_dir)
+    else:
+        # Initial build (in-process, so rebuilds can reuse its source scan)
+        print(f"🔄 Initial build (in {output_dir})...")
+        build_site(output_dir, dev=True)
+        site_tree = load_tree(output_dir)
     
     # Start dev server in background thread
     server_thread = threading.Thread(target=start_dev_server, daemon=True)
@@ -238,7 +322,8 @@ def main():
     time.sleep(1)
     
     # Set up file watcher
-    watch_dirs = ['posts', 'templates', 'static', 'data']
+    # ssg/ and build.py too: the generator itself runs in this process
+    watch_dirs = ['posts', 'templates', 'static', 'data', OPEN_QUESTIONS_DIR, CONTRIBUTORS_FILE, 'ssg', 'build.py']
     existing_dirs = [d for d in watch_dirs if Path(d).exists()]
     
     if not existing_dirs:
@@ -248,18 +333,21 @@ def main():
     watcher = SimpleFileWatcher(existing_dirs)
     
     for directory in existing_dirs:
-        print(f"👁️  Watching {directory}/")
+        print(f"👁️  Watching {directory}{'/' if Path(directory).is_dir() else ''}")
     
     print(f"⏱️  Checking for changes every 2 seconds...")
     print(f"✨ Browser will automatically reload when files change!\n")
     
     try:
         while True:
-            if watcher.check_changes():
-                watcher.rebuild_site()
+            changed = watcher.check_changes()
+            if changed or watcher.pending:
+                watcher.rebuild_site(changed)
             time.sleep(2)  # Check every 2 seconds
     except KeyboardInterrupt:
         print("\n🛑 Stopping development server...")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""Persistent build cache: content-addressed blobs under CACHE_DIR.
+
+Stages that do expensive, deterministic work (CSS extraction, minification,
+math rendering, …) store results keyed by a hash of their inputs, so
+rebuilds only redo work whose inputs changed.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from ssg.config import CACHE_DIR
+
+
+def cache_file(namespace, key):
+    """Path of the cache entry for key within namespace (may not exist)."""
+    return Path(CACHE_DIR) / namespace / key
+
+
+def read_cache(namespace, key):
+    """Return cached bytes for key, or None on a miss."""
+    try:
+        return cache_file(namespace, key).read_bytes()
+    except OSError:
+        return None
+
+
+def write_cache(namespace, key, data):
+    """Store bytes (or str) for key. Atomic, so parallel workers never see partial entries."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    path = cache_file(namespace, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
@@ -13,13 +13,17 @@ OPEN_QUESTIONS_DIR   = "openquestions"
 QUESTIONS_FILE       = "openquestions/questions.json"
 CONTRIBUTORS_FILE    = "contributors.json"
 TEMPLATES_DIR      = "templates"
+CACHE_DIR            = ".cache"
+SCAN_ROOTS           = (POSTS_DIR, "static", OPEN_QUESTIONS_DIR)  # source trees indexed once per process (ssg/scan.py)
+FRONTMATTER_MAX_BYTES = 64 * 1024        # frontmatter read line by line up to this; longer falls back to a full read
 
 # External assets
-WEB_FONT_URL     = ""
-FONT_AWESOME_URL = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css"
-KATEX_CSS_URL    = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/katex.min.css"
-KATEX_JS_URL     = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/katex.min.js"
-KATEX_RENDER_URL = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/contrib/auto-render.min.js"
+WEB_FONT_URL      = ""
+FONT_AWESOME_URL  = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css"
+KATEX_CSS_URL     = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/katex.min.css"
+KATEX_JS_URL      = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/katex.min.js"
+KATEX_RENDER_URL  = "https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/contrib/auto-render.min.js"
+KATEX_NODE_MODULE = "node_modules/katex"   # local KaTeX for MATH_RENDERING = 'katex' (npm install katex)
 
 # Analytics
 GA_ID      = "G-XTN7VLEK36"
@@ -32,6 +36,65 @@ GISCUS_CATEGORY_ID     = "DIC_kwDOSGPAUc4C73s9"
 GISCUS_CATEGORY_POSTS  = "Comments"
 GISCUS_CATEGORY_OQ     = "Comments"
 
+# Build pipeline
+MATH_RENDERING      = "client"           # 'client' (KaTeX auto-render), 'katex' or 'mathml' (build time)
+PRUNE_INCLUDES      = True               # drop KaTeX/Font Awesome/etc. includes a page doesn't use
+SUBSET_ICONS        = True               # inline SVG sprite of used icons instead of Font Awesome CSS
+ICON_SET_DIR        = "vendor/fontawesome"  # vendored icon set for SUBSET_ICONS
+RESPONSIVE_IMAGES   = True               # WebP/AVIF srcset variants + width/height (needs Pillow)
+IMAGE_WIDTHS        = (480, 960, 1440)   # variant widths, px (plus each image's own width)
+IMAGE_FORMATS       = ("avif", "webp")   # in order of preference; unsupported ones are skipped
+IMAGE_QUALITY       = 80
+IMAGE_SIZES         = "(max-width: 1008px) 100vw, 1008px"  # default <source sizes>; <img sizes> overrides
+SPLIT_CSS           = True               # core style.css + per-page-type style-<type>.css bundles
+CSS_CORE_PARTIALS   = ("variables.css", "base.css", "controls.css", "layout.css")  # leading partials kept whole-site in core style.css
+CSS_RUNTIME_PREFIXES = ("katex", "giscus")  # class/id prefixes added by third-party scripts at runtime; never shaken
+CRITICAL_CSS        = False              # inline above-the-fold CSS, load stylesheets async
+CRITICAL_FOLD_CHARS = 6000               # chars of <body> markup treated as above the fold
+CRITICAL_MAX_SHARE  = 0.5                # skip inlining for a page type when critical CSS exceeds this share of its stylesheets
+MINIFY              = True               # minify HTML/CSS/JS output (cached, parallel)
+FINGERPRINT_ASSETS  = True               # rename static assets to name.<hash>.ext
+ASSET_MAP_FILE      = "asset-map.json"   # original → fingerprinted path map, written to build/
+SERVICE_WORKER      = True               # build/sw.js: precached shell, stale-while-revalidate pages
+SW_PRECACHE_SEQUENCES = False            # cache every part of a sequence when its landing page is visited
+STAGE_WORKERS       = 4                  # build stages run concurrently when independent (1: one at a time)
+
+# Homepage and listings
+INDEX_PAGE_BYTES    = 48 * 1024          # row markup per listing page (homepage budget)
+INDEX_PAGE_SIZE     = 20                 # max rows per listing page
+INDEX_EAGER_ROWS    = 3                  # homepage rows in the first viewport (+200px): their videos play on load
+OPEN_QUESTIONS_ALIAS = "hardlink"        # /openquestions/: 'hardlink' to openquestions.html or 'redirect' stub
+
+# Search
+SEARCH_INDEX        = True               # build/search/: sharded full-text index + search page
+SEARCH_SHARD_PREFIX = 2                  # terms are sharded by their first N characters
+SEARCH_TITLE_WEIGHT = 5                  # a title occurrence counts as this many body occurrences
+
+# Related reading
+RELATED_READING     = True               # "Related reading" links on post and discussion pages
+RELATED_COUNT       = 3                  # links per page
+RELATED_MAX_TERMS   = 4096               # TF-IDF vocabulary cap (most widespread terms)
+
+# LLM text endpoints
+MARKDOWN_MIRRORS    = True               # <post>/index.html.md: plain-markdown copy of each post
+LLMS_FULL           = True               # build/llms-full.txt: every post and open question in one file
+
+# Sequence navigation
+PREFETCH_NEXT = "prefetch"   # hints for the next post: 'off', 'hover', 'prefetch' or 'prerender'
+
+# Feeds
+RSS_POST_LIMIT      = 20                 # most recent posts per feed
+FEED_FORMATS        = ("rss", "atom", "json")  # feed.xml, atom.xml, feed.json
+FEED_FULL_CONTENT   = True               # include each post's rendered HTML, not just its description
+
+# Sitemap
+SITEMAP_EXCLUDE     = ("openquestions/index.html", "search/index.html")  # build-relative pages left out
+SITEMAP_MAX_URLS    = 50000              # per sitemap file (protocol limit); more → gzipped shards + index
+SITEMAP_MAX_BYTES   = 50 * 1024 * 1024   # per uncompressed sitemap file (protocol limit)
+
+# Dev server
+DEV_PASSTHROUGH_BYTES    = 256 * 1024    # dev builds link media at least this large from the source tree
+DEV_PASSTHROUGH_SUFFIXES = (".mp4", ".webm", ".mov", ".mp3", ".wav", ".pdf", ".png", ".jpg", ".jpeg", ".gif")
+
 # Misc
-RSS_POST_LIMIT = 20
 TEAM_NAME      = "The Learning Mechanics Team"
@@ -39,10 +39,10 @@ def make_people_html(names, contributors, path_prefix=''):
 
         mug = (
             f'<a href="{url}" class="mug" target="_blank" rel="noopener">'
-            f'<img src="{photo}" alt="{name}">'
+            f'<img src="{photo}" alt="{name}" sizes="48px">'
             f'</a>'
         ) if url else (
-            f'<span class="mug"><img src="{photo}" alt="{name}"></span>'
+            f'<span class="mug"><img src="{photo}" alt="{name}" sizes="48px"></span>'
         )
 
         name_tag = (
@@ -0,0 +1,131 @@
+"""Inline above-the-fold CSS into each page and load the site stylesheets asynchronously.
+
+For every page type (<body data-page="…">) the rules needed by the top of the
+page — nav, post header, byline, homepage rows — are extracted from the
+stylesheets the page links and inlined in <head>. Rules that can't affect
+first paint (print styles, animations, :hover/:focus/:active states) are
+left to the full stylesheets. The stylesheets themselves
+are then loaded without blocking first paint, the same way
+font_awesome_include() loads Font Awesome.
+
+Inlining only pays off when the critical rules are a small part of the
+stylesheets: the full sheets are still fetched after first paint, so every
+inlined byte is shipped twice. A page type whose critical CSS exceeds
+CRITICAL_MAX_SHARE of its stylesheets keeps its ordinary blocking links.
+
+Extraction results are cached by page type, stylesheet hash and fold
+vocabulary, so unchanged templates cost one cache read per build.
+"""
+
+import re
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import CRITICAL_FOLD_CHARS, CRITICAL_MAX_SHARE
+from ssg.static import _split_selector_list, css_blocks, page_type, resolve_local, shake_css
+from ssg.utils import content_hash
+
+_SITE_CSS_LINK_RE = re.compile(r'<link rel="stylesheet" href="([^"]*static/style(?:-[\w-]+)?\.css)">')
+_BODY_RE          = re.compile(r'<body[^>]*>(.*)', re.DOTALL)
+_SCRIPT_STYLE_RE  = re.compile(r'<(script|style)\b.*?</\1>', re.DOTALL)
+_TAG_RE           = re.compile(r'<([a-zA-Z][\w-]*)')
+_CLASS_ID_RE      = re.compile(r'\b(?:class|id)="([^"]*)"')
+_INTERACTION_RE   = re.compile(r':(?:hover|focus|focus-within|focus-visible|active)\b')
+
+
+def fold_markup(html):
+    """Return the markup rendered above the fold: the start of <body>, minus scripts."""
+    m = _BODY_RE.search(html)
+    body = m.group(1) if m else html
+    return _SCRIPT_STYLE_RE.sub('', body)[:CRITICAL_FOLD_CHARS]
+
+
+def fold_vocabulary(html):
+    """Element, class and id names used above the fold (prose words excluded)."""
+    markup = fold_markup(html)
+    vocab = {tag.lower() for tag in _TAG_RE.findall(markup)}
+    for value in _CLASS_ID_RE.findall(markup):
+        vocab.update(value.split())
+    return vocab
+
+
+def first_paint_css(css_text):
+    """Drop what first paint never needs: @media print, @keyframes, and rules only for interaction states."""
+    out = []
+    for prelude, body in css_blocks(css_text):
+        if body is None:
+            out.append(f'{prelude};\n')
+        elif prelude.startswith('@media print') or prelude.startswith(('@keyframes', '@-webkit-keyframes')):
+            continue
+        elif prelude.startswith(('@media', '@supports')):
+            inner = first_paint_css(body)
+            if inner:
+                out.append(f'{prelude} {{\n{inner}}}\n')
+        elif prelude.startswith('@') or not all(
+                _INTERACTION_RE.search(sel) for sel in _split_selector_list(prelude)):
+            out.append(f'{prelude} {{{body}}}\n')
+    return ''.join(out)
+
+
+def _async_link(href):
+    return (
+        f'<link rel="stylesheet" href="{href}" media="print" onload="this.media=\'all\'">'
+        f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+    )
+
+
+def inline_critical_css(output_dir):
+    """Inline critical CSS into every page that links the site stylesheets."""
+    pages_by_type = {}
+    for html_path in sorted(output_dir.rglob('*.html')):
+        html = html_path.read_text()
+        hrefs = _SITE_CSS_LINK_RE.findall(html)
+        if hrefs:
+            pages_by_type.setdefault(page_type(html), []).append((html_path, html, hrefs))
+
+    hits = 0
+    inlined = 0
+    report = []
+    for kind, pages in sorted(pages_by_type.items()):
+        # All pages of a type link the same bundles; read them via the first page
+        html_path, _, hrefs = pages[0]
+        css = ''.join(
+            path.read_text()
+            for path in (resolve_local(href, html_path, output_dir) for href in hrefs)
+            if path
+        )
+        vocab = set()
+        for _, html, _ in pages:
+            vocab.update(fold_vocabulary(html))
+
+        # 'first-paint': extraction drops print/animation/interaction rules
+        key = content_hash('first-paint\0' + kind + '\0' + css + '\0' + ' '.join(sorted(vocab)), length=16)
+        cached = read_cache('critical', key)
+        if cached is not None:
+            critical = cached.decode('utf-8')
+            hits += 1
+        else:
+            critical = first_paint_css(shake_css(css, vocab, match_elements=True))
+            write_cache('critical', key, critical)
+
+        critical_size = len(critical.encode('utf-8'))
+        css_size = len(css.encode('utf-8'))
+        if critical_size > CRITICAL_MAX_SHARE * css_size:
+            report.append(
+                f"  {kind:<10} skipped: critical CSS is {critical_size / 1024:.1f} KB "
+                f"of {css_size / 1024:.1f} KB (over {CRITICAL_MAX_SHARE:.0%})"
+            )
+            continue
+
+        inlined += 1
+        style_tag = f'<style>{critical}</style>\n  '
+        for html_path, html, _ in pages:
+            start = _SITE_CSS_LINK_RE.search(html).start()
+            rest = _SITE_CSS_LINK_RE.sub(lambda m: _async_link(m.group(1)), html[start:])
+            html_path.write_text(html[:start] + style_tag + rest)
+
+        report.append(
+            f"  {kind:<10} {critical_size / 1024:5.1f} KB inlined of {css_size / 1024:.1f} KB"
+        )
+
+    print(f"✓ Inlined critical CSS for {inlined} of {len(pages_by_type)} page types ({hits} cached)")
+    print('\n'.join(report))
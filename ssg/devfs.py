@@ -0,0 +1,103 @@
+"""In-memory output for the dev server.
+
+Dev builds go to a scratch directory in RAM (/dev/shm where it exists, else
+the system temp dir), since pandoc and the process-pool stages write real
+files. After each build, load_tree reads that directory into a snapshot
+{build-relative path: (bytes, source path, mtime)} that dev-server.py serves
+from directly. Nothing is written under build/, and requests never touch the
+disk. A rebuild swaps in a new snapshot, so pages keep being served while
+one is in progress.
+
+Large media isn't copied into the build at all: with passthrough on,
+copy_asset symlinks files of DEV_PASSTHROUGH_SUFFIXES of at least
+DEV_PASSTHROUGH_BYTES to their source, and their snapshot entry holds the
+source path (bytes None), streamed per request.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from ssg.config import DEV_PASSTHROUGH_BYTES, DEV_PASSTHROUGH_SUFFIXES
+
+_PASSTHROUGH = False
+
+
+def set_passthrough(enabled):
+    """Link large media from the source tree instead of copying it (dev builds only)."""
+    global _PASSTHROUGH
+    _PASSTHROUGH = enabled
+
+
+def copy_asset(src, dest, copy=shutil.copy2):
+    """Copy a source file into the build, or symlink it there if it is large media and passthrough is on."""
+    src, dest = Path(src), Path(dest)
+    if (_PASSTHROUGH
+            and src.suffix.lower() in DEV_PASSTHROUGH_SUFFIXES
+            and src.stat().st_size >= DEV_PASSTHROUGH_BYTES):
+        dest.unlink(missing_ok=True)
+        dest.symlink_to(src.resolve())
+        return
+    copy(src, dest)
+
+
+def dev_output_dir():
+    """A fresh scratch build directory, RAM-backed where the OS provides one."""
+    shm = '/dev/shm'
+    return Path(tempfile.mkdtemp(prefix='site-dev-', dir=shm if os.path.isdir(shm) else None))
+
+
+def load_tree(output_dir, previous=None):
+    """{build-relative path: (bytes or None, passthrough source or None, mtime)} for a build directory.
+
+    Entries of previous whose file is unchanged (same mtime and size) are
+    reused as they are rather than read again.
+    """
+    previous = previous or {}
+    tree = {}
+    pending = [(str(output_dir), '')]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, rel + '/'))
+                elif entry.is_symlink():
+                    source = os.path.realpath(entry.path)
+                    if os.path.isfile(source):
+                        linked = (None, source, os.stat(source).st_mtime)
+                        tree[rel] = previous.get(rel) if previous.get(rel) == linked else linked
+                elif entry.is_file():
+                    st = entry.stat()
+                    known = previous.get(rel)
+                    if (known and known[1] is None and known[2] == st.st_mtime
+                            and len(known[0]) == st.st_size):
+                        tree[rel] = known
+                        continue
+                    with open(entry.path, 'rb') as f:
+                        tree[rel] = (f.read(), None, st.st_mtime)
+    return tree
+
+
+def resolve(tree, url_path):
+    """Snapshot key serving url_path, the way GitHub Pages resolves it, or None."""
+    rel = url_path.lstrip('/')
+    if rel == '' or rel.endswith('/'):
+        candidates = [rel + 'index.html']
+    elif '.' not in rel.rsplit('/', 1)[-1]:
+        # Extensionless URL: {path}.html, then {path}/index.html
+        candidates = [rel + '.html', rel + '/index.html']
+    else:
+        candidates = [rel]
+    return next((key for key in candidates if key in tree), None)
+
+
+def open_entry(entry):
+    """A binary file object for a snapshot entry."""
+    data, source, _ = entry
+    if source is not None:
+        return open(source, 'rb')
+    return io.BytesIO(data)
@@ -0,0 +1,117 @@
+"""Fingerprint static assets with content hashes and rewrite references to them.
+
+Every file under build/static/ gets a copy named name.<hash>.ext, and every
+reference to it in the build's text outputs (pages, stylesheets, JS modules
+including `import` specifiers, markdown mirrors, llms.txt, …) is rewritten to
+the new name. Since a URL now changes whenever its content does, the hashed
+copies can be served with immutable, far-future cache headers. The unhashed
+originals stay in place, so URLs outside the build (external links, pages
+cached before a deploy) keep working. Files already named by their content
+hash (responsive image variants) are left as they are, not copied again.
+
+Stylesheets and scripts are rewritten *before* they are hashed, so a change in
+a dependency (e.g. window.js importing base.js) propagates to its importers.
+"""
+
+import json
+import re
+
+from ssg.config import ASSET_MAP_FILE, SITE_URL
+from ssg.utils import content_hash
+
+# Asset types whose contents can reference other static assets
+TEXT_SUFFIXES = {'.css', '.js', '.mjs'}
+
+# Generated files outside static/ that are scanned for references
+PAGE_SUFFIXES = {'.html', '.css', '.js', '.mjs', '.md', '.txt', '.xml', '.json'}
+
+# A reference to static/<path>, either absolute on the site ("{SITE_URL}/static/…",
+# as in markdown mirrors and feeds), root-relative ("/static/…"), relative via
+# path_prefix ("../../static/…") or bare ("static/…" from the homepage). It must
+# start an attribute value, url(), import specifier, srcset entry or markdown link.
+_STATIC_REF_RE = re.compile(
+    r'''(?:(?<=["'(\s=,<])|^)(?P<up>''' + re.escape(SITE_URL) + r'''/|/|(?:\.\./)+|\./)?static/(?P<path>[^"'()<>\s?#,]+)''',
+    re.MULTILINE,
+)
+
+
+def _hashed_name(rel_path, digest):
+    """static/widgets/base.js → static/widgets/base.<digest>.js"""
+    stem, dot, suffix = rel_path.rpartition('.')
+    if not dot or '/' in suffix:
+        return f'{rel_path}.{digest}'
+    return f'{stem}.{digest}.{suffix}'
+
+
+def rewrite_static_refs(text, resolve):
+    """Rewrite static/<path> references in text using resolve(rel) → new rel or None."""
+    def replace(m):
+        new_rel = resolve('static/' + m.group('path'))
+        if not new_rel:
+            return m.group(0)
+        return (m.group('up') or '') + new_rel
+    return _STATIC_REF_RE.sub(replace, text)
+
+
+def fingerprint_assets(output_dir):
+    """Copy build/static/ assets to content-hashed names and rewrite all references to them.
+
+    Writes build/asset-map.json mapping original URLs to fingerprinted URLs.
+    Returns the {original rel path: fingerprinted rel path} dict.
+    """
+    static_dir = output_dir / 'static'
+    if not static_dir.exists():
+        return {}
+
+    sources = {
+        f.relative_to(output_dir).as_posix(): f
+        for f in static_dir.rglob('*') if f.is_file()
+    }
+    mapping = {}
+    in_progress = set()
+
+    def fingerprint(rel):
+        if rel in mapping:
+            return mapping[rel]
+        if rel not in sources or rel in in_progress:
+            # Unknown path, or an import cycle: leave the reference as-is
+            return None
+        in_progress.add(rel)
+        src = sources[rel]
+        if src.suffix.lower() in TEXT_SUFFIXES:
+            data = rewrite_static_refs(src.read_text(), fingerprint).encode('utf-8')
+        else:
+            data = src.read_bytes()
+        in_progress.discard(rel)
+
+        digest = content_hash(data)
+        if rel.rpartition('.')[0].endswith('.' + digest):
+            # Already named by its content (responsive image variants)
+            mapping[rel] = rel
+            return rel
+        new_rel = _hashed_name(rel, digest)
+        (output_dir / new_rel).write_bytes(data)
+        mapping[rel] = new_rel
+        return new_rel
+
+    for rel in sorted(sources):
+        fingerprint(rel)
+
+    # Rewrite references in every generated text file outside static/
+    rewritten = 0
+    for page in output_dir.rglob('*'):
+        if (not page.is_file()
+                or page.suffix.lower() not in PAGE_SUFFIXES
+                or page.is_relative_to(static_dir)):
+            continue
+        text = page.read_text()
+        new_text = rewrite_static_refs(text, mapping.get)
+        if new_text != text:
+            page.write_text(new_text)
+            rewritten += 1
+
+    asset_map = {f'/{old}': f'/{new}' for old, new in sorted(mapping.items())}
+    (output_dir / ASSET_MAP_FILE).write_text(json.dumps(asset_map, indent=2) + '\n')
+
+    print(f"✓ Fingerprinted {len(mapping)} static assets ({rewritten} files rewritten)")
+    return mapping
@@ -0,0 +1,144 @@
+"""Replace Font Awesome icon markup with an inline SVG sprite per page.
+
+The site only uses a handful of icons, so instead of loading the full Font
+Awesome stylesheet and webfonts from the CDN, each page gets a hidden <svg>
+holding a <symbol> for every icon it uses, taken from the vendored icon set
+in ICON_SET_DIR, and each
+
+    <i class="fas fa-arrow-circle-up"></i>
+
+becomes
+
+    <svg class="icon fa-arrow-circle-up" …><use href="#fa-arrow-circle-up"></use></svg>
+
+Pages whose icons are all found no longer link Font Awesome. A page using an
+icon missing from the vendored set keeps the stylesheet (and a warning is
+printed), so it still renders.
+"""
+
+import html as html_module
+import json
+import re
+from pathlib import Path
+
+from ssg.config import FONT_AWESOME_URL, ICON_SET_DIR
+
+# Icons swapped at runtime by static/theme.js: a page using one gets them all
+ICON_GROUPS = [
+    {'fa-sun', 'fa-moon'},
+]
+
+# Font Awesome style prefixes, which carry no glyph of their own
+_STYLE_CLASSES = {'fa', 'fas', 'far', 'fab', 'fa-solid', 'fa-regular', 'fa-brands'}
+
+_ICON_TAG_RE  = re.compile(r'<i class="([^"]*\bfa-[^"]*)"([^>]*)>\s*</i>')
+_CSS_RULE_RE  = re.compile(r'((?:\.fa-[\w-]+:before,?)+)\{content:"\\(\w+)"\}')
+_GLYPH_RE     = re.compile(r'<glyph\b([^>]*)/>', re.DOTALL)
+_ATTR_RE      = re.compile(r'([\w-]+)="([^"]*)"')
+_FONT_RE      = re.compile(r'<font\b[^>]*horiz-adv-x="(\d+)"')
+_FONT_FACE_RE = re.compile(r'<font-face\b[^>]*units-per-em="(\d+)"[^>]*ascent="(-?\d+)"', re.DOTALL)
+_FA_LINK_RE   = re.compile(
+    rf'\s*(?:<noscript>)?<link rel="stylesheet" href="{re.escape(FONT_AWESOME_URL)}"[^>]*>(?:</noscript>)?'
+)
+_BODY_OPEN_RE = re.compile(r'<body\b[^>]*>')
+
+
+def load_icon_set(icon_dir=ICON_SET_DIR):
+    """Load the vendored icon set as {class name: (path d, advance width)} plus font metrics."""
+    icon_dir = Path(icon_dir)
+    font = (icon_dir / 'fontawesome-webfont.svg').read_text()
+    default_adv = int(_FONT_RE.search(font).group(1))
+    units_per_em, ascent = map(int, _FONT_FACE_RE.search(font).groups())
+
+    glyphs = {}
+    for attrs in _GLYPH_RE.findall(font):
+        attrs = dict(_ATTR_RE.findall(attrs))
+        if 'unicode' in attrs and attrs.get('d'):
+            glyphs[html_module.unescape(attrs['unicode'])] = (
+                attrs['d'].replace('\n', ' '), int(attrs.get('horiz-adv-x', default_adv))
+            )
+
+    icons = {}
+    for selectors, codepoint in _CSS_RULE_RE.findall((icon_dir / 'font-awesome.css').read_text()):
+        glyph = glyphs.get(chr(int(codepoint, 16)))
+        if glyph:
+            for name in re.findall(r'\.(fa-[\w-]+):before', selectors):
+                icons[name] = glyph
+
+    aliases_file = icon_dir / 'aliases.json'
+    if aliases_file.exists():
+        for name, target in json.loads(aliases_file.read_text()).items():
+            if target in icons:
+                icons.setdefault(name, icons[target])
+    return icons, units_per_em, ascent
+
+
+def _icon_name(class_attr):
+    names = [c for c in class_attr.split() if c.startswith('fa-') and c not in _STYLE_CLASSES]
+    return names[0] if names else None
+
+
+def _symbol(name, icon, units_per_em, ascent):
+    # Font glyphs are y-up from the baseline; flip into SVG's y-down space
+    d, adv = icon
+    return (
+        f'<symbol id="{name}" viewBox="0 {-ascent} {adv} {units_per_em}">'
+        f'<path transform="scale(1 -1)" d="{d}"/></symbol>'
+    )
+
+
+def _svg_icon(name, class_attr, rest, icon, units_per_em):
+    classes = ' '.join(['icon'] + [c for c in class_attr.split() if c not in _STYLE_CLASSES])
+    width = f'{icon[1] / units_per_em:.3g}em'
+    return (
+        f'<svg class="{classes}"{rest} width="{width}" height="1em" aria-hidden="true" focusable="false">'
+        f'<use href="#{name}"></use></svg>'
+    )
+
+
+def subset_icons(output_dir):
+    """Inline an SVG sprite of the icons each page uses and drop the Font Awesome stylesheet."""
+    icons, units_per_em, ascent = load_icon_set()
+
+    used = set()
+    missing = {}
+    unlinked = 0
+    for html_path in sorted(output_dir.rglob('*.html')):
+        page = html_path.read_text()
+        names = {_icon_name(c) for c, _ in _ICON_TAG_RE.findall(page)} - {None}
+        if not names and not _FA_LINK_RE.search(page):
+            continue
+
+        for group in ICON_GROUPS:
+            if names & group:
+                names |= group
+        found = {n for n in names if n in icons}
+        for name in names - found:
+            missing.setdefault(name, []).append(html_path.relative_to(output_dir).as_posix())
+
+        def replace(m):
+            name = _icon_name(m.group(1))
+            if name not in found:
+                return m.group(0)
+            return _svg_icon(name, m.group(1), m.group(2), icons[name], units_per_em)
+
+        new_page = _ICON_TAG_RE.sub(replace, page)
+        if found:
+            sprite = (
+                '<svg xmlns="http://www.w3.org/2000/svg" style="display:none">'
+                + ''.join(_symbol(n, icons[n], units_per_em, ascent) for n in sorted(found))
+                + '</svg>'
+            )
+            body = _BODY_OPEN_RE.search(new_page)
+            new_page = new_page[:body.end()] + '\n' + sprite + new_page[body.end():]
+        if found == names and _FA_LINK_RE.search(new_page):
+            new_page = _FA_LINK_RE.sub('', new_page)
+            unlinked += 1
+        if new_page != page:
+            html_path.write_text(new_page)
+        used |= found
+
+    for name, pages in sorted(missing.items()):
+        print(f"⚠ Icon {name} not in {ICON_SET_DIR}; keeping Font Awesome on {len(pages)} page(s), e.g. {pages[0]}")
+    print(f"✓ Subset {len(used)} icons into inline SVG sprites ({', '.join(sorted(used)) or 'none'}); "
+          f"removed Font Awesome from {unlinked} pages")
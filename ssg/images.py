@@ -0,0 +1,232 @@
+"""Responsive images: resized WebP/AVIF variants and intrinsic dimensions.
+
+For every local raster image referenced by an <img> in the generated pages,
+resized variants are encoded in each of IMAGE_FORMATS at the IMAGE_WIDTHS
+narrower than the original (plus the original width), written next to the
+original as name-<width>w.<hash>.<format>. Variants are only ever referenced
+from the srcsets written here, so they carry their content hash from the start
+and fingerprinting leaves them alone. The <img> is then wrapped in a <picture>
+with one <source srcset sizes> per format, and given width/height (so the
+browser reserves space before the image loads) and loading="lazy" unless it
+sits above the fold.
+
+An <img> may carry its own sizes="…" hint (e.g. the 48px people mugs);
+otherwise IMAGE_SIZES is used. A fixed slot ("28px") also sets the width and
+height, so the nav logo is sized as rendered rather than as stored. Animated GIFs keep their original file and only
+get dimensions and lazy loading.
+
+Requires Pillow (pip install Pillow); without it the stage is skipped.
+Encoded variants and image dimensions are cached by content hash, and new
+variants are encoded in parallel.
+"""
+
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import IMAGE_FORMATS, IMAGE_QUALITY, IMAGE_SIZES, IMAGE_WIDTHS
+from ssg.critical import fold_markup
+from ssg.static import resolve_local
+from ssg.utils import content_hash
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+RASTER_SUFFIXES = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+_IMG_RE       = re.compile(r'<img\b[^>]*>')
+_ATTR_RE      = re.compile(r'''\s([\w-]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?''')
+_PICTURE_RE   = re.compile(r'<picture\b.*?</picture>', re.DOTALL)
+_NOSCRIPT_RE  = re.compile(r'<noscript\b.*?</noscript>', re.DOTALL)
+
+
+def _parse_attrs(tag):
+    """Attribute dict of an <img> tag; values may be quoted or bare."""
+    return {name.lower(): value.strip('"\'') for name, value in _ATTR_RE.findall(tag)}
+
+
+def _image_sizes(attrs):
+    """The sizes value for an <img>: its own sizes, its fixed width attribute, or IMAGE_SIZES."""
+    if 'sizes' in attrs:
+        return attrs['sizes']
+    if attrs.get('width', '').isdigit():
+        width = attrs['width']
+        return f'(max-width: {width}px) 100vw, {width}px'
+    return IMAGE_SIZES
+
+
+def _image_info(data):
+    """Return {'width', 'height', 'animated'} for image bytes, cached by content hash."""
+    key = content_hash(data, length=20) + '.json'
+    cached = read_cache('images', key)
+    if cached is not None:
+        return json.loads(cached)
+    with Image.open(BytesIO(data)) as im:
+        info = {
+            'width': im.width,
+            'height': im.height,
+            'animated': getattr(im, 'is_animated', False),
+        }
+    write_cache('images', key, json.dumps(info))
+    return info
+
+
+def _variant_key(digest, width, fmt):
+    return f'{digest}-{width}w-q{IMAGE_QUALITY}.{fmt}'
+
+
+def _encode_variant(job):
+    """Encode one resized variant into the cache. job = (source path, digest, width, format)."""
+    src, digest, width, fmt = job
+    with Image.open(src) as im:
+        if im.mode not in ('RGB', 'RGBA'):
+            im = im.convert('RGBA' if im.mode in ('LA', 'P', 'PA') else 'RGB')
+        if width < im.width:
+            height = round(im.height * width / im.width)
+            im = im.resize((width, height), Image.LANCZOS)
+        buf = BytesIO()
+        im.save(buf, format=fmt.upper(), quality=IMAGE_QUALITY)
+    write_cache('images', _variant_key(digest, width, fmt), buf.getvalue())
+    return job
+
+
+def _supported_formats():
+    extensions = Image.registered_extensions()
+    return [fmt for fmt in IMAGE_FORMATS if f'.{fmt}' in extensions]
+
+
+def _variant_name(src_name, width, fmt, digest):
+    stem = src_name.rsplit('.', 1)[0]
+    return f'{stem}-{width}w.{digest}.{fmt}'
+
+
+def _target_widths(original_width, sizes):
+    """Variant widths for an image shown at `sizes`.
+
+    A fixed slot ("48px") gets 1x/2x/3x variants; anything else gets the
+    IMAGE_WIDTHS narrower than the original, plus the original width.
+    """
+    fixed = re.fullmatch(r'(\d+)px', sizes.strip())
+    if fixed:
+        slot = int(fixed.group(1))
+        widths = [slot * k for k in (1, 2, 3) if slot * k < original_width]
+        return widths or [original_width]
+    return [w for w in IMAGE_WIDTHS if w < original_width] + [original_width]
+
+
+def _rewrite_img(tag, attrs, info, src, widths, formats, names, lazy):
+    """The <picture> for an <img>; names maps (width, format) to each variant's file name."""
+    extra = ''
+    fixed = re.fullmatch(r'(\d+)px', attrs.get('sizes', '').strip())
+    if 'width' not in attrs and 'height' not in attrs and fixed:
+        slot = int(fixed.group(1))
+        extra += f' width="{slot}" height="{round(info["height"] * slot / info["width"])}"'
+    elif 'width' not in attrs and 'height' not in attrs:
+        extra += f' width="{info["width"]}" height="{info["height"]}"'
+    elif attrs.get('width', '').isdigit() and 'height' not in attrs:
+        extra += f' height="{round(info["height"] * int(attrs["width"]) / info["width"])}"'
+    if lazy and 'loading' not in attrs:
+        extra += ' loading="lazy"'
+    if 'decoding' not in attrs:
+        extra += ' decoding="async"'
+    new_tag = tag[:-1].rstrip('/').rstrip() + extra + '>'
+    if not widths or not formats:
+        return new_tag
+
+    sizes = _image_sizes(attrs)
+    base = src.rsplit('/', 1)[0] + '/' if '/' in src else ''
+    name = src.rsplit('/', 1)[-1]
+    sources = ''.join(
+        f'<source type="{_MIME_TYPES[fmt]}" sizes="{sizes}" srcset="'
+        + ', '.join(f'{base}{names[w, fmt]} {w}w' for w in widths)
+        + '">'
+        for fmt in formats
+    )
+    return f'<picture>{sources}{new_tag}</picture>'
+
+
+def responsive_images(output_dir, workers=None):
+    """Generate image variants and rewrite <img> tags in every generated page."""
+    if Image is None:
+        print("⚠ Pillow not installed; skipping responsive images (pip install Pillow)")
+        return
+    formats = _supported_formats()
+
+    images = {}    # built image path → (digest, info)
+    variants = {}  # (built image path, width, format) → (source path, digest, width, format)
+    pages = []
+    for html_path in sorted(output_dir.rglob('*.html')):
+        page = html_path.read_text()
+        if '<img' not in page:
+            continue
+        pages.append((html_path, page))
+        for tag in _IMG_RE.findall(page):
+            attrs = _parse_attrs(tag)
+            path = resolve_local(attrs.get('src', ''), html_path, output_dir)
+            if not path or path.suffix.lower() not in RASTER_SUFFIXES:
+                continue
+            if path not in images:
+                data = path.read_bytes()
+                images[path] = (content_hash(data, length=20), _image_info(data))
+            digest, info = images[path]
+            if info['animated']:
+                continue
+            for width in _target_widths(info['width'], _image_sizes(attrs)):
+                for fmt in formats:
+                    variants[path, width, fmt] = (str(path), digest, width, fmt)
+
+    new_jobs = [
+        job for job in variants.values()
+        if read_cache('images', _variant_key(*job[1:])) is None
+    ]
+    if new_jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_encode_variant, new_jobs))
+
+    # Write every variant into the build from the cache, under its final name
+    variant_bytes = 0
+    names = {}  # (built image path, width, format) → variant file name
+    for (path, width, fmt), (_, digest, _, _) in variants.items():
+        data = read_cache('images', _variant_key(digest, width, fmt))
+        names[path, width, fmt] = _variant_name(path.name, width, fmt, content_hash(data))
+        path.with_name(names[path, width, fmt]).write_bytes(data)
+        variant_bytes += len(data)
+
+    # Rewrite <img> tags (images inside <picture> or <noscript> are left alone)
+    rewritten = 0
+    for html_path, page in pages:
+        fold = fold_markup(page)
+        skip = [m.span() for m in _PICTURE_RE.finditer(page)] + [m.span() for m in _NOSCRIPT_RE.finditer(page)]
+
+        def replace(m):
+            nonlocal rewritten
+            if any(start <= m.start() < end for start, end in skip):
+                return m.group(0)
+            tag = m.group(0)
+            attrs = _parse_attrs(tag)
+            src = attrs.get('src', '')
+            path = resolve_local(src, html_path, output_dir)
+            if path not in images:
+                return tag
+            _, info = images[path]
+            widths = [] if info['animated'] else _target_widths(info['width'], _image_sizes(attrs))
+            rewritten += 1
+            variant_names = {(w, fmt): names[path, w, fmt] for w in widths for fmt in formats}
+            return _rewrite_img(tag, attrs, info, src, widths, formats, variant_names, lazy=tag not in fold)
+
+        new_page = _IMG_RE.sub(replace, page)
+        if new_page != page:
+            html_path.write_text(new_page)
+
+    print(
+        f"✓ Responsive images: {len(images)} images, {len(variants)} variants "
+        f"({', '.join(formats) or 'no formats'}; {len(new_jobs)} encoded, "
+        f"{len(variants) - len(new_jobs)} cached, {variant_bytes / 1024:.0f} KB), {rewritten} <img> tags rewritten"
+    )
+
@@ -0,0 +1,131 @@
+"""Drop third-party and site includes that a rendered page doesn't use.
+
+Templates include KaTeX, Font Awesome, MailerLite CSS and the page scripts on
+every page of a type. After all pages are generated, each one is scanned for
+what it actually contains — math delimiters, fa- icon classes, footnotes, a
+TOC, collapsible sections, a comment section, the subscribe form — and the
+include tags for anything unused are removed. KaTeX is also kept when a local
+script the page loads (a widget calling window.katex) uses it.
+
+The resulting script/style set of every page is written to
+CACHE_DIR/includes-report.txt, so removed requests can be measured.
+"""
+
+import re
+from collections import Counter
+from pathlib import Path
+
+from ssg.config import CACHE_DIR, FONT_AWESOME_URL, KATEX_CSS_URL, KATEX_JS_URL, KATEX_RENDER_URL
+from ssg.math_render import has_unrendered_math
+from ssg.static import page_assets
+
+_SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*\bsrc="([^"]+)"')
+_STYLE_HREF_RE = re.compile(r'<link rel="stylesheet" href="([^"]+)"')
+_FA_CLASS_RE   = re.compile(r'class="[^"]*\bfa-[\w-]+')
+_KATEX_USE_RE  = re.compile(r'\bkatex\b')
+
+
+def _needs_katex_js(html, scripts):
+    return has_unrendered_math(html) or 'class="eq-tip' in html or bool(_KATEX_USE_RE.search(scripts))
+
+
+def _needs_katex_css(html, scripts):
+    return _needs_katex_js(html, scripts) or 'class="katex' in html
+
+
+def _needs_math_render(html, scripts):
+    # math-render.js also opens collapsible sections on anchor navigation
+    return _needs_katex_js(html, scripts) or '<details' in html
+
+
+# (label, include URLs, predicate on the page HTML and the text of the other
+# local scripts it loads). Site-local URLs are given from static/ and match any
+# path prefix.
+INCLUDE_RULES = [
+    ('katex.css',      [KATEX_CSS_URL],                  _needs_katex_css),
+    ('katex.js',       [KATEX_JS_URL, KATEX_RENDER_URL,
+                        'static/macros.js'],             _needs_katex_js),
+    ('math-render.js', ['static/math-render.js'],        _needs_math_render),
+    ('font-awesome',   [FONT_AWESOME_URL],               lambda html, _: bool(_FA_CLASS_RE.search(html))),
+    ('toc.js',         ['static/toc.js'],                lambda html, _: 'class="post-toc' in html),
+    ('post.js',        ['static/post.js'],               lambda html, _: 'class="fn"' in html or 'class="post-toc' in html),
+    ('giscus.js',      ['static/giscus.js'],             lambda html, _: 'class="comments-section' in html),
+    ('mailerlite',     ['static/css/mailerlite.css',
+                        'static/subscribe.js'],          lambda html, _: 'id="footer-ml-form"' in html),
+]
+
+# Client-side math, dropped after build-time rendering even with PRUNE_INCLUDES off
+MATH_INCLUDES = ('katex.css', 'katex.js', 'math-render.js')
+
+# The includes themselves, which aren't evidence that a page uses KaTeX
+_INCLUDE_FILES = tuple('/' + url for _, urls, _ in INCLUDE_RULES for url in urls if url.startswith('static/'))
+
+
+def _url_pattern(url):
+    if url.startswith('static/'):
+        return r'[^"]*' + re.escape(url)
+    return re.escape(url)
+
+
+def _include_tag_re(urls):
+    """Match the <script src> / <link rel=stylesheet> tags (and <noscript> fallbacks) for urls."""
+    alts = '|'.join(_url_pattern(url) for url in urls)
+    return re.compile(
+        rf'\s*(?:<noscript>)?<link rel="stylesheet" href="(?:{alts})"[^>]*>(?:</noscript>)?'
+        rf'|\s*<script\b[^>]*\bsrc="(?:{alts})"[^>]*></script>'
+    )
+
+
+_RULES = [(label, _include_tag_re(urls), test) for label, urls, test in INCLUDE_RULES]
+
+
+def page_scripts(html_path, output_dir):
+    """Text of the local scripts a page loads (with their imports), other than the includes above."""
+    return '\n'.join(
+        path.read_text() for path in sorted(page_assets(html_path, output_dir))
+        if path.suffix in ('.js', '.mjs') and not path.as_posix().endswith(_INCLUDE_FILES)
+    )
+
+
+def prune_page(html, scripts='', labels=None):
+    """Remove unused includes from one page. Returns (new html, removed labels).
+
+    scripts is the text of the page's local scripts (page_scripts); labels
+    limits pruning to those rules (all of them if None).
+    """
+    removed = []
+    for label, tag_re, test in _RULES:
+        if labels is not None and label not in labels:
+            continue
+        if tag_re.search(html) and not test(html, scripts):
+            html = tag_re.sub('', html)
+            removed.append(label)
+    return html, removed
+
+
+def prune_includes(output_dir, labels=None):
+    """Prune unused includes (of the rules in labels, if given) from every generated page and log each page's includes."""
+    report = []
+    removed_counts = Counter()
+    for html_path in sorted(output_dir.rglob('*.html')):
+        html = html_path.read_text()
+        new_html, removed = prune_page(html, page_scripts(html_path, output_dir), labels)
+        if removed:
+            html_path.write_text(new_html)
+            removed_counts.update(removed)
+        rel = html_path.relative_to(output_dir)
+        scripts = _SCRIPT_SRC_RE.findall(new_html)
+        styles = _STYLE_HREF_RE.findall(new_html)
+        report.append(f'{rel}')
+        report.append(f'  scripts: {" ".join(scripts) or "-"}')
+        report.append(f'  styles:  {" ".join(dict.fromkeys(styles)) or "-"}')
+        if removed:
+            report.append(f'  removed: {" ".join(removed)}')
+
+    report_path = Path(CACHE_DIR) / 'includes-report.txt'
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text('\n'.join(report) + '\n')
+
+    total = sum(removed_counts.values())
+    summary = ', '.join(f'{label} ×{n}' for label, n in removed_counts.most_common())
+    print(f"✓ Pruned {total} unused includes ({summary or 'none'}; per-page report in {report_path})")
@@ -1,16 +1,101 @@
-"""Generate the homepage (index.html) with posts grouped by sequence."""
+"""Generate the homepage and listing pages with posts grouped by sequence.
 
+Sequences are grouped, sorted and bucketed by year and tag once
+(listing_index), and each sequence's row is rendered once; every listing
+page is then a slice of those rows:
+
+  index.html               newest rows, up to INDEX_PAGE_BYTES of row markup
+  page/<n>/index.html      older rows, paginated the same way
+  archive/index.html       every year and tag with its post count
+  archive/<year>/…         rows dated that year, paginated
+  tags/<tag>/…             rows with that tag, paginated
+
+Pages are split by the byte size of their rows (at most INDEX_PAGE_SIZE rows
+each), so the homepage stays within a fixed budget however large the
+archive grows. Templates are compiled once (shared fragments applied, split
+at the per-page slots) and each page is streamed out in a single write, its
+rows passed through as chunks rather than joined into one string.
+"""
+
+import html as html_module
+import re
+import shutil
+import subprocess
 from pathlib import Path
 
-from ssg.config import AUTHOR
+from ssg.cache import read_cache, write_cache
+from ssg.config import INDEX_EAGER_ROWS, INDEX_PAGE_BYTES, INDEX_PAGE_SIZE
 from ssg.contributors import load_contributors, make_author_html
 from ssg.metadata import load_sequence_metadata
-from ssg.templates import apply_fragments
-from ssg.utils import format_date
+from ssg.templates import compile_template, write_template
+from ssg.utils import content_hash, format_date
 
+# Per-page placeholders, streamed into the compiled templates
+HOME_SLOTS    = ['<!-- POSTS_PLACEHOLDER -->', '<!-- PAGER -->', '<!-- VIDEO_SCRIPT -->']
+LISTING_SLOTS = ['{{TITLE}}', '<!-- LISTING_HEADER -->'] + HOME_SLOTS
 
-def generate_index(posts, output_dir):
-    """Generate index.html with all posts grouped into sequence rows."""
+
+def video_poster(video_url, output_dir):
+    """Extract the first frame of a built video as a JPEG poster next to it.
+
+    Uses ffmpeg if installed; frames are cached by video content hash.
+    Returns the poster URL, or '' if no poster could be produced.
+    """
+    video_path = output_dir / video_url.lstrip('/')
+    if not video_path.is_file():
+        return ''
+    key = content_hash(video_path.read_bytes(), length=20) + '.jpg'
+    poster = read_cache('posters', key)
+    if poster is None:
+        if not shutil.which('ffmpeg'):
+            return ''
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', str(video_path), '-frames:v', '1',
+             '-q:v', '4', '-f', 'image2', '-c:v', 'mjpeg', '-'],
+            capture_output=True,
+        )
+        if result.returncode != 0 or not result.stdout:
+            return ''
+        poster = result.stdout
+        write_cache('posters', key, poster)
+    poster_path = video_path.with_suffix('.poster.jpg')
+    poster_path.write_bytes(poster)
+    return video_url.rsplit('.', 1)[0] + '.poster.jpg'
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'untagged'
+
+
+def _tag_slugs(tags):
+    """{tag: URL slug}; a tag whose slug is already taken ("ML theory" vs "ml-theory") gets -2, -3, …"""
+    slugs = {}
+    taken = set()
+    for tag in sorted(tags):
+        base = slug = _slug(tag)
+        n = 2
+        while slug in taken:
+            slug = f'{base}-{n}'
+            n += 1
+        if slug != base:
+            print(f"⚠ Tag '{tag}' collides with another tag at /tags/{base}/; listed at /tags/{slug}/")
+        taken.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+
+def _site_url(path):
+    """Root-relative URL for a site path, so rows work on listing pages at any depth."""
+    return path if path.startswith(('/', 'http')) else f'/{path}'
+
+
+def listing_index(posts):
+    """Group posts into sequences, sort them newest-first, and bucket them by year and tag.
+
+    Returns {'sequences': [sequence dict, …], 'years': {year: [i, …]},
+    'tags': {tag: [i, …]}, 'tag_slugs': {tag: URL slug}} where the lists
+    index into 'sequences', in order.
+    """
     article_posts = [p for p in posts if p['slug'] != 'about']
     sequence_metadata = load_sequence_metadata()
 
@@ -29,6 +114,7 @@ def generate_index(posts, output_dir):
                     'tag':               meta.get('tag', ''),
                     'thumbnail':         meta.get('thumbnail', ''),
                     'thumbnail_video':   meta.get('thumbnail_video', ''),
+                    'thumbnail_poster':  meta.get('thumbnail_poster', ''),
                     'numbered':          meta.get('numbered', True),
                     'hidden':            meta.get('hidden', False),
                     'expand_on_homepage': meta.get('expand_on_homepage', False),
@@ -44,6 +130,7 @@ def generate_index(posts, output_dir):
                     'tag':               post.get('tag', ''),
                     'thumbnail':         post.get('thumbnail', ''),
                     'thumbnail_video':   post.get('thumbnail_video', ''),
+                    'thumbnail_poster':  post.get('thumbnail_poster', ''),
                     'numbered':          True,
                     'hidden':            post.get('hidden', False),
                     'expand_on_homepage': False,
@@ -72,133 +159,294 @@ def generate_index(posts, output_dir):
         else:
             seq_data['author'] = ', '.join(seq_data['authors'])
         sequence_list.append(seq_data)
-    sequence_list.sort(key=lambda s: (s.get('date', ''), s.get('priority', 0)), reverse=True)
-
-    # --- Build HTML ---
-    contributors = load_contributors()
-    post_html = []
-
-    for sequence in sequence_list:
-        first_post = sequence['posts'][0]
-        coming_soon = first_post.get('coming_soon', False)
-        seq_key = first_post.get('sequence', f"standalone-{first_post['slug']}")
-        is_sequence = not seq_key.startswith('standalone-')
-        # Multi-post sequences link to landing page; standalones link directly to the post
-        if is_sequence and len(sequence['posts']) > 1:
-            click_url = seq_key + '/'
-        else:
-            click_url = first_post.get('url_path', first_post['slug']) + '/'
-        first_post_url = first_post.get('url_path', first_post['slug']) + '/'
+    sequence_list.sort(key=lambda s: (str(s.get('date', '')), s.get('priority', 0)), reverse=True)
 
-        date_str = 'Coming soon...' if coming_soon else format_date(sequence.get('date', ''))
+    # --- Buckets for the archive and tag pages (coming-soon rows are homepage-only) ---
+    years = {}
+    tags = {}
+    for i, sequence in enumerate(sequence_list):
+        if sequence['posts'][0].get('coming_soon'):
+            continue
+        year = str(sequence.get('date', ''))[:4]
+        if year.isdigit():
+            years.setdefault(year, []).append(i)
+        if sequence.get('tag'):
+            tags.setdefault(sequence['tag'], []).append(i)
 
-        # Meta column: date only
-        meta_html = (
-            f'<div class="post-meta">'
-            f'<div class="post-date">{date_str}</div>'
-            f'</div>'
-        )
+    return {'sequences': sequence_list, 'years': years, 'tags': tags, 'tag_slugs': _tag_slugs(tags)}
 
-        # Description
-        if coming_soon:
-            desc_html = ''
-        else:
-            desc = sequence.get('description', '')
-            desc_html = f'<p class="post-description">{desc}</p>' if desc else ''
-
-        # Sub-posts list (for multi-post sequences, or sequences flagged expand_on_homepage)
-        subposts_html = ''
-        numbered = sequence.get('numbered', True)
-        visible_posts = [p for p in sequence['posts'] if not p.get('hidden')]
-
-        # Author line: only for single posts, not multi-post sequences, not coming-soon
-        authors_html = ''
-        if not coming_soon and len(visible_posts) <= 1 and not sequence.get('expand_on_homepage'):
-            author_str = sequence.get('author', '')
-            if author_str:
-                authors_html = f'<p class="post-authors">{author_str}</p>'
-        if len(visible_posts) > 1 or sequence.get('expand_on_homepage'):
-            links = []
-            for i, post in enumerate(visible_posts, 1):
-                display = post.get('toc_title', post['title'])
-                url = post.get('url_path', post['slug']) + '/'
-                prefix = f'{i}. ' if numbered else ''
-                author = post.get('author', '')
-                author_line = f'<span class="post-link-author">{author}</span>' if author else ''
-                links.append(
-                    f'<a href="{url}" class="post-link" onclick="event.stopPropagation()">'
-                    f'<span class="post-link-title">{prefix}{display}</span>'
-                    f'{author_line}'
-                    f'</a>'
-                )
-            subposts_html = (
-                '<div class="post-subposts">'
-                + ''.join(links)
-                + '</div>'
-            )
 
-        # Body column
-        if coming_soon:
-            title_html = f'<h2 class="post-title">{sequence["title"]}</h2>'
-        else:
-            title_html = f'<h2 class="post-title"><a href="{click_url}" tabindex="-1">{sequence["title"]}</a></h2>'
-        body_html = (
-            f'<div class="post-body-col">'
-            f'{title_html}'
-            f'{authors_html}'
-            f'{desc_html}'
-            f'{subposts_html}'
-            f'</div>'
+def _row_html(sequence, output_dir, videos):
+    """Render one sequence row; video thumbnails are appended to videos as (video URL, poster URL)."""
+    first_post = sequence['posts'][0]
+    coming_soon = first_post.get('coming_soon', False)
+    seq_key = first_post.get('sequence', f"standalone-{first_post['slug']}")
+    is_sequence = not seq_key.startswith('standalone-')
+    # Multi-post sequences link to landing page; standalones link directly to the post
+    if is_sequence and len(sequence['posts']) > 1:
+        click_url = f'/{seq_key}/'
+    else:
+        click_url = '/' + first_post.get('url_path', first_post['slug']) + '/'
+
+    date_str = 'Coming soon...' if coming_soon else format_date(str(sequence.get('date', '')))
+
+    # Meta column: date only
+    meta_html = (
+        f'<div class="post-meta">'
+        f'<div class="post-date">{date_str}</div>'
+        f'</div>'
+    )
+
+    # Description
+    if coming_soon:
+        desc_html = ''
+    else:
+        desc = sequence.get('description', '')
+        desc_html = f'<p class="post-description">{desc}</p>' if desc else ''
+
+    # Sub-posts list (for multi-post sequences, or sequences flagged expand_on_homepage)
+    subposts_html = ''
+    numbered = sequence.get('numbered', True)
+    visible_posts = [p for p in sequence['posts'] if not p.get('hidden')]
+
+    # Author line: only for single posts, not multi-post sequences, not coming-soon
+    authors_html = ''
+    if not coming_soon and len(visible_posts) <= 1 and not sequence.get('expand_on_homepage'):
+        author_str = sequence.get('author', '')
+        if author_str:
+            authors_html = f'<p class="post-authors">{author_str}</p>'
+    if len(visible_posts) > 1 or sequence.get('expand_on_homepage'):
+        links = []
+        for i, post in enumerate(visible_posts, 1):
+            display = post.get('toc_title', post['title'])
+            url = '/' + post.get('url_path', post['slug']) + '/'
+            prefix = f'{i}. ' if numbered else ''
+            author = post.get('author', '')
+            author_line = f'<span class="post-link-author">{author}</span>' if author else ''
+            links.append(
+                f'<a href="{url}" class="post-link" onclick="event.stopPropagation()">'
+                f'<span class="post-link-title">{prefix}{display}</span>'
+                f'{author_line}'
+                f'</a>'
+            )
+        subposts_html = (
+            '<div class="post-subposts">'
+            + ''.join(links)
+            + '</div>'
         )
 
-        # Thumbnail column
-        if coming_soon:
-            thumb_html = '<div class="post-thumbnail post-thumbnail--placeholder"></div>'
-        else:
-            thumbnail_video = sequence.get('thumbnail_video', '')
-            thumbnail = sequence.get('thumbnail', '')
-            if thumbnail_video:
-                thumb_html = (
-                    f'<div class="post-thumbnail">'
-                    f'<video src="/{thumbnail_video}" autoplay loop muted playsinline></video>'
-                    f'</div>'
-                )
-            elif thumbnail:
-                thumb_html = (
-                    f'<div class="post-thumbnail">'
-                    f'<img src="{thumbnail}" alt="{sequence["title"]}">'
-                    f'</div>'
-                )
-            else:
-                thumb_html = '<div class="post-thumbnail post-thumbnail--placeholder"></div>'
-
-        if coming_soon:
-            row_html = (
-                f'<div class="post-preview post-preview--coming-soon">'
-                f'{meta_html}'
-                f'{body_html}'
-                f'{thumb_html}'
+    # Body column
+    if coming_soon:
+        title_html = f'<h2 class="post-title">{sequence["title"]}</h2>'
+    else:
+        title_html = f'<h2 class="post-title"><a href="{click_url}" tabindex="-1">{sequence["title"]}</a></h2>'
+    body_html = (
+        f'<div class="post-body-col">'
+        f'{title_html}'
+        f'{authors_html}'
+        f'{desc_html}'
+        f'{subposts_html}'
+        f'</div>'
+    )
+
+    # Thumbnail column
+    if coming_soon:
+        thumb_html = '<div class="post-thumbnail post-thumbnail--placeholder"></div>'
+    else:
+        thumbnail_video = sequence.get('thumbnail_video', '')
+        thumbnail = sequence.get('thumbnail', '')
+        if thumbnail_video:
+            # Nothing is fetched until static/video-thumbs.js plays the
+            # video near the viewport; until then the poster is shown
+            video_url = _site_url(thumbnail_video)
+            poster = sequence.get('thumbnail_poster') or video_poster(video_url, output_dir) or thumbnail
+            if not poster:
+                print(f"⚠ No poster for {video_url} (install ffmpeg or set thumbnail_poster)")
+            if poster:
+                poster = _site_url(poster)
+            poster_attr = f' poster="{poster}"' if poster else ''
+            thumb_html = (
+                f'<div class="post-thumbnail">'
+                f'<video src="{video_url}"{poster_attr} preload="none" loop muted playsinline></video>'
                 f'</div>'
             )
-        else:
-            row_html = (
-                f'<div class="post-preview" onclick="location.href=\'{click_url}\'">'
-                f'{meta_html}'
-                f'{body_html}'
-                f'{thumb_html}'
+            videos.append((video_url, poster))
+        elif thumbnail:
+            thumb_html = (
+                f'<div class="post-thumbnail">'
+                f'<img src="{_site_url(thumbnail)}" alt="{sequence["title"]}" sizes="(max-width: 768px) 100vw, 360px">'
                 f'</div>'
             )
-        post_html.append(row_html)
+        else:
+            thumb_html = '<div class="post-thumbnail post-thumbnail--placeholder"></div>'
+
+    if coming_soon:
+        return (
+            f'<div class="post-preview post-preview--coming-soon">'
+            f'{meta_html}'
+            f'{body_html}'
+            f'{thumb_html}'
+            f'</div>'
+        )
+    return (
+        f'<div class="post-preview" onclick="location.href=\'{click_url}\'">'
+        f'{meta_html}'
+        f'{body_html}'
+        f'{thumb_html}'
+        f'</div>'
+    )
+
+
+def paginate(rows):
+    """Split row indices into pages of at most INDEX_PAGE_BYTES of markup and INDEX_PAGE_SIZE rows.
+
+    rows is a list of (index, html); every page holds at least one row.
+    """
+    pages, current, size = [], [], 0
+    for i, html in rows:
+        row_size = len(html.encode('utf-8'))
+        if current and (len(current) >= INDEX_PAGE_SIZE or size + row_size > INDEX_PAGE_BYTES):
+            pages.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += row_size
+    if current or not pages:
+        pages.append(current)
+    return pages
+
+
+def _page_url(base, n):
+    """URL of page n (1-based) of a listing rooted at base ('/' or '/archive/2026/')."""
+    return base if n == 1 else f'{base}page/{n}/'
+
+
+def _pager_html(base, n, total):
+    links = []
+    if n > 1:
+        links.append(f'<a class="pager-newer" href="{_page_url(base, n - 1)}">← Newer</a>')
+    if total > 1:
+        links.append(f'<span class="pager-position">Page {n} of {total}</span>')
+    if n < total:
+        links.append(f'<a class="pager-older" href="{_page_url(base, n + 1)}">Older →</a>')
+    links.append('<a class="pager-archive" href="/archive/">Archive</a>')
+    return f'<nav class="pager">{"".join(links)}</nav>'
+
+
+def _row_chunks(rows, page):
+    """Yield a page's rows, newline-separated, for streaming into POSTS_PLACEHOLDER."""
+    for n, i in enumerate(page):
+        yield '\n' + rows[i] if n else rows[i]
+
+
+def _write_page(output_dir, url, template, slots):
+    """Stream a compiled template with its slots to url's index.html; returns the bytes written."""
+    path = output_dir / url.strip('/') / 'index.html' if url != '/' else output_dir / 'index.html'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        return write_template(f, template, slots)
+
+
+def generate_index(posts, output_dir):
+    """Generate the homepage, its older pages, and the per-year and per-tag listing pages."""
+    index = listing_index(posts)
+    sequences = index['sequences']
+
+    # Render every row once; listing pages are slices of these
+    rows = []
+    row_videos = []
+    for sequence in sequences:
+        videos = []
+        rows.append(_row_html(sequence, output_dir, videos))
+        row_videos.append(videos)
 
     with open('templates/index.html', 'r') as f:
-        template = f.read()
+        home_template = compile_template(f.read(), HOME_SLOTS)
+    with open('templates/listing.html', 'r') as f:
+        listing_template = compile_template(f.read(), LISTING_SLOTS)
 
-    output = apply_fragments(
-        template,
-        **{'<!-- POSTS_PLACEHOLDER -->': '\n'.join(post_html)},
-    )
+    def video_script(page):
+        has_videos = any(row_videos[i] for i in page)
+        return '  <script defer src="/static/video-thumbs.js"></script>' if has_videos else ''
+
+    def write_listing_page(url, title, header, page, pager):
+        _write_page(output_dir, url, listing_template, {
+            '{{TITLE}}':                  html_module.escape(title),
+            '<!-- LISTING_HEADER -->':    header,
+            '<!-- POSTS_PLACEHOLDER -->': _row_chunks(rows, page),
+            '<!-- PAGER -->':             pager,
+            '<!-- VIDEO_SCRIPT -->':      video_script(page),
+        })
 
-    with open(output_dir / 'index.html', 'w') as f:
-        f.write(output)
+    def write_listing(base, title, header, pages, first=1):
+        for n, page in enumerate(pages[first - 1:], first):
+            page_title = title if n == 1 else f'{title} (page {n})'
+            write_listing_page(_page_url(base, n), page_title, header, page, _pager_html(base, n, len(pages)))
+        return len(pages) - first + 1
+
+    # --- Homepage; its older pages use the listing template ---
+    home_pages = paginate(list(enumerate(rows)))
+    home = home_pages[0]
+    home_size = _write_page(output_dir, '/', home_template, {
+        '<!-- POSTS_PLACEHOLDER -->': _row_chunks(rows, home),
+        '<!-- PAGER -->':             _pager_html('/', 1, len(home_pages)),
+        '<!-- VIDEO_SCRIPT -->':      video_script(home),
+    })
+    listing_pages = write_listing('/', 'All posts', '', home_pages, first=2)
+
+    # --- Archive: per-year and per-tag listings ---
+    for year, indices in sorted(index['years'].items(), reverse=True):
+        listing_pages += write_listing(
+            f'/archive/{year}/', f'Posts from {year}',
+            f'<div class="site-header"><h1>Posts from {html_module.escape(year)}</h1></div>',
+            paginate([(i, rows[i]) for i in indices]),
+        )
+    for tag, indices in sorted(index['tags'].items()):
+        listing_pages += write_listing(
+            f'/tags/{index["tag_slugs"][tag]}/', f'{tag} posts',
+            f'<div class="site-header"><h1>{html_module.escape(tag)}</h1></div>',
+            paginate([(i, rows[i]) for i in indices]),
+        )
+
+    year_links = ''.join(
+        f'<li><a href="/archive/{year}/">{html_module.escape(year)}</a> <span class="archive-count">{len(indices)}</span></li>'
+        for year, indices in sorted(index['years'].items(), reverse=True)
+    )
+    tag_links = ''.join(
+        f'<li><a href="/tags/{index["tag_slugs"][tag]}/">{html_module.escape(tag)}</a> <span class="archive-count">{len(indices)}</span></li>'
+        for tag, indices in sorted(index['tags'].items())
+    )
+    archive_header = (
+        '<div class="site-header"><h1>Archive</h1></div>'
+        '<div class="archive-groups">'
+        f'<section><h2>By year</h2><ul class="archive-list">{year_links}</ul></section>'
+        f'<section><h2>By tag</h2><ul class="archive-list">{tag_links}</ul></section>'
+        '</div>'
+    )
+    write_listing_page('/archive/', 'Archive', archive_header, [], '')
+    listing_pages += 1
 
-    print("✓ Generated index.html")
+    summary = (f"{len(home)} of {len(rows)} rows, {home_size / 1024:.0f} KB; "
+               f"{listing_pages} listing pages: {len(home_pages) - 1} older, "
+               f"{len(index['years'])} years, {len(index['tags'])} tags, archive")
+    videos = [(pos, v) for pos, i in enumerate(home) for v in row_videos[i]]
+    if videos:
+        # Bytes fetched on load: the page plus autoplayed videos before; now
+        # the page, the posters, and the videos of the rows in the first
+        # viewport, which static/video-thumbs.js starts playing right away
+        def size(url):
+            path = output_dir / url.lstrip('/')
+            return path.stat().st_size if url.startswith('/') and path.is_file() else 0
+        page = home_size
+        eager = [video for pos, (video, _) in videos if pos < INDEX_EAGER_ROWS]
+        missing = sum(1 for _, (_, poster) in videos if not poster)
+        before = page + sum(size(video) for _, (video, _) in videos)
+        after = (page + sum(size(poster) for _, (_, poster) in videos if poster)
+                 + sum(size(video) for video in eager))
+        print(f"✓ Generated index.html ({summary}; initial load {before / 1024:.0f} KB → {after / 1024:.0f} KB, "
+              f"{len(eager)} of {len(videos)} video thumbnail(s) played on load, "
+              f"the rest fetched only near the viewport)")
+        if missing:
+            print(f"⚠ {missing} of {len(videos)} video thumbnail(s) have no poster and show nothing until played "
+                  f"(install ffmpeg or set thumbnail_poster)")
+    else:
+        print(f"✓ Generated index.html ({summary})")
@@ -0,0 +1,232 @@
+"""On-demand page rendering for the dev server (python dev-server.py --lazy).
+
+Instead of building the whole site up front and again on every change, a
+LazySite renders a page the first time it is requested: /quanta/ runs
+build_post for that one post, /openquestions/<slug>/ renders that one
+discussion page, /static/… copies the static files. Post metadata and
+sequence navigation come from a SiteContext kept across requests and rebuilt
+only after posts change (cheap, with the frontmatter index).
+
+Global pages are rendered on their first hit too: the homepage and listings,
+the open-questions page and sequence landing pages from metadata alone;
+feeds, llms.txt and search first render every post they read (and search
+every question page). The post-processing stages (minify, fingerprint,
+critical CSS, …), related reading, the sitemap and the service worker are
+production-only and not run.
+
+Each rendered page records the source paths it depends on and the output
+files it wrote. invalidate() drops the pages a change affects and deletes
+their files, so they are rendered again on their next request; everything
+else keeps being served as it is.
+"""
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from ssg.config import CONTRIBUTORS_FILE, OPEN_QUESTIONS_DIR, POSTS_DIR, QUESTIONS_FILE
+from ssg.devfs import load_tree, resolve, set_passthrough
+from ssg.index import generate_index
+from ssg.llms import generate_llms_txt
+from ssg.post import build_post
+from ssg.question_pages import question_template, render_question_page
+from ssg.questions import generate_open_questions, link_open_questions_alias
+from ssg.rss import FEED_FILES, generate_rss
+from ssg.scan import files, rescan
+from ssg.search import generate_search_index
+from ssg.sequence_page import generate_sequence_page
+from ssg.site import SiteContext
+from ssg.static import copy_static_files
+from ssg.utils import load_questions_data, reset_questions_cache
+
+# Sources every page is rendered from (bylines come from contributors.json)
+SHARED_DEPS = ('templates', 'data', CONTRIBUTORS_FILE)
+# Sources of pages listing the whole site
+GLOBAL_DEPS = SHARED_DEPS + (POSTS_DIR, OPEN_QUESTIONS_DIR, 'static')
+
+LISTING_ROOTS = ('page', 'archive', 'tags')
+
+
+def _norm(path):
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+def _affects(path, dep):
+    return path == dep or path.startswith(dep + '/')
+
+
+class LazySite:
+    """A dev build in output_dir whose pages are rendered when first requested."""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.lock = threading.Lock()
+        self.site = None
+        # {page: (dependency paths, build-relative files written)}
+        self.rendered = {}
+        self.tree = {}
+        set_passthrough(True)
+        if self.output_dir.exists():
+            shutil.rmtree(self.output_dir)
+        self.output_dir.mkdir()
+
+    def context(self):
+        """The cached SiteContext, rebuilt after posts changed."""
+        if self.site is None:
+            self.site = SiteContext(POSTS_DIR)
+        return self.site
+
+    def lookup(self, url_path):
+        """(snapshot, key) serving url_path, rendering its page first if needed; key is None for a 404."""
+        with self.lock:
+            key = resolve(self.tree, url_path)
+            if key is None:
+                page = self._page_for(url_path)
+                if page is not None and page not in self.rendered:
+                    self._ensure(page)
+                    key = resolve(self.tree, url_path)
+            return self.tree, key
+
+    def invalidate(self, changed_paths):
+        """Drop the pages changed_paths affect; returns how many were dropped."""
+        changed = [_norm(p) for p in changed_paths]
+        with self.lock:
+            rescan(changed)
+            reset_questions_cache()
+            if any(_affects(p, POSTS_DIR) for p in changed):
+                self.site = None
+
+            stale = [
+                page for page, (deps, _) in self.rendered.items()
+                if any(_affects(p, dep) for p in changed for dep in deps)
+            ]
+            for page in stale:
+                _, written = self.rendered.pop(page)
+                for rel in written:
+                    (self.output_dir / rel).unlink(missing_ok=True)
+            self.tree = load_tree(self.output_dir, self.tree)
+            return len(stale)
+
+    # --- Pages -------------------------------------------------------------
+    # ('static',), ('post', url_path), ('question', slug), ('sequence', key),
+    # ('listing',), ('questions',), ('llms',), ('feeds',), ('search',)
+
+    def _posts_by_url(self):
+        site = self.context()
+        return {m['url_path']: m for m in site.file_to_metadata.values()}
+
+    def _page_for(self, url_path):
+        """The page that renders url_path, or None if nothing does."""
+        rel = url_path.strip('/')
+        parts = rel.split('/')
+        if rel in ('', 'index.html') or parts[0] in LISTING_ROOTS:
+            return ('listing',)
+        if parts[0] == 'static':
+            return ('static',)
+        if rel in ('openquestions', 'openquestions.html', 'openquestions/index.html'):
+            return ('questions',)
+        if parts[0] == 'openquestions':
+            slugs = {q['slug'] for q in load_questions_data()}
+            return ('question', parts[1]) if parts[1] in slugs else None
+        if rel in ('llms.txt', 'llms-full.txt'):
+            return ('llms',)
+        if rel in FEED_FILES.values():
+            return ('feeds',)
+        if parts[0] == 'search':
+            return ('search',)
+
+        # A post page, or a file next to it (assets, markdown mirror)
+        posts = self._posts_by_url()
+        for url in (rel, rel.rsplit('/', 1)[0]):
+            if url in posts:
+                return ('post', url)
+        sequence = rel.removesuffix('/index.html')
+        if any(key == sequence for key, _, _ in self.context().landing_sequences()):
+            return ('sequence', sequence)
+        return None
+
+    def _built_posts(self):
+        """Post metadata in the order a full build lists it: built posts, then coming-soon ones."""
+        site = self.context()
+        built = [site.file_to_metadata[str(f)] for f in site.markdown_files if str(f) in site.file_to_metadata]
+        return built + site.coming_soon()
+
+    def _requires(self, page):
+        """Pages that must be rendered before page, because it reads their output."""
+        if page[0] in ('llms', 'feeds', 'search'):
+            posts = [('post', url) for url in self._posts_by_url()]
+            if page[0] == 'search':
+                posts += [('question', q['slug']) for q in load_questions_data()]
+            return posts
+        return []
+
+    def _ensure(self, page):
+        if page in self.rendered:
+            return
+        for required in self._requires(page):
+            self._ensure(required)
+
+        start = time.perf_counter()
+        before = self.tree
+        deps = self._render(page)
+        self.tree = load_tree(self.output_dir, before)
+        written = {rel for rel, entry in self.tree.items() if before.get(rel) is not entry}
+        self.rendered[page] = (tuple(_norm(d) for d in deps), written)
+        print(f"✓ Rendered {'/'.join(page)} on demand ({time.perf_counter() - start:.1f}s, {len(written)} files)")
+
+    def _render(self, page):
+        """Render page into the output directory; returns the source paths it depends on."""
+        site = self.context()
+        output_dir = self.output_dir
+        kind = page[0]
+
+        if kind == 'static':
+            copy_static_files(output_dir)
+            return ('static',)
+
+        if kind == 'post':
+            metadata = self._posts_by_url()[page[1]]
+            md_file = Path(metadata['source_path'])
+            build_post(md_file, output_dir, metadata, site.sequence_nav(metadata))
+            # Its own directory holds its assets; sequence neighbours supply
+            # the navigation and TOC, sequence metadata its title and colors,
+            # the questions file its {od: …} open-question cards
+            source = md_file.parent if md_file.parent.name == md_file.stem else md_file
+            siblings = site.sequences.get(site.sequence_key(metadata), [])
+            return (SHARED_DEPS + (str(source), QUESTIONS_FILE)
+                    + tuple(p['source_path'] for p in siblings if 'source_path' in p)
+                    + tuple(map(str, files(POSTS_DIR, name='sequence-metadata.yaml'))))
+
+        if kind == 'question':
+            q = next(q for q in load_questions_data() if q['slug'] == page[1])
+            render_question_page(q, question_template(), output_dir / 'openquestions', site.posts_metadata)
+            # Broad directions link the post they come from by title
+            context_post = q.get('context_post') or ''
+            sources = tuple(
+                p['source_path'] for p in site.posts_metadata
+                if context_post and 'source_path' in p
+                and (p.get('url_path') == context_post or p.get('slug') == context_post.split('/')[-1])
+            )
+            return SHARED_DEPS + (OPEN_QUESTIONS_DIR,) + sources
+
+        if kind == 'sequence':
+            for seq_key, seq_meta, seq_posts in site.landing_sequences():
+                if seq_key == page[1]:
+                    generate_sequence_page(seq_key, seq_meta, seq_posts, output_dir)
+            return SHARED_DEPS + (POSTS_DIR,)
+
+        posts = self._built_posts()
+        if kind == 'listing':
+            generate_index(posts, output_dir)
+        elif kind == 'questions':
+            generate_open_questions(posts, output_dir)
+            link_open_questions_alias(output_dir)
+        elif kind == 'llms':
+            generate_llms_txt(posts, site.sequence_metadata, output_dir)
+        elif kind == 'feeds':
+            generate_rss(posts, output_dir)
+        elif kind == 'search':
+            generate_search_index(posts, output_dir)
+        return GLOBAL_DEPS
@@ -1,29 +1,184 @@
-"""Generate llms.txt from live post data."""
+"""Generate llms.txt, llms-full.txt and per-post markdown mirrors from live post data.
 
-from ssg.config import SITE_URL, SITE_DESCRIPTION
+build_post hands each post's markdown (frontmatter stripped, placeholders
+substituted) to write_markdown_mirror before its HTML-only preprocessing,
+which resolves the site's custom syntax to plain markdown:
+
+  {fn: text}        → a markdown footnote
+  [>text<]          → a markdown footnote
+  $eq${tip: …}      → $eq$
+  ##> Title / <##   → a plain ## Title heading
+  {od: slug}        → a blockquote with the question and a link to its page
+
+and rewrites relative links to absolute URLs. Mirrors are cached by content
+hash and, with MARKDOWN_MIRRORS, written next to each post as index.html.md
+(the llms.txt convention for directory URLs), which llms.txt then links to.
+
+With LLMS_FULL, llms-full.txt concatenates every post's mirror and the open
+questions into one file, streamed one post at a time from the cache.
+"""
+
+import re
+from urllib.parse import urljoin
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import LLMS_FULL, MARKDOWN_MIRRORS, SITE_DESCRIPTION, SITE_URL
+from ssg.utils import content_hash, load_questions_data
+
+MIRROR_NAME = 'index.html.md'
+
+_FRONTMATTER_RE  = re.compile(r'\A---\n.*?\n---\n', re.DOTALL)
+_SIDENOTE_RE     = re.compile(r'\[>(.*?)<\]', re.DOTALL)
+_OD_RE           = re.compile(r'\{od:\s*([^}]+)\}')
+_COLLAPSE_OPEN   = re.compile(r'^(#{2,6})\s*>\s*(.+)$', re.MULTILINE)
+_COLLAPSE_CLOSE  = re.compile(r'^<\s*#{2,6}\s*\n?', re.MULTILINE)
+_SCRIPT_RE       = re.compile(r'<(script|style)\b.*?</\1>\s*', re.DOTALL)
+_MD_LINK_RE      = re.compile(r'(!?\[[^\]]*\]\()([^)\s]+)')
+_HTML_URL_RE     = re.compile(r'\b(src|href)="([^"]+)"')
+_SPACE_RE        = re.compile(r'\s+')
+
+_INTRO = (
+    'Learning Mechanics is a research education site focused on the science of deep learning — '
+    'understanding *why* neural networks work the way they do. We write in-depth posts and tutorials '
+    'aimed at researchers and practitioners who want to go beyond intuition and engage with the '
+    'underlying mathematics.'
+)
+
+
+def _replace_braced(md, prefix, replace):
+    """Replace every prefix…} block (braces inside may nest) with replace(inner text)."""
+    out = []
+    i = 0
+    while True:
+        idx = md.find(prefix, i)
+        if idx == -1:
+            out.append(md[i:])
+            return ''.join(out)
+        out.append(md[i:idx])
+        j = idx + len(prefix)
+        depth = 1
+        while j < len(md) and depth:
+            depth += {'{': 1, '}': -1}.get(md[j], 0)
+            j += 1
+        out.append(replace(md[idx + len(prefix):j - 1].strip()))
+        i = j
+
+
+def _od_block(ref):
+    questions = load_questions_data()
+    q = next((q for q in questions if ref in (q['slug'], q['id'])), None)
+    if not q:
+        return ''
+    label = f"Open Direction {q['question_number']}"
+    return (
+        f"> **{label}: {q['title']}** {_SPACE_RE.sub(' ', q.get('text', ''))}\n>\n"
+        f"> [Details and discussion]({SITE_URL}/openquestions/{q['slug']}/)"
+    )
+
+
+def markdown_mirror(md_content, metadata):
+    """Plain-markdown version of a post: custom syntax resolved, links absolute."""
+    url = f"{SITE_URL}/{metadata.get('url_path', metadata['slug'])}/"
+    body = _FRONTMATTER_RE.sub('', md_content, count=1)
+
+    notes = []
+
+    def footnote(text):
+        notes.append(_SPACE_RE.sub(' ', text).strip())
+        return f'[^n{len(notes)}]'
+
+    body = _replace_braced(body, '{fn:', footnote)
+    body = _replace_braced(body, '{tip:', lambda _: '')
+    body = _SIDENOTE_RE.sub(lambda m: footnote(m.group(1)), body)
+    body = _COLLAPSE_OPEN.sub(lambda m: f'{m.group(1)} {m.group(2).strip()}', body)
+    body = _COLLAPSE_CLOSE.sub('', body)
+    body = _OD_RE.sub(lambda m: _od_block(m.group(1).strip()), body)
+    body = _SCRIPT_RE.sub('', body)
+    body = _MD_LINK_RE.sub(lambda m: m.group(1) + urljoin(url, m.group(2)), body)
+    body = _HTML_URL_RE.sub(lambda m: f'{m.group(1)}="{urljoin(url, m.group(2))}"', body)
+
+    header = [f"# {metadata.get('title', '')}", '']
+    byline = ', '.join(filter(None, [metadata.get('author', ''), str(metadata.get('date', ''))]))
+    if byline:
+        header += [f'*{byline}*', '']
+    if metadata.get('description'):
+        header += [f"> {metadata['description']}", '']
+    header += [f'Source: {url}', '']
+
+    text = '\n'.join(header) + '\n' + body.strip() + '\n'
+    if notes:
+        text += '\n' + '\n'.join(f'[^n{i}]: {note}' for i, note in enumerate(notes, 1)) + '\n'
+    return text
+
+
+def write_markdown_mirror(md_content, metadata, output_file):
+    """Cache a post's markdown mirror (and write it next to output_file with MARKDOWN_MIRRORS).
+
+    Returns the cache key, which generate_llms_txt uses to stream llms-full.txt.
+    """
+    key = content_hash(f"{metadata.get('url_path')}\0{metadata.get('title')}\0{md_content}", length=20) + '.md'
+    text = read_cache('llms', key)
+    if text is None:
+        text = markdown_mirror(md_content, metadata).encode('utf-8')
+        write_cache('llms', key, text)
+    if MARKDOWN_MIRRORS:
+        (output_file.parent / MIRROR_NAME).write_bytes(text)
+    return key
+
+
+def _public_posts(posts):
+    return [
+        p for p in sorted(posts, key=lambda p: str(p.get('date', '')), reverse=True)
+        if not p.get('hidden') and not p.get('coming_soon') and p.get('slug') != 'about'
+    ]
+
+
+def _post_link(post):
+    url_path = post.get('url_path', post['slug'])
+    if MARKDOWN_MIRRORS and post.get('markdown_mirror'):
+        return f'{SITE_URL}/{url_path}/{MIRROR_NAME}'
+    return f'{SITE_URL}/{url_path}'
+
+
+def _write_llms_full(posts, output_dir):
+    """Stream every post's cached mirror, then the open questions, into llms-full.txt."""
+    count = 0
+    with open(output_dir / 'llms-full.txt', 'w') as f:
+        f.write(f'# Learning Mechanics\n\n> {SITE_DESCRIPTION}\n\n{_INTRO}\n')
+        for post in posts:
+            text = read_cache('llms', post['markdown_mirror']) if post.get('markdown_mirror') else None
+            if text is None:
+                continue
+            f.write('\n---\n\n')
+            f.write(text.decode('utf-8'))
+            count += 1
+
+        f.write('\n---\n\n## Open Questions\n\n')
+        for q in load_questions_data():
+            f.write(f"### {q['title']}\n\n{q.get('text', '')}\n\n"
+                    f"Discussion: {SITE_URL}/openquestions/{q['slug']}/\n\n")
+    return count
 
 
 def generate_llms_txt(posts, sequence_metadata, output_dir):
-    """Generate llms.txt listing all public content."""
+    """Generate llms.txt listing all public content (and llms-full.txt with LLMS_FULL)."""
+    public = _public_posts(posts)
 
     lines = [
         '# Learning Mechanics',
         '',
         f'> {SITE_DESCRIPTION}',
         '',
-        'Learning Mechanics is a research education site focused on the science of deep learning — understanding *why* neural networks work the way they do. We write in-depth posts and tutorials aimed at researchers and practitioners who want to go beyond intuition and engage with the underlying mathematics.',
+        _INTRO,
         '',
         '## Posts',
         '',
     ]
 
-    for post in sorted(posts, key=lambda p: p.get('date', ''), reverse=True):
-        if post.get('hidden') or post.get('slug') == 'about':
-            continue
+    for post in public:
         title = post.get('title', '')
-        url_path = post.get('url_path', post['slug'])
         desc = post.get('description', '')
-        entry = f'- [{title}]({SITE_URL}/{url_path})'
+        entry = f'- [{title}]({_post_link(post)})'
         if desc:
             entry += f': {desc}'
         lines.append(entry)
@@ -34,6 +189,10 @@ def generate_llms_txt(posts, sequence_metadata, output_dir):
         '',
         f'- [Open Questions]({SITE_URL}/openquestions): A curated list of open research questions and broad directions in the science of deep learning.',
         f'- [About]({SITE_URL}/about): About Learning Mechanics.',
+    ]
+    if LLMS_FULL:
+        lines.append(f'- [Full text]({SITE_URL}/llms-full.txt): Every post and open question as markdown, in one file.')
+    lines += [
         '',
         '## About',
         '',
@@ -42,4 +201,8 @@ def generate_llms_txt(posts, sequence_metadata, output_dir):
     ]
 
     (output_dir / 'llms.txt').write_text('\n'.join(lines))
-    print('✓ Generated llms.txt')
+    if LLMS_FULL:
+        count = _write_llms_full(public, output_dir)
+        print(f'✓ Generated llms.txt and llms-full.txt ({count} posts)')
+    else:
+        print('✓ Generated llms.txt')
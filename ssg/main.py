@@ -3,151 +3,149 @@
 import shutil
 from pathlib import Path
 
-from ssg.metadata import extract_metadata, load_sequence_metadata
 from ssg.post import build_post
 from ssg.index import generate_index
-from ssg.questions import generate_open_questions
+from ssg.questions import generate_open_questions, link_open_questions_alias
 from ssg.question_pages import generate_question_pages
 from ssg.rss import generate_rss
 from ssg.sequence_page import generate_sequence_page
+from ssg.site import SiteContext
+from ssg.devfs import set_passthrough
+from ssg.scan import rescan
+from ssg.scheduler import run_stages
+from ssg.utils import reset_questions_cache
 from ssg.sitemap import generate_sitemap
 from ssg.llms import generate_llms_txt
-from ssg.static import copy_static_files
-
-
-def main():
+from ssg.search import generate_search_index
+from ssg.related import inject_related_reading
+from ssg.math_render import render_math
+from ssg.includes import MATH_INCLUDES, prune_includes
+from ssg.icons import subset_icons
+from ssg.static import copy_static_files, split_css
+from ssg.images import responsive_images
+from ssg.critical import inline_critical_css
+from ssg.minify import minify_build
+from ssg.fingerprint import fingerprint_assets
+from ssg.service_worker import generate_service_worker
+from ssg.config import BUILD_DIR, CRITICAL_CSS, FINGERPRINT_ASSETS, MATH_RENDERING, MINIFY, POSTS_DIR, PRUNE_INCLUDES, RELATED_READING, RESPONSIVE_IMAGES, SEARCH_INDEX, SERVICE_WORKER, SPLIT_CSS, STAGE_WORKERS, SUBSET_ICONS
+
+
+def main(output_dir=BUILD_DIR, dev=False):
+    """Build the site into output_dir.
+
+    dev=True is a dev-server build: large media is linked from the source
+    tree rather than copied (see ssg.devfs).
+    """
     print("Building site...\n")
+    set_passthrough(dev)
 
-    posts_dir = Path('posts')
-    output_dir = Path('build')
+    posts_dir = Path(POSTS_DIR)
+    output_dir = Path(output_dir)
     if output_dir.exists():
         shutil.rmtree(output_dir)
     output_dir.mkdir()
 
-    markdown_files = list(posts_dir.rglob('*.md'))
-    if not markdown_files:
+    # --- First pass: metadata, URL paths, sequence navigation ---
+    site = SiteContext(posts_dir)
+    if not site.markdown_files:
         print("No markdown files found in posts/")
         return
-
-    sequence_metadata = load_sequence_metadata()
-
-    # --- First pass: extract metadata, calculate URL paths ---
-    posts_metadata = []
-    file_to_metadata = {}
-
-    for md_file in markdown_files:
-        metadata = extract_metadata(md_file)
-        if not metadata:
-            continue
-
-        sequence_key = metadata.get('sequence', '')
-
-        # Skip hidden posts and posts in hidden sequences entirely
-        if metadata.get('hidden'):
-            continue
-
-        # Coming-soon posts appear on homepage but are not built
-        if metadata.get('coming_soon'):
-            posts_metadata.append(metadata)
-            continue
-        if sequence_key and sequence_metadata.get(sequence_key, {}).get('hidden'):
-            continue
-
-        if sequence_key and sequence_key in sequence_metadata:
-            seq_meta = sequence_metadata[sequence_key]
-            metadata['sequence_title']       = seq_meta.get('title', '')
-            metadata['sequence_description'] = seq_meta.get('description', '')
-            metadata['sequence_color']       = seq_meta.get('sequence_color', None)
-            metadata['sequence_color_dark']  = seq_meta.get('sequence_color_dark', None)
-            metadata['sequence_numbered']    = seq_meta.get('numbered', True)
-
-        if sequence_key and sequence_key != f"standalone-{metadata['slug']}":
-            metadata['url_path']    = f"{sequence_key}/{metadata['slug']}"
-            metadata['path_prefix'] = "../../"
-        else:
-            metadata['url_path']    = f"{metadata['slug']}"
-            metadata['path_prefix'] = "../"
-
-        posts_metadata.append(metadata)
-        file_to_metadata[str(md_file)] = metadata
-
-    # --- Group by sequence for navigation ---
-    sequences = {}
-    for metadata in posts_metadata:
-        key = metadata.get('sequence', f"standalone-{metadata['slug']}")
-        sequences.setdefault(key, []).append(metadata)
-    for seq in sequences.values():
-        seq.sort(key=lambda p: p.get('sequence_order', 1))
+    sequence_metadata = site.sequence_metadata
 
     # --- Second pass: build each post with navigation context ---
     posts = []
-    for md_file in markdown_files:
-        metadata = file_to_metadata.get(str(md_file))
-        if not metadata:
-            continue
-
-        sequence_key = metadata.get('sequence', f"standalone-{metadata['slug']}")
-        sequence_nav = None
-
-        if sequence_key in sequences and len(sequences[sequence_key]) > 1:
-            sequence_posts = sequences[sequence_key]
-            current_index = next(
-                i for i, p in enumerate(sequence_posts) if p['slug'] == metadata['slug']
-            )
-
-            prev_url = sequence_posts[current_index - 1]['url_path'] + '/' if current_index > 0 else ''
-            next_url = (
-                sequence_posts[current_index + 1]['url_path'] + '/'
-                if current_index < len(sequence_posts) - 1 else ''
-            )
-
-            numbered = metadata.get('sequence_numbered', True)
-            sequence_nav = {
-                'sequence_title':    metadata.get('sequence_title', ''),
-                'sequence_part':     current_index + 1 if numbered else '',
-                'sequence_total':    len(sequence_posts),
-                'sequence_first_url':sequence_posts[0]['url_path'] + '/',
-                'sequence_order_1':  current_index == 0,
-                'prev_title': sequence_posts[current_index - 1]['title'] if current_index > 0 else '',
-                'prev_slug':  sequence_posts[current_index - 1]['slug']  if current_index > 0 else '',
-                'prev_url':   prev_url,
-                'prev_part':  current_index if current_index > 0 else '',
-                'next_title': sequence_posts[current_index + 1]['title'] if current_index < len(sequence_posts) - 1 else '',
-                'next_slug':  sequence_posts[current_index + 1]['slug']  if current_index < len(sequence_posts) - 1 else '',
-                'next_url':   next_url,
-                'next_part':  current_index + 2 if current_index < len(sequence_posts) - 1 else '',
-                'toc_posts':      sequence_posts,
-                'current_slug':   metadata['slug'],
-            }
-
-        built = build_post(md_file, output_dir, metadata, sequence_nav)
-        if built:
-            posts.append(built)
-
-    # Add coming-soon posts so they appear on the homepage
-    for metadata in posts_metadata:
-        if metadata.get('coming_soon'):
-            posts.append(metadata)
-
-    if posts:
-        generate_index(posts, output_dir)
-        generate_open_questions(posts, output_dir)
-        generate_question_pages(output_dir, posts)
-        generate_rss(posts, output_dir)
-        generate_sitemap(posts, output_dir)
-        generate_llms_txt(posts, sequence_metadata, output_dir)
-
-        # Generate landing pages for sequences (e.g. /perspectives)
-        for seq_key, seq_posts in sequences.items():
-            if seq_key.startswith('standalone-'):
-                continue
-            seq_meta = sequence_metadata.get(seq_key, {})
-            if seq_meta.get('hidden'):
+
+    def build_posts():
+        for md_file in site.markdown_files:
+            metadata = site.file_to_metadata.get(str(md_file))
+            if not metadata:
                 continue
+
+            built = build_post(md_file, output_dir, metadata, site.sequence_nav(metadata))
+            if built:
+                posts.append(built)
+
+        # Add coming-soon posts so they appear on the homepage
+        posts.extend(site.coming_soon())
+
+    def sequence_pages():
+        # Landing pages for sequences (e.g. /perspectives)
+        for seq_key, seq_meta, seq_posts in site.landing_sequences():
             generate_sequence_page(seq_key, seq_meta, seq_posts, output_dir)
 
-    copy_static_files(output_dir)
+    def if_posts(fn, *args):
+        # The stage graph is fixed before posts are built
+        return lambda: fn(*args) if posts else None
+
+    # --- Build stages: (name, function, reads, writes), in sequential order ---
+    # run_stages derives the dependency graph from the reads and writes
+    pages = ('post pages', 'listing pages', 'questions page', 'question pages', 'sequence pages', 'search')
+    stages = [
+        ('static',         lambda: copy_static_files(output_dir), (), ('static',)),
+        ('posts',          build_posts, (), ('post pages',)),
+        # Video posters are extracted from built post and static files
+        ('index',          if_posts(generate_index, posts, output_dir), ('post pages', 'static'), ('listing pages',)),
+        ('open questions', if_posts(generate_open_questions, posts, output_dir), ('post pages',), ('questions page',)),
+        ('question pages', if_posts(generate_question_pages, output_dir, posts), ('post pages',), ('question pages',)),
+        ('llms',           if_posts(generate_llms_txt, posts, sequence_metadata, output_dir), ('post pages',), ('llms',)),
+        ('sequence pages', if_posts(sequence_pages), ('post pages',), ('sequence pages',)),
+    ]
+    # Reads the post and question pages generated above
+    if SEARCH_INDEX:
+        stages.append(('search', if_posts(generate_search_index, posts, output_dir),
+                       ('post pages', 'question pages'), ('search',)))
+    if RELATED_READING:
+        stages.append(('related', if_posts(inject_related_reading, posts, output_dir),
+                       (), ('post pages', 'question pages')))
+
+    # Post-processing rewrites every page in turn
+    if MATH_RENDERING != 'client':
+        stages.append(('math', lambda: render_math(output_dir), (), pages))
+    if PRUNE_INCLUDES:
+        stages.append(('includes', lambda: prune_includes(output_dir), ('static',), pages))
+    elif MATH_RENDERING != 'client':
+        # Pre-rendered pages still drop the client-side KaTeX they no longer need
+        stages.append(('includes', lambda: prune_includes(output_dir, MATH_INCLUDES), ('static',), pages))
+    if SUBSET_ICONS:
+        stages.append(('icons', lambda: subset_icons(output_dir), ('static',), pages))
+    if RESPONSIVE_IMAGES:
+        stages.append(('images', lambda: responsive_images(output_dir), (), pages + ('static',)))
+    if SPLIT_CSS:
+        stages.append(('split css', lambda: split_css(output_dir), (), pages + ('static',)))
+    if CRITICAL_CSS:
+        stages.append(('critical css', lambda: inline_critical_css(output_dir), (), pages + ('static',)))
+    if MINIFY:
+        stages.append(('minify', lambda: minify_build(output_dir), (), pages + ('static',)))
+
+    # Must run after the above: rewrites references in everything generated
+    if FINGERPRINT_ASSETS:
+        stages.append(('fingerprint', lambda: fingerprint_assets(output_dir), (), pages + ('static',)))
+    # Full-content feeds carry the final post bodies (fingerprinted asset URLs);
+    # the sitemap hashes final page content for lastmod
+    stages.append(('feeds', if_posts(generate_rss, posts, output_dir), ('post pages',), ('feeds',)))
+    stages.append(('sitemap', if_posts(generate_sitemap, posts, output_dir), pages, ('sitemap',)))
+    # Reads the final (fingerprinted) output, so it comes after everything
+    if SERVICE_WORKER:
+        stages.append(('service worker', lambda: generate_service_worker(output_dir),
+                       ('static',), pages + ('service worker',)))
+    # openquestions/index.html shares the finished page rather than being a
+    # second copy every stage above rewrites
+    stages.append(('questions alias', lambda: link_open_questions_alias(output_dir),
+                   ('questions page',), ('questions alias',)))
+
+    run_stages(stages, STAGE_WORKERS)
 
     print(f"\n✓ Build complete! Generated {len(posts)} posts.")
     print(f"  Output in: {output_dir.absolute()}")
     print(f"  Ready for GitHub Pages deployment from build/ directory")
+
+
+def rebuild(changed_paths=None, output_dir=BUILD_DIR, dev=False):
+    """Rebuild in-process after the dev server saw changed_paths.
+
+    The source scan index is kept and only the directories holding the
+    changed paths are re-listed (all of it if changed_paths is None).
+    """
+    rescan(changed_paths)
+    reset_questions_cache()
+    main(output_dir, dev)
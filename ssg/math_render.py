@@ -0,0 +1,265 @@
+"""Render math at build time so readers don't run KaTeX auto-render.
+
+Pandoc (with --mathjax) leaves math as <span class="math inline">\\(…\\)</span>
+and <span class="math display">\\[…\\]</span>. With MATH_RENDERING set to
+'katex' or 'mathml', this stage replaces those spans with rendered markup:
+
+  katex   — a locally installed KaTeX (KATEX_NODE_MODULE) via node; output is
+            identical to client-side rendering and still uses katex.min.css
+  mathml  — pandoc --mathml; native browser rendering, no KaTeX assets at all
+
+Math that pandoc didn't turn into spans — delimiters in the floating TOC,
+headings copied into it, or raw HTML blocks — is found the way KaTeX
+auto-render finds it: \\[…\\], \\(…\\), $$…$$ and $…$ in the body's text,
+outside script, style, pre, code and the like. It is rendered too and
+wrapped in the same math spans. A processed page then holds nothing
+auto-render would still match, so it is marked <html data-math-prerendered>
+and math-render.js skips its body scan; prune_includes() then drops the
+KaTeX assets it no longer needs (with PRUNE_INCLUDES off too).
+
+Macros from static/macros.js and a page's #post-macros JSON are honoured, and
+every rendered equation is cached by (mode, TeX, display, macros).
+"""
+
+import html as html_module
+import json
+import re
+import subprocess
+from pathlib import Path
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import KATEX_NODE_MODULE, MATH_RENDERING
+from ssg.utils import content_hash
+
+MACROS_FILE = Path('static/macros.js')
+
+_MATH_SPAN_RE   = re.compile(r'<span\s+class="math (inline|display)">\\[(\[](.*?)\\[)\]]</span>', re.DOTALL)
+_MACRO_ENTRY_RE = re.compile(r'("(?:\\.|[^"\\])*")\s*:\s*("(?:\\.|[^"\\])*")')
+_POST_MACROS_RE = re.compile(r'<script type="application/json" id="post-macros">(.*?)</script>', re.DOTALL)
+_NON_TEXT_RE    = re.compile(r'<(script|style|annotation)\b.*?</\1>|<[^>]+>', re.DOTALL)
+_MATH_DELIM_RE  = re.compile(r'\$|\\\(|\\\[')
+_LEFT_DELIM_RE  = re.compile(r'\\\[|\\\(|\$\$|\$')
+_MARKUP_RE      = re.compile(r'(<!--.*?-->|<[^>]+>)', re.DOTALL)
+_TAG_NAME_RE    = re.compile(r'<(/?)([a-zA-Z][\w-]*)')
+
+# Auto-render's delimiters (left → right, display) and the elements it skips
+_TEXT_DELIMS  = {'\\[': ('\\]', True), '\\(': ('\\)', False), '$$': ('$$', True), '$': ('$', False)}
+_IGNORED_TAGS = {'script', 'noscript', 'style', 'textarea', 'pre', 'code', 'option', 'math', 'annotation'}
+
+# Reads {"macros": {...}, "items": [[tex, display], ...]} on stdin and writes
+# a JSON list of rendered HTML strings.
+_KATEX_SCRIPT = r'''
+const katex = require(require("path").resolve(process.argv[1]));
+let input = "";
+process.stdin.on("data", d => input += d).on("end", () => {
+  const {macros, items} = JSON.parse(input);
+  const out = items.map(([tex, display]) => katex.renderToString(tex, {
+    displayMode: display, throwOnError: false, macros: Object.assign({}, macros),
+  }));
+  process.stdout.write(JSON.stringify(out));
+});
+'''
+
+
+def load_global_macros():
+    """Parse window.LATEX_MACROS from static/macros.js into a dict."""
+    if not MACROS_FILE.exists():
+        return {}
+    text = re.sub(r'^\s*//.*$', '', MACROS_FILE.read_text(), flags=re.MULTILINE)
+    return {json.loads(k): json.loads(v) for k, v in _MACRO_ENTRY_RE.findall(text)}
+
+
+def _newcommands(macros):
+    """LaTeX \\newcommand definitions for pandoc, from KaTeX-style macros."""
+    lines = []
+    for name, body in macros.items():
+        nargs = max((int(n) for n in re.findall(r'#(\d)', body)), default=0)
+        args = f'[{nargs}]' if nargs else ''
+        lines.append(f'\\newcommand{{{name}}}{args}{{{body}}}')
+    return '\n'.join(lines)
+
+
+def _render_katex(items, macros):
+    result = subprocess.run(
+        ['node', '-e', _KATEX_SCRIPT, KATEX_NODE_MODULE],
+        input=json.dumps({'macros': macros, 'items': items}),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _render_mathml(items, macros):
+    paragraphs = [_newcommands(macros)]
+    for tex, display in items:
+        tex = re.sub(r'\n\s*\n', '\n', tex).strip()
+        paragraphs.append(f'$${tex}$$' if display else f'${tex}$')
+    result = subprocess.run(
+        ['pandoc', '--from=markdown', '--to=html', '--mathml'],
+        input='\n\n'.join(paragraphs), capture_output=True, text=True, check=True,
+    )
+    rendered = re.findall(r'<p>(.*?)</p>', result.stdout, re.DOTALL)
+    if len(rendered) != len(items):
+        raise RuntimeError(f'pandoc returned {len(rendered)} equations for {len(items)}')
+    return rendered
+
+
+_RENDERERS = {'katex': _render_katex, 'mathml': _render_mathml}
+
+
+def has_unrendered_math(html):
+    """Whether the page text still contains math delimiters for KaTeX auto-render."""
+    if 'data-math-prerendered' in html:
+        return False
+    return bool(_MATH_DELIM_RE.search(_NON_TEXT_RE.sub('', html)))
+
+
+def _find_right(text, right, start):
+    """Index of the closing delimiter, skipping escapes and braced groups (as auto-render does), or -1."""
+    i, braces = start, 0
+    while i < len(text):
+        if braces <= 0 and text.startswith(right, i):
+            return i
+        ch = text[i]
+        if ch == '\\':
+            i += 1
+        elif ch == '{':
+            braces += 1
+        elif ch == '}':
+            braces -= 1
+        i += 1
+    return -1
+
+
+def _split_text_math(text):
+    """Split a text node into plain strings and (tex, display, source) triples, like auto-render."""
+    parts, pos = [], 0
+    while True:
+        m = _LEFT_DELIM_RE.search(text, pos)
+        if not m:
+            break
+        right, display = _TEXT_DELIMS[m.group(0)]
+        end = _find_right(text, right, m.end())
+        if end == -1:
+            break
+        parts += [text[pos:m.start()], (text[m.end():end], display, text[m.start():end + len(right)])]
+        pos = end + len(right)
+    parts.append(text[pos:])
+    return parts
+
+
+def sub_text_math(page, replace):
+    """Replace delimited math in the body's text with replace(tex, display, source text)."""
+    start = page.find('<body')
+    if start == -1:
+        return page
+    out, ignored = [page[:start]], []
+    for i, piece in enumerate(_MARKUP_RE.split(page[start:])):
+        if i % 2:
+            m = _TAG_NAME_RE.match(piece)
+            name = m.group(2).lower() if m else ''
+            if name in _IGNORED_TAGS:
+                if m.group(1):
+                    if name in ignored:
+                        del ignored[len(ignored) - 1 - ignored[::-1].index(name)]
+                elif not piece.endswith('/>'):
+                    ignored.append(name)
+            out.append(piece)
+        elif ignored or not _MATH_DELIM_RE.search(piece):
+            out.append(piece)
+        else:
+            out.extend(
+                p if isinstance(p, str) else replace(html_module.unescape(p[0]), p[1], p[2])
+                for p in _split_text_math(piece)
+            )
+    return ''.join(out)
+
+
+def render_math(output_dir):
+    """Pre-render math in every generated page according to MATH_RENDERING."""
+    mode = MATH_RENDERING
+    if mode not in _RENDERERS:
+        return
+    if mode == 'katex' and not (Path(KATEX_NODE_MODULE) / 'package.json').exists():
+        print(f"⚠ MATH_RENDERING='katex' but KaTeX not found at {KATEX_NODE_MODULE}; "
+              f"leaving math to client-side rendering")
+        return
+
+    global_macros = load_global_macros()
+
+    # --- Collect equations from every page ---
+    pages = []
+    pending = {}  # macros json → {cache key: (tex, display)}
+    cached = set()
+    for html_path in sorted(output_dir.rglob('*.html')):
+        page = html_path.read_text()
+        if 'class="math ' not in page and not has_unrendered_math(page):
+            continue
+        macros = dict(global_macros)
+        m = _POST_MACROS_RE.search(page)
+        if m:
+            macros.update(json.loads(m.group(1)))
+        macros_json = json.dumps(macros, sort_keys=True)
+        keys = []
+
+        def collect(tex, display, source=None):
+            key = content_hash(f'{mode}\0{macros_json}\0{display}\0{tex}', length=20)
+            keys.append(key)
+            if key in cached or key in pending.get(macros_json, {}):
+                return ''
+            if read_cache('math', key) is None:
+                pending.setdefault(macros_json, {})[key] = (tex, display)
+            else:
+                cached.add(key)
+            return ''
+
+        # Pandoc's math spans first, then delimiters left in the text, in the
+        # order the substitution below consumes them
+        for kind, tex in _MATH_SPAN_RE.findall(page):
+            collect(html_module.unescape(tex), kind == 'display')
+        sub_text_math(_MATH_SPAN_RE.sub('', page), collect)
+        pages.append((html_path, page, keys))
+
+    # --- Render cache misses, one batch per macro set ---
+    rendered = 0
+    for macros_json, items in pending.items():
+        keys = list(items)
+        try:
+            outputs = _RENDERERS[mode]([items[k] for k in keys], json.loads(macros_json))
+        except (OSError, subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+            print(f"✗ Math rendering failed ({mode}): {getattr(e, 'stderr', e)}")
+            return
+        for key, out in zip(keys, outputs):
+            write_cache('math', key, out)
+        rendered += len(keys)
+
+    # --- Substitute rendered math into pages ---
+    total = 0
+    failed = 0
+    for html_path, page, keys in pages:
+        outputs = iter([read_cache('math', key).decode('utf-8') for key in keys])
+        unrendered = []
+
+        def substitute(kind, source):
+            # pandoc --mathml echoes TeX it can't convert; leave that to auto-render
+            out = next(outputs)
+            if '<math' not in out and 'class="katex' not in out:
+                unrendered.append(source)
+                return source
+            return f'<span class="math {kind}">{out}</span>'
+
+        spans = iter([substitute(m.group(1), m.group(0)) for m in _MATH_SPAN_RE.finditer(page)])
+        # Text math is substituted with pandoc's spans masked, as it was collected
+        new_page = sub_text_math(_MATH_SPAN_RE.sub('\0', page), lambda tex, display, source: (
+            substitute('display' if display else 'inline', source)
+        ))
+        new_page = re.sub('\0', lambda m: next(spans), new_page)
+        # Everything auto-render would match is rendered now, unless the renderer gave up on some
+        if not unrendered:
+            new_page = new_page.replace('<html lang="en">', '<html lang="en" data-math-prerendered>', 1)
+        html_path.write_text(new_page)
+        total += len(keys) - len(unrendered)
+        failed += len(unrendered)
+
+    print(f"✓ Pre-rendered {total} equations with {mode} across {len(pages)} pages "
+          f"({rendered} rendered, {len(cached)} from cache"
+          + (f"; {failed} left to client-side rendering" if failed else '') + ")")
@@ -1,45 +1,162 @@
-"""Extract YAML frontmatter from markdown files and load sequence metadata."""
-
+"""Extract YAML frontmatter from markdown files and load sequence metadata.
+
+Frontmatter is read with bounded I/O (the lines up to the closing ---, at
+most FRONTMATTER_MAX_BYTES) and parsed with libyaml's CSafeLoader when
+PyYAML was built with it. Parsed metadata is kept in a persistent index
+under CACHE_DIR keyed by path, size and mtime, so files that haven't changed
+since the last build skip reading and parsing entirely.
+"""
+
+import copy
+import json
+import os
 import re
 import yaml
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 
+from ssg.cache import read_cache, write_cache
+from ssg.config import FRONTMATTER_MAX_BYTES, POSTS_DIR
+from ssg.scan import file_stat, files
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML without libyaml
+    from yaml import SafeLoader
+
+FRONTMATTER_INDEX = 'frontmatter-index.json'
+
+# {path: [size, mtime_ns, metadata]}, loaded on first use
+_FRONTMATTER_INDEX = None
+# Entries looked up since the last save, and how many came from the index
+_FRONTMATTER_SEEN = {}
+_FRONTMATTER_HITS = 0
+
+
+def _json_default(value):
+    # YAML turns unquoted dates into date/datetime objects
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _json_object(obj):
+    if len(obj) == 1:
+        if '$datetime' in obj:
+            return datetime.fromisoformat(obj['$datetime'])
+        if '$date' in obj:
+            return date.fromisoformat(obj['$date'])
+    return obj
+
+
+def _frontmatter_index():
+    global _FRONTMATTER_INDEX
+    if _FRONTMATTER_INDEX is None:
+        cached = read_cache('metadata', FRONTMATTER_INDEX)
+        try:
+            _FRONTMATTER_INDEX = json.loads(cached, object_hook=_json_object) if cached else {}
+        except ValueError:
+            _FRONTMATTER_INDEX = {}
+    return _FRONTMATTER_INDEX
+
+
+def save_frontmatter_index():
+    """Persist the index entries looked up since the last save; returns (files, from index)."""
+    global _FRONTMATTER_INDEX, _FRONTMATTER_SEEN, _FRONTMATTER_HITS
+    entries = {}
+    for key, entry in _FRONTMATTER_SEEN.items():
+        # Skip metadata JSON can't carry faithfully (non-string keys, exotic YAML types)
+        try:
+            text = json.dumps(entry, default=_json_default, separators=(',', ':'))
+        except (TypeError, ValueError):
+            continue
+        if json.loads(text, object_hook=_json_object) == entry:
+            entries[key] = text
+    write_cache('metadata', FRONTMATTER_INDEX,
+                '{' + ','.join(f'{json.dumps(key)}:{text}' for key, text in entries.items()) + '}')
+    counts = (len(_FRONTMATTER_SEEN), _FRONTMATTER_HITS)
+    _FRONTMATTER_INDEX, _FRONTMATTER_SEEN, _FRONTMATTER_HITS = dict(_FRONTMATTER_SEEN), {}, 0
+    return counts
+
+
+def _read_frontmatter(filepath):
+    """The frontmatter text of a markdown file, or None if it has none.
+
+    Reads line by line up to the closing --- rather than the whole file.
+    Also None when no closing line turns up within FRONTMATTER_MAX_BYTES, in
+    which case the caller reads the whole file.
+    """
+    with open(filepath, 'r') as f:
+        if f.readline() != '---\n':
+            return None
+        lines = []
+        size = 0
+        for line in f:
+            if line == '---\n':
+                return ''.join(lines)
+            lines.append(line)
+            size += len(line)
+            if size > FRONTMATTER_MAX_BYTES:
+                return None
+    return None
+
+
+def _slug_from_filename(filepath):
+    filename = Path(filepath).stem
+    date_match = re.match(r'(\d{4}-\d{2}-\d{2})-(.+)', filename)
+    if date_match:
+        return date_match.group(2)
+    number_match = re.match(r'(\d+)-(.+)', filename)
+    if number_match:
+        return number_match.group(2)
+    return filename
+
 
 def extract_metadata(filepath):
     """Extract YAML frontmatter from a markdown file.
 
+    Unchanged files are served from the persistent frontmatter index.
     Falls back to deriving metadata from filename and first H1 heading.
     """
-    with open(filepath, 'r') as f:
-        content = f.read()
-
-    if content.startswith('---\n'):
-        end = content.find('\n---\n', 4)
-        if end != -1:
-            frontmatter = content[4:end]
-            metadata = yaml.safe_load(frontmatter) or {}
-
-            if 'slug' not in metadata:
-                filename = Path(filepath).stem
-                date_match = re.match(r'(\d{4}-\d{2}-\d{2})-(.+)', filename)
-                if date_match:
-                    metadata['slug'] = date_match.group(2)
-                else:
-                    number_match = re.match(r'(\d+)-(.+)', filename)
-                    if number_match:
-                        metadata['slug'] = number_match.group(2)
-                    else:
-                        metadata['slug'] = filename
-
-            if 'sequence_order' not in metadata:
-                metadata['sequence_order'] = 1
-            else:
-                metadata['sequence_order'] = int(metadata['sequence_order'])
-
-            return metadata
-
-    # Fallback: derive from filename and first H1
+    global _FRONTMATTER_HITS
+    key = Path(filepath).as_posix()
+    stat = file_stat(filepath)
+    if stat is None:
+        st = os.stat(filepath)
+        stat = (st.st_size, st.st_mtime_ns)
+
+    entry = _frontmatter_index().get(key)
+    if entry and entry[0] == stat[0] and entry[1] == stat[1]:
+        _FRONTMATTER_SEEN[key] = entry
+        _FRONTMATTER_HITS += 1
+        return copy.deepcopy(entry[2])
+
+    frontmatter = _read_frontmatter(filepath)
+    if frontmatter is None:
+        with open(filepath, 'r') as f:
+            content = f.read()
+        if content.startswith('---\n'):
+            end = content.find('\n---\n', 4)
+            if end != -1:
+                frontmatter = content[4:end]
+
+    if frontmatter is not None:
+        metadata = yaml.load(frontmatter, Loader=SafeLoader) or {}
+
+        if 'slug' not in metadata:
+            metadata['slug'] = _slug_from_filename(filepath)
+
+        if 'sequence_order' not in metadata:
+            metadata['sequence_order'] = 1
+        else:
+            metadata['sequence_order'] = int(metadata['sequence_order'])
+
+        _FRONTMATTER_SEEN[key] = [stat[0], stat[1], copy.deepcopy(metadata)]
+        return metadata
+
+    # Fallback: derive from filename and first H1 (not indexed: the date is today's)
     filename = Path(filepath).stem
     date_match = re.match(r'(\d{4}-\d{2}-\d{2})-(.+)', filename)
 
@@ -62,22 +179,20 @@ def extract_metadata(filepath):
 
 
 def load_sequence_metadata():
-    """Load all sequence-metadata.yaml files from posts/ subdirectories.
+    """Load all sequence-metadata.yaml files from posts/ subdirectories (via the scan index).
 
     Returns {sequence_id: metadata_dict}.
     """
-    posts_dir = Path('posts')
     sequence_metadata = {}
 
-    if posts_dir.exists():
-        for metadata_file in posts_dir.rglob('sequence-metadata.yaml'):
-            try:
-                with open(metadata_file, 'r') as f:
-                    metadata = yaml.safe_load(f)
-                sequence_id = metadata.get('sequence_id')
-                if sequence_id:
-                    sequence_metadata[sequence_id] = metadata
-            except Exception as e:
-                print(f"Warning: Could not load sequence metadata from {metadata_file}: {e}")
+    for metadata_file in files(POSTS_DIR, name='sequence-metadata.yaml'):
+        try:
+            with open(metadata_file, 'r') as f:
+                metadata = yaml.load(f, Loader=SafeLoader)
+            sequence_id = metadata.get('sequence_id')
+            if sequence_id:
+                sequence_metadata[sequence_id] = metadata
+        except Exception as e:
+            print(f"Warning: Could not load sequence metadata from {metadata_file}: {e}")
 
     return sequence_metadata
@@ -0,0 +1,287 @@
+"""Minify generated HTML, CSS and JS in the build directory.
+
+Pure Python and deliberately conservative: whitespace runs are collapsed
+(to a newline if they contained one, else a space) and comments dropped,
+but tokens are never joined. That keeps ASI-dependent JS, TeX line comments
+and inline formatting intact, while removing the template indentation and
+comment banners that make up most of the slack.
+
+Left verbatim: <pre> and <textarea> contents, quoted attribute values (so
+data-eq / data-tip math source survives), and non-JS <script> blocks such as
+inline JSON. Results are cached by content hash and files are processed in
+parallel.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import CACHE_DIR
+from ssg.utils import content_hash
+
+# Bump to invalidate cached output when the minifiers change
+MINIFIER_VERSION = '1'
+
+_JS_SCRIPT_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+
+# Keywords after which a '/' starts a regex literal rather than a division
+_REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of',
+    'new', 'delete', 'void', 'throw', 'yield', 'await',
+}
+
+
+def _collapse_ws(ws):
+    return '\n' if '\n' in ws else ' '
+
+
+# ---------------------------------------------------------------------------
+# CSS
+# ---------------------------------------------------------------------------
+
+_CSS_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.DOTALL)
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    out = []
+    for tok in _CSS_TOKEN_RE.findall(css):
+        if tok.startswith('/*'):
+            continue
+        out.append(' ' if tok.isspace() else tok)
+    css = ''.join(out)
+    # Strings are single tokens above, so these only see structural text;
+    # split on quotes to keep it that way.
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', css)
+    for i in range(0, len(parts), 2):
+        s = re.sub(r' ?([{};,>]) ?', r'\1', parts[i])
+        s = re.sub(r': ', ':', s)
+        parts[i] = s.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+# ---------------------------------------------------------------------------
+# JS
+# ---------------------------------------------------------------------------
+
+def _skip_string(src, i, quote):
+    """Return the index just past the string literal starting at src[i]."""
+    n = len(src)
+    i += 1
+    while i < n:
+        c = src[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if c == '\n' and quote != '`':
+            return i
+        i += 1
+    return n
+
+
+def _skip_regex(src, i):
+    """Return the index just past the regex literal (and flags) starting at src[i]."""
+    n = len(src)
+    i += 1
+    in_class = False
+    while i < n:
+        c = src[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < n and (src[i].isalnum() or src[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def _regex_allowed(out):
+    """Whether a '/' following the emitted text starts a regex literal."""
+    j = len(out) - 1
+    while j >= 0 and out[j] in ' \n':
+        j -= 1
+    if j < 0:
+        return True
+    if out[j] in '(,=:[!&|?{};+-*%<>~^':
+        return True
+    m = re.search(r'([A-Za-z_$][\w$]*)$', ''.join(out[max(0, j - 12):j + 1]))
+    return bool(m) and m.group(1) in _REGEX_KEYWORDS
+
+
+def minify_js(src):
+    """Strip comments and collapse whitespace in JavaScript, keeping line breaks."""
+    out = []
+    last_ws = True  # at start of output: drop leading whitespace
+
+    def emit_ws(ws):
+        nonlocal last_ws
+        ws = _collapse_ws(ws)
+        if last_ws:
+            if ws == '\n' and out and out[-1] == ' ':
+                out[-1] = '\n'
+            return
+        out.append(ws)
+        last_ws = True
+
+    i, n = 0, len(src)
+    while i < n:
+        c = src[i]
+        nxt = src[i + 1] if i + 1 < n else ''
+        if c == '/' and nxt == '/':
+            j = src.find('\n', i)
+            i = n if j == -1 else j
+            continue
+        if c == '/' and nxt == '*':
+            j = src.find('*/', i + 2)
+            j = n if j == -1 else j + 2
+            emit_ws(src[i:j])
+            i = j
+            continue
+        if c.isspace():
+            j = i
+            while j < n and src[j].isspace():
+                j += 1
+            emit_ws(src[i:j])
+            i = j
+            continue
+        if c in '"\'`':
+            j = _skip_string(src, i, c)
+        elif c == '/' and _regex_allowed(out):
+            j = _skip_regex(src, i)
+        else:
+            j = i + 1
+        out.append(src[i:j])
+        last_ws = False
+        i = j
+    return ''.join(out).strip()
+
+
+# ---------------------------------------------------------------------------
+# HTML
+# ---------------------------------------------------------------------------
+
+_TAG = r'''(?:"[^"]*"|'[^']*'|[^'">])*'''
+_HTML_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    rf'|<(pre|textarea|script|style)\b{_TAG}>.*?</\1\s*>'
+    rf'|<[a-zA-Z/!?]{_TAG}>',
+    re.DOTALL | re.IGNORECASE,
+)
+_RAW_ELEMENT_RE = re.compile(rf'(<(\w+){_TAG}>)(.*)(</\2\s*>)', re.DOTALL)
+_SCRIPT_TYPE_RE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]*)''', re.IGNORECASE)
+_TAG_PART_RE    = re.compile(r'''("[^"]*"|'[^']*')|\s+''')
+
+
+def _minify_tag(tag):
+    """Collapse whitespace between attributes, leaving quoted values untouched."""
+    tag = _TAG_PART_RE.sub(lambda m: m.group(1) or ' ', tag)
+    return tag.replace(' >', '>')
+
+
+def minify_html(html):
+    """Minify an HTML document, including its inline <script> and <style> blocks."""
+    out = []
+    pos = 0
+    after_comment = False
+    for m in _HTML_TOKEN_RE.finditer(html):
+        text = html[pos:m.start()]
+        if after_comment and out and out[-1][-1:].isspace():
+            text = text.lstrip()
+        out.append(re.sub(r'\s+', lambda w: _collapse_ws(w.group()), text))
+        pos = m.end()
+        tok = m.group(0)
+        after_comment = tok.startswith('<!--') and not tok.startswith('<!--[')
+        if after_comment:
+            continue
+        raw = m.group(1)
+        if not raw:
+            out.append(_minify_tag(tok))
+            continue
+        open_tag, _, body, close_tag = _RAW_ELEMENT_RE.match(tok).groups()
+        raw = raw.lower()
+        if raw == 'style':
+            body = minify_css(body)
+        elif raw == 'script':
+            type_m = _SCRIPT_TYPE_RE.search(open_tag)
+            if (type_m.group(1).lower() if type_m else '') in _JS_SCRIPT_TYPES:
+                body = minify_js(body)
+        out.append(_minify_tag(open_tag) + body + close_tag)
+    out.append(re.sub(r'\s+', lambda w: _collapse_ws(w.group()), html[pos:]))
+    return ''.join(out).strip() + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Build stage
+# ---------------------------------------------------------------------------
+
+_MINIFIERS = {
+    '.html': minify_html,
+    '.css':  minify_css,
+    '.js':   minify_js,
+    '.mjs':  minify_js,
+}
+
+
+def _minify_file(path_str):
+    """Minify one file in place. Returns (path, bytes before, bytes after, cache hit)."""
+    path = Path(path_str)
+    data = path.read_bytes()
+    key = content_hash(MINIFIER_VERSION.encode() + path.suffix.encode() + data, length=20)
+    cached = read_cache('minify', key)
+    if cached is None:
+        cached = _MINIFIERS[path.suffix.lower()](data.decode('utf-8')).encode('utf-8')
+        write_cache('minify', key, cached)
+        hit = False
+    else:
+        hit = True
+    if len(cached) < len(data):
+        path.write_bytes(cached)
+        return path_str, len(data), len(cached), hit
+    return path_str, len(data), len(data), hit
+
+
+def minify_build(output_dir, workers=None):
+    """Minify every HTML, CSS and JS file in output_dir in parallel.
+
+    Writes a per-file before/after report to CACHE_DIR/minify-report.txt.
+    """
+    files = sorted(
+        str(f) for f in output_dir.rglob('*')
+        if f.is_file()
+        and f.suffix.lower() in _MINIFIERS
+        and not f.name.endswith(('.min.js', '.min.css'))
+    )
+    if not files:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_minify_file, files, chunksize=8))
+
+    before = sum(r[1] for r in results)
+    after = sum(r[2] for r in results)
+    hits = sum(r[3] for r in results)
+
+    report = [f'{"before":>9} {"after":>9} {"saved":>6}  file']
+    for path_str, b, a, _ in sorted(results, key=lambda r: r[2] - r[1]):
+        saved = 100 * (b - a) / b if b else 0
+        report.append(f'{b:>9} {a:>9} {saved:>5.1f}%  {Path(path_str).relative_to(output_dir)}')
+    report_path = Path(CACHE_DIR) / 'minify-report.txt'
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text('\n'.join(report) + '\n')
+
+    print(
+        f"✓ Minified {len(results)} files: {before / 1024:.1f} KB → {after / 1024:.1f} KB "
+        f"({hits} cached; per-file report in {report_path})"
+    )
@@ -1,14 +1,18 @@
 """Build individual posts: markdown → HTML via pandoc, with post-processing."""
 
 import html as html_module
+import json
 import re
 import subprocess
 from pathlib import Path
 
 from ssg.config import AUTHOR, WHITEPAPER_URL, SITE_URL, WEB_FONT_URL
 from ssg.contributors import load_contributors, load_contributors_data, make_author_html, make_byline_sections, make_people_html
-from ssg.templates import ga_script, mailerlite_includes, footer_html, nav_html, post_theme_script, giscus_script
-from ssg.config import GISCUS_REPO, GISCUS_REPO_ID, GISCUS_CATEGORY_ID, GISCUS_CATEGORY_POSTS
+from ssg.templates import ga_script, mailerlite_includes, feed_links, footer_html, nav_html, post_theme_script, giscus_script, theme_init_script, katex_includes
+from ssg.config import GISCUS_CATEGORY_POSTS, LLMS_FULL, MARKDOWN_MIRRORS, PREFETCH_NEXT
+from ssg.llms import write_markdown_mirror
+from ssg.devfs import copy_asset
+from ssg.scan import listdir
 from ssg.utils import format_date, load_questions_data
 
 
@@ -445,6 +449,50 @@ def generate_citation(metadata):
 ```"""
 
 
+def widget_scripts(markdown_file):
+    """Widget JS files for a post.
+
+    1. Primary companion: {stem}.js (same stem as the markdown file)
+    2. Any other .js in the directory whose stem is NOT the stem of another .md
+    """
+    markdown_file = Path(markdown_file)
+    siblings = listdir(markdown_file.parent)
+    widget_js_files = []
+    companion_js = markdown_file.with_suffix('.js')
+    if companion_js in siblings:
+        widget_js_files.append(companion_js)
+
+    other_md_stems = {p.stem for p in siblings if p.suffix == '.md'}
+    for js_path in siblings:
+        if js_path.suffix == '.js' and js_path.stem not in other_md_stems and js_path not in widget_js_files:
+            widget_js_files.append(js_path)
+    return widget_js_files
+
+
+def next_post_hints(sequence_nav, path_prefix):
+    """Resource hints for the next post in a sequence, per PREFETCH_NEXT.
+
+    'hover'     Speculation Rules prerender once the reader hovers/presses a link to it
+    'prefetch'  <link rel="prefetch"> for the next page and its widget scripts
+    'prerender' immediate Speculation Rules prerender, plus the prefetch links
+                for browsers without Speculation Rules
+    """
+    next_url = sequence_nav.get('next_url', '') if sequence_nav else ''
+    if not next_url or PREFETCH_NEXT not in ('hover', 'prefetch', 'prerender'):
+        return ''
+    href = f'{path_prefix}{next_url}'
+    hints = []
+    if PREFETCH_NEXT in ('prefetch', 'prerender'):
+        hints.append(f'<link rel="prefetch" href="{href}">')
+        for js_path in widget_scripts(sequence_nav['next_source']) if sequence_nav.get('next_source') else []:
+            hints.append(f'<link rel="prefetch" href="{href}{js_path.name}" as="script">')
+    if PREFETCH_NEXT in ('hover', 'prerender'):
+        eagerness = 'moderate' if PREFETCH_NEXT == 'hover' else 'immediate'
+        rules = {'prerender': [{'source': 'list', 'urls': [href], 'eagerness': eagerness}]}
+        hints.append(f'<script type="speculationrules">{json.dumps(rules)}</script>')
+    return '\n  '.join(hints)
+
+
 def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
     """Convert a markdown file to HTML using pandoc.
 
@@ -513,6 +561,9 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
         md_content = f.read()
     for placeholder, value in placeholders.items():
         md_content = md_content.replace(placeholder, value)
+    # Plain-markdown mirror for llms.txt consumers, before the HTML-only preprocessing
+    if MARKDOWN_MIRRORS or LLMS_FULL:
+        metadata['markdown_mirror'] = write_markdown_mirror(md_content, metadata, output_file)
     # Convert custom {fn: text} footnotes to inline HTML spans
     md_content = process_custom_footnotes(md_content)
     # Convert $eq${tip: ...} math tooltips to inline HTML spans
@@ -527,18 +578,7 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
     with open(tmp_file, 'w') as f:
         f.write(md_content)
 
-    # Collect widget JS files for this post:
-    #   1. Primary companion: {stem}.js (same stem as the markdown file)
-    #   2. Any other .js in the directory whose stem is NOT the stem of another .md
-    widget_js_files = []
-    companion_js = markdown_file.with_suffix('.js')
-    if companion_js.exists():
-        widget_js_files.append(companion_js)
-
-    other_md_stems = {p.stem for p in markdown_file.parent.glob('*.md')}
-    for js_path in sorted(markdown_file.parent.glob('*.js')):
-        if js_path.stem not in other_md_stems and js_path not in widget_js_files:
-            widget_js_files.append(js_path)
+    widget_js_files = widget_scripts(markdown_file)
 
     widget_script_tag = ''
     if widget_js_files:
@@ -563,19 +603,26 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
         '--variable', f"date_display={date_display}",
         '--variable', f"nav_html={nav_html(path_prefix)}",
         '--variable', f"ga_script={ga_script()}",
+        '--variable', f"theme_init={theme_init_script()}",
         '--variable', f"theme_script={post_theme_script()}",
         '--variable', f"mailerlite_includes={mailerlite_includes()}",
+        '--variable', f"feed_links={feed_links()}",
     ]
     if widget_script_tag:
         cmd.extend(['--variable', f"widget_script={widget_script_tag}"])
     cmd.extend([
         '--variable', f"web_font_include=<link rel=\"stylesheet\" href=\"{WEB_FONT_URL}\">",
         '--variable', f"footer_html={footer_html()}",
-        '--variable', f"giscus_repo={GISCUS_REPO}",
-        '--variable', f"giscus_repo_id={GISCUS_REPO_ID}",
-        '--variable', f"giscus_category={GISCUS_CATEGORY_POSTS}",
-        '--variable', f"giscus_category_id={GISCUS_CATEGORY_ID}",
+        '--variable', f"giscus_script={giscus_script(GISCUS_CATEGORY_POSTS)}",
+        '--variable', f"katex_includes={katex_includes()}",
     ])
+    resource_hints = next_post_hints(sequence_nav, path_prefix)
+    if resource_hints:
+        cmd.extend(['--variable', f"resource_hints={resource_hints}"])
+    if metadata.get('macros'):
+        # Per-post KaTeX macros, read by math-render.js and the build-time renderer
+        macros_json = json.dumps(metadata['macros']).replace('</', '<\\/')
+        cmd.extend(['--variable', f'post_macros=<script type="application/json" id="post-macros">{macros_json}</script>'])
     if metadata.get('no_comments'):
         cmd.extend(['--metadata', 'no_comments=true'])
     if metadata.get('no_byline'):
@@ -627,9 +674,8 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
             html_content = html_content.replace('<!--PEOPLE_SECTION-->', people_section)
 
         # Inject sequence TOC if available
-        if sequence_nav and 'toc_posts' in sequence_nav:
-            toc_html = _build_toc_html(sequence_nav, metadata)
-            html_content = html_content.replace('<!-- SEQUENCE_TOC_PLACEHOLDER -->', toc_html)
+        if sequence_nav and sequence_nav.get('toc_html'):
+            html_content = html_content.replace('<!-- SEQUENCE_TOC_PLACEHOLDER -->', sequence_nav['toc_html'])
 
         # Inject floating TOC
         html_content = inject_toc(html_content, metadata)
@@ -646,15 +692,13 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
         # Copy post assets (JS, images, JSON, etc.) to output directory.
         # Only applies when the post lives in its own subdirectory (not a flat .md
         # alongside other posts), to avoid copying sibling posts' files.
-        import shutil
         skip_suffixes = {'.md', '.yaml', '.yml'}
         post_dir = markdown_file.parent
         if post_dir.name == markdown_file.stem:
-            for asset in post_dir.iterdir():
-                if (asset.is_file()
-                        and not asset.name.startswith('_tmp_')
+            for asset in listdir(post_dir):
+                if (not asset.name.startswith('_tmp_')
                         and asset.suffix.lower() not in skip_suffixes):
-                    shutil.copy2(asset, output_file.parent / asset.name)
+                    copy_asset(asset, output_file.parent / asset.name)
 
         tmp_file.unlink(missing_ok=True)
         print(f"✓ Built: {metadata['slug']}")
@@ -665,49 +709,3 @@ def build_post(markdown_file, output_dir, metadata, sequence_nav=None):
         print(f"✗ Failed to build {markdown_file}: {e.stderr}")
         return None
 
-
-def _build_toc_html(sequence_nav, metadata):
-    """Build the sequence TOC HTML block inserted at the end of each post."""
-    toc_items = []
-    for post in sequence_nav['toc_posts']:
-        display_title = post.get('toc_title', post['title'])
-        post_url = post.get('url_path', f"{post['slug']}") + '/'
-        if post['slug'] == sequence_nav['current_slug']:
-            toc_items.append(f'<strong>{display_title}</strong>')
-        else:
-            toc_items.append(
-                f'<a href="{metadata.get("path_prefix", "")}{post_url}">{display_title}</a>'
-            )
-
-    sequence_color = metadata.get('sequence_color')
-    sequence_color_dark = metadata.get('sequence_color_dark')
-    sequence_key = metadata.get('sequence', '')
-
-    if sequence_color and isinstance(sequence_color, list) and len(sequence_color) == 3:
-        css_class = f'sequence-toc-{sequence_key}'
-        light_color = f'rgb({sequence_color[0]}, {sequence_color[1]}, {sequence_color[2]})'
-        if sequence_color_dark and isinstance(sequence_color_dark, list) and len(sequence_color_dark) == 3:
-            dark_color = f'rgb({sequence_color_dark[0]}, {sequence_color_dark[1]}, {sequence_color_dark[2]})'
-        else:
-            dark_color = light_color
-        sequence_css = (
-            f'<style>'
-            f'.{css_class} {{ background-color: {light_color}; }}'
-            f'[data-theme="dark"] .{css_class} {{ background-color: {dark_color}; }}'
-            f'</style>'
-        )
-        css_class_attr = f' class="sequence-toc {css_class}"'
-    else:
-        sequence_css = ''
-        css_class_attr = ' class="sequence-toc"'
-
-    items_html = ''.join(f'<li>{item}</li>' for item in toc_items)
-    seq_title = metadata.get('sequence_title', '')
-    return (
-        f'<hr>{sequence_css}'
-        f'<div{css_class_attr}>'
-        f'<h3>{seq_title}</h3>'
-        f'<ol>{items_html}</ol>'
-        f'</div>'
-        f'<div class="back-to-top"><a href="#top"><i class="fas fa-arrow-circle-up"></i></a></div>'
-    )
@@ -1,12 +1,30 @@
 """Generate the open-questions page from question-box divs across all posts."""
 
+import os
 import re
+import shutil
 
 from ssg.metadata import load_sequence_metadata
-from ssg.config import WHITEPAPER_URL
-from ssg.templates import apply_fragments
+from ssg.config import OPEN_QUESTIONS_ALIAS, SITE_URL, WHITEPAPER_URL
+from ssg.templates import compile_template, write_template
 from ssg.utils import load_questions_data, markdown_to_html
 
+QUESTIONS_PLACEHOLDER = '<!-- QUESTIONS_PLACEHOLDER -->'
+
+_REDIRECT_STUB = (
+    '<!DOCTYPE html>\n'
+    '<html lang="en">\n'
+    '<head>\n'
+    '  <meta charset="UTF-8">\n'
+    '  <title>Open Questions</title>\n'
+    f'  <link rel="canonical" href="{SITE_URL}/openquestions">\n'
+    '  <meta name="robots" content="noindex">\n'
+    '  <meta http-equiv="refresh" content="0; url=/openquestions">\n'
+    '</head>\n'
+    '<body><a href="/openquestions">Open Questions</a></body>\n'
+    '</html>\n'
+)
+
 
 def generate_open_questions(posts, output_dir):
     """Build openquestions.html grouped by sequence, using centralized question data."""
@@ -63,29 +81,36 @@ def generate_open_questions(posts, output_dir):
     if not sequence_groups:
         return
 
-    groups_html = ''
-    quickstart_url = '#'
-
     # Broad directions first, then other sequences
     sorted_groups = sorted(
         sequence_groups.items(),
         key=lambda x: (0 if x[0] == 'broad-directions' else 1)
     )
 
+    with open('templates/openquestions.html', 'r') as f:
+        template = compile_template(f.read(), [QUESTIONS_PLACEHOLDER], katex=True)
+
+    with open(output_dir / 'openquestions.html', 'w') as f:
+        size = write_template(f, template, {
+            QUESTIONS_PLACEHOLDER: _question_group_chunks(sorted_groups, sequence_first_urls, post_url_lookup, posts),
+        })
+
+    total = sum(len(g['entries']) for g in sequence_groups.values())
+    print(f"✓ Generated openquestions.html ({total} questions, {size / 1024:.0f} KB)")
+
+
+def _question_group_chunks(sorted_groups, sequence_first_urls, post_url_lookup, posts):
+    """Yield the open-questions page markup one group heading or question at a time."""
     for seq_key, group in sorted_groups:
         seq_title = group['title']
         seq_url_path = sequence_first_urls.get(seq_key, '#')
         seq_url = f'/{seq_url_path}/' if seq_url_path != '#' else '#'
-        if seq_key == 'quickstart':
-            quickstart_url = seq_url
 
         is_broad = seq_key == 'broad-directions'
 
-        groups_html += f'\n    <div class="oq-group" id="{seq_key}-questions">'
-        if is_broad:
-            pass
-        else:
-            groups_html += (
+        yield f'\n    <div class="oq-group" id="{seq_key}-questions">'
+        if not is_broad:
+            yield (
                 f'\n      <h2 class="oq-group-title">'
                 f'From <a href="{seq_url}"><em>{seq_title}</em></a>'
                 f'</h2>'
@@ -108,14 +133,15 @@ def generate_open_questions(posts, output_dir):
                 number = f"{q['sequence_order']}.{q_num}"
                 label = f'Open Question {number}: '
 
-            groups_html += f'\n      <div class="question-box" id="{q_id}">'
-            groups_html += f'\n        <p><strong><a class="oq-title-link" href="/openquestions/{q_slug}">{label}{question_title}</a></strong> {question_text_html}</p>'
-            groups_html += '\n      </div>'
-
-            groups_html += '\n      <div class="oq-links">'
+            parts = [
+                f'\n      <div class="question-box" id="{q_id}">',
+                f'\n        <p><strong><a class="oq-title-link" href="/openquestions/{q_slug}">{label}{question_title}</a></strong> {question_text_html}</p>',
+                '\n      </div>',
+                '\n      <div class="oq-links">',
+            ]
             if not is_broad and post_url != '#':
-                groups_html += f'\n        <div class="oq-see-all"><a href="/{post_url}/#{q_id}">See question in context</a></div>'
-            groups_html += f'\n        <div class="oq-discussion"><a href="/openquestions/{q_slug}">Details and discussion</a></div>'
+                parts.append(f'\n        <div class="oq-see-all"><a href="/{post_url}/#{q_id}">See question in context</a></div>')
+            parts.append(f'\n        <div class="oq-discussion"><a href="/openquestions/{q_slug}">Details and discussion</a></div>')
             # For broad-directions with a context_post, add "From Essay" link on the right
             context_post = q.get('context_post', '')
             if is_broad and context_post:
@@ -123,28 +149,31 @@ def generate_open_questions(posts, output_dir):
                 source_post = next((p for p in posts if p.get('url_path') == context_post or p.get('slug') == context_post.split('/')[-1]), None)
                 if source_post:
                     display_title = source_post.get('short_title') or source_post.get('title', '')
-                    groups_html += f'\n        <div class="oq-source">Question from: <a href="/{source_url}#{q_id}"><em>{display_title}</em></a></div>'
-            groups_html += '\n      </div>'
-
-        groups_html += '\n    </div>'
-
-    with open('templates/openquestions.html', 'r') as f:
-        template = f.read()
+                    parts.append(f'\n        <div class="oq-source">Question from: <a href="/{source_url}#{q_id}"><em>{display_title}</em></a></div>')
+            parts.append('\n      </div>')
+            yield ''.join(parts)
 
-    html = apply_fragments(
-        template,
-        katex=True,
-        **{'<!-- QUESTIONS_PLACEHOLDER -->': groups_html},
-    )
+        yield '\n    </div>'
 
-    with open(output_dir / 'openquestions.html', 'w') as f:
-        f.write(html)
 
-    # Also write to openquestions/index.html for directory-style URLs
-    questions_dir = output_dir / 'openquestions'
-    questions_dir.mkdir(parents=True, exist_ok=True)
-    with open(questions_dir / 'index.html', 'w') as f:
-        f.write(html)
+def link_open_questions_alias(output_dir):
+    """Serve openquestions.html at /openquestions/ too, per OPEN_QUESTIONS_ALIAS.
 
-    total = sum(len(g['entries']) for g in sequence_groups.values())
-    print(f"✓ Generated openquestions.html ({total} questions)")
+    'hardlink' links openquestions/index.html to the finished page (a copy where
+    the filesystem can't link); 'redirect' writes a stub pointing at
+    /openquestions. Runs after the post-processing stages, so they see the
+    page once.
+    """
+    page = output_dir / 'openquestions.html'
+    alias = output_dir / 'openquestions' / 'index.html'
+    if not page.exists():
+        return
+    alias.parent.mkdir(parents=True, exist_ok=True)
+    alias.unlink(missing_ok=True)
+    if OPEN_QUESTIONS_ALIAS == 'redirect':
+        alias.write_text(_REDIRECT_STUB)
+        return
+    try:
+        os.link(page, alias)
+    except OSError:
+        shutil.copyfile(page, alias)
@@ -0,0 +1,174 @@
+"""Related reading: TF-IDF similarity between posts and open questions.
+
+Every document the search index covers (post bodies and QUESTIONS_FILE
+entries, see ssg.search.collect_documents) becomes a TF-IDF vector over
+its term counts — the same per-document counts the search index caches by
+content hash, so unchanged documents are not retokenized. The vocabulary is
+the RELATED_MAX_TERMS most widespread terms that occur in at least two
+documents and at most half of them (a term in only one document can't make
+two documents similar).
+
+With NumPy installed, all cosine similarities come from one matrix product
+per block of rows, and top-k is an argpartition; without it, the same
+scores are accumulated sparsely through an inverted index. The top
+RELATED_COUNT matches of each page (skipping pages it already links to: its
+own sequence, or a question's context post) are cached by the hash of the
+whole corpus, and rendered into the <!-- RELATED_READING --> placeholder of
+post and discussion pages.
+
+Posts with `no_related: true` in their frontmatter neither get nor appear
+in related reading.
+"""
+
+import html as html_module
+import json
+import math
+from collections import Counter
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import RELATED_COUNT, RELATED_MAX_TERMS
+from ssg.search import collect_documents, term_counts
+from ssg.utils import content_hash, load_questions_data
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+RELATED_PLACEHOLDER = '<!-- RELATED_READING -->'
+
+# Rows of the similarity matrix computed per product, bounding memory to
+# _BLOCK_ROWS × documents
+_BLOCK_ROWS = 1024
+
+
+def _vectors(counts_list):
+    """L2-normalized TF-IDF vectors as [{term index: weight}], plus the vocabulary size."""
+    n = len(counts_list)
+    df = Counter(term for counts in counts_list for term in counts)
+    candidates = [t for t, d in df.items() if 2 <= d <= max(2, n // 2)]
+    candidates.sort(key=lambda t: (-df[t], t))
+    vocab = {t: i for i, t in enumerate(candidates[:RELATED_MAX_TERMS])}
+
+    vectors = []
+    for counts in counts_list:
+        vec = {
+            vocab[t]: (1 + math.log(tf)) * math.log(n / df[t])
+            for t, tf in counts.items() if t in vocab
+        }
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        vectors.append({i: w / norm for i, w in vec.items()})
+    return vectors, len(vocab)
+
+
+def _top_k_numpy(vectors, dims, excluded, k):
+    matrix = np.zeros((len(vectors), max(dims, 1)), dtype=np.float32)
+    for row, vec in enumerate(vectors):
+        if vec:
+            matrix[row, list(vec)] = list(vec.values())
+
+    top = []
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        scores = matrix[start:start + _BLOCK_ROWS] @ matrix.T
+        for offset, row_scores in enumerate(scores):
+            row = start + offset
+            row_scores[list(excluded[row])] = -1.0
+            kk = min(k, len(row_scores) - 1)
+            best = np.argpartition(-row_scores, kk)[:kk] if kk > 0 else []
+            top.append(sorted(
+                ((int(j), float(row_scores[j])) for j in best if row_scores[j] > 0),
+                key=lambda m: -m[1],
+            ))
+    return top
+
+
+def _top_k_sparse(vectors, excluded, k):
+    postings = {}
+    for row, vec in enumerate(vectors):
+        for i, w in vec.items():
+            postings.setdefault(i, []).append((row, w))
+
+    top = []
+    for row, vec in enumerate(vectors):
+        scores = Counter()
+        for i, w in vec.items():
+            for other, w2 in postings[i]:
+                scores[other] += w * w2
+        for other in excluded[row]:
+            scores.pop(other, None)
+        top.append([(j, s) for j, s in scores.most_common(k) if s > 0])
+    return top
+
+
+def _related_block(matches, docs):
+    kind_label = ' <span class="related-kind">Open question</span>'
+    items = ''.join(
+        f'<li><a href="{docs[j][1]}">{html_module.escape(docs[j][0])}</a>'
+        f'{kind_label if docs[j][2] == "question" else ""}</li>'
+        for j, _ in matches
+    )
+    return (
+        '<aside class="related-reading">'
+        '<h3>Related reading</h3>'
+        f'<ul>{items}</ul>'
+        '</aside>'
+    )
+
+
+def inject_related_reading(posts, output_dir):
+    """Compute related documents and fill the related-reading block of each post and question page."""
+    opted_out = {f"/{p['url_path']}/" for p in posts if p.get('no_related') and p.get('url_path')}
+    docs = [d for d in collect_documents(posts, output_dir) if d[1] not in opted_out]
+    if len(docs) < 2:
+        return
+
+    # Pages a document already links to, by URL
+    groups = {}
+    for p in posts:
+        if p.get('url_path') and p.get('sequence'):
+            groups[f"/{p['url_path']}/"] = p['sequence']
+    context = {
+        f"/openquestions/{q['slug']}/": f"/{q['context_post']}/"
+        for q in load_questions_data() if q.get('context_post')
+    }
+    index_of = {d[1]: i for i, d in enumerate(docs)}
+    excluded = []
+    for row, (_, url, _, _, _) in enumerate(docs):
+        skip = {row}
+        if url in groups:
+            skip |= {index_of[u] for u, seq in groups.items() if seq == groups[url] and u in index_of}
+        if context.get(url) in index_of:
+            skip.add(index_of[context[url]])
+        excluded.append(skip)
+
+    counts_list = [term_counts(title, body)[0] for title, _, _, _, body in docs]
+    corpus_key = content_hash(json.dumps(
+        [RELATED_COUNT, RELATED_MAX_TERMS, [d[1] for d in docs], counts_list,
+         [sorted(s) for s in excluded]],
+        sort_keys=True,
+    ).encode('utf-8'), length=20) + '.json'
+
+    cached = read_cache('related', corpus_key)
+    if cached is not None:
+        top = json.loads(cached)
+        method = 'cached'
+    else:
+        vectors, dims = _vectors(counts_list)
+        if np is not None:
+            top = _top_k_numpy(vectors, dims, excluded, RELATED_COUNT)
+            method = f'numpy, {dims} terms'
+        else:
+            top = _top_k_sparse(vectors, excluded, RELATED_COUNT)
+            method = f'sparse, {dims} terms; pip install numpy for the vectorized path'
+        write_cache('related', corpus_key, json.dumps(top))
+
+    filled = 0
+    for (_, url, _, _, _), matches in zip(docs, top):
+        page = output_dir / url.strip('/') / 'index.html'
+        html = page.read_text()
+        if RELATED_PLACEHOLDER not in html or not matches:
+            continue
+        page.write_text(html.replace(RELATED_PLACEHOLDER, _related_block(matches, docs), 1))
+        filled += 1
+
+    print(f"✓ Related reading: {filled} of {len(docs)} pages ({method})")
@@ -1,45 +1,244 @@
-"""Generate the RSS feed (feed.xml)."""
+"""Generate the site feeds: RSS 2.0 (feed.xml), Atom (atom.xml) and JSON Feed (feed.json).
 
+The RSS_POST_LIMIT most recent posts go into each of FEED_FORMATS. Feeds are
+streamed: each file's header is written, then every item is formatted and
+written to all feeds before the next post is read, so memory stays constant
+per item however long the posts are.
+
+With FEED_FULL_CONTENT, items carry the post's rendered HTML — the
+<article class="post-body"> of its final page, with scripts dropped and
+relative links made absolute so they work in feed readers. This reads the
+finished output (pre-rendered math, responsive images, fingerprinted asset
+URLs), so it runs after fingerprinting.
+"""
+
+import json
+import re
+from contextlib import ExitStack
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape, quoteattr
 
-from ssg.config import SITE_URL, SITE_TITLE, SITE_DESCRIPTION
+from ssg.config import (
+    AUTHOR, FEED_FORMATS, FEED_FULL_CONTENT, RSS_POST_LIMIT,
+    SITE_DESCRIPTION, SITE_TITLE, SITE_URL,
+)
 
+FEED_FILES = {
+    'rss':  'feed.xml',
+    'atom': 'atom.xml',
+    'json': 'feed.json',
+}
+FEED_TYPES = {
+    'rss':  'application/rss+xml',
+    'atom': 'application/atom+xml',
+    'json': 'application/feed+json',
+}
 
-def generate_rss(posts, output_dir):
-    """Write feed.xml with the 20 most recent posts."""
-    rss = Element('rss', version='2.0')
-    channel = SubElement(rss, 'channel')
+_ARTICLE_RE  = re.compile(r'<article\b[^>]*\bclass="post-body[^"]*"[^>]*>(.*?)</article>', re.DOTALL)
+_SCRIPT_RE   = re.compile(r'<(script|style)\b.*?</\1>', re.DOTALL)
+_URL_ATTR_RE = re.compile(r'\b(src|href|poster)="([^"]*)"')
+_SRCSET_RE   = re.compile(r'\bsrcset="([^"]*)"')
+
+
+def _absolute_srcset(srcset, page_url):
+    entries = []
+    for entry in srcset.split(','):
+        url, _, descriptor = entry.strip().partition(' ')
+        entries.append(urljoin(page_url, url) + (f' {descriptor}' if descriptor else ''))
+    return ', '.join(entries)
 
-    SubElement(channel, 'title').text = SITE_TITLE
-    SubElement(channel, 'link').text = SITE_URL
-    SubElement(channel, 'description').text = SITE_DESCRIPTION
-    SubElement(channel, 'language').text = 'en-us'
 
+def post_content_html(page_html, page_url):
+    """The post body of a generated page, without scripts and with absolute URLs."""
+    m = _ARTICLE_RE.search(page_html)
+    if not m:
+        return ''
+    body = _SCRIPT_RE.sub('', m.group(1))
+    body = _URL_ATTR_RE.sub(lambda a: f'{a.group(1)}="{urljoin(page_url, a.group(2))}"', body)
+    body = _SRCSET_RE.sub(lambda s: f'srcset="{_absolute_srcset(s.group(1), page_url)}"', body)
+    return body.strip()
+
+
+def _feed_items(posts, output_dir):
+    """Yield one item dict per feed entry, newest first, reading each post body only when reached."""
     sorted_posts = sorted(
         [p for p in posts if not p.get('coming_soon')],
-        key=lambda p: p.get('date', ''),
+        key=lambda p: str(p.get('date', '')),
         reverse=True,
     )
+    for post in sorted_posts[:RSS_POST_LIMIT]:
+        url_path = post.get('url_path', post['slug'])
+        # No trailing slash: the RSS guid predates the other feeds, and
+        # changing it would show every post as new to subscribers
+        url = f"{SITE_URL}/{url_path}"
+        try:
+            date = datetime.strptime(str(post.get('date', '')), '%Y-%m-%d')
+        except ValueError:
+            date = None
+        content = ''
+        if FEED_FULL_CONTENT:
+            page = output_dir / url_path / 'index.html'
+            if page.exists():
+                content = post_content_html(page.read_text(), url + '/')
+        yield {
+            'title':       post['title'],
+            'url':         url,
+            'description': post.get('description', ''),
+            'date':        date,
+            'authors':     [a.strip() for a in str(post.get('author', AUTHOR)).split(',') if a.strip()],
+            'content':     content,
+        }
+
+
+# ---------------------------------------------------------------------------
+# RSS 2.0
+# ---------------------------------------------------------------------------
+
+def _rss_head(updated):
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"'
+        ' xmlns:content="http://purl.org/rss/1.0/modules/content/">\n'
+        '  <channel>\n'
+        f'    <title>{escape(SITE_TITLE)}</title>\n'
+        f'    <link>{escape(SITE_URL)}</link>\n'
+        f'    <description>{escape(SITE_DESCRIPTION)}</description>\n'
+        '    <language>en-us</language>\n'
+        f'    <atom:link href={quoteattr(SITE_URL + "/feed.xml")} rel="self" type="application/rss+xml"/>\n'
+        + (f'    <lastBuildDate>{updated.strftime("%a, %d %b %Y 00:00:00 +0000")}</lastBuildDate>\n' if updated else '')
+    )
+
+
+def _rss_item(item, first):
+    out = [
+        '    <item>\n',
+        f'      <title>{escape(item["title"])}</title>\n',
+        f'      <link>{escape(item["url"])}</link>\n',
+        f'      <guid>{escape(item["url"])}</guid>\n',
+    ]
+    if item['description']:
+        out.append(f'      <description>{escape(item["description"])}</description>\n')
+    if item['content']:
+        out.append(f'      <content:encoded>{escape(item["content"])}</content:encoded>\n')
+    if item['date']:
+        out.append(f'      <pubDate>{item["date"].strftime("%a, %d %b %Y 00:00:00 +0000")}</pubDate>\n')
+    out.append('    </item>\n')
+    return ''.join(out)
+
+
+def _rss_tail():
+    return '  </channel>\n</rss>\n'
+
+
+# ---------------------------------------------------------------------------
+# Atom
+# ---------------------------------------------------------------------------
+
+def _atom_date(date):
+    return date.strftime('%Y-%m-%dT00:00:00Z')
+
+
+def _atom_head(updated):
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        f'  <title>{escape(SITE_TITLE)}</title>\n'
+        f'  <subtitle>{escape(SITE_DESCRIPTION)}</subtitle>\n'
+        f'  <id>{escape(SITE_URL)}/</id>\n'
+        f'  <link href={quoteattr(SITE_URL + "/")}/>\n'
+        f'  <link href={quoteattr(SITE_URL + "/atom.xml")} rel="self"/>\n'
+        f'  <updated>{_atom_date(updated or datetime.now())}</updated>\n'
+        f'  <author><name>{escape(AUTHOR)}</name></author>\n'
+    )
+
+
+def _atom_item(item, first):
+    out = [
+        '  <entry>\n',
+        f'    <title>{escape(item["title"])}</title>\n',
+        f'    <link href={quoteattr(item["url"])}/>\n',
+        f'    <id>{escape(item["url"])}</id>\n',
+    ]
+    if item['date']:
+        out.append(f'    <published>{_atom_date(item["date"])}</published>\n')
+        out.append(f'    <updated>{_atom_date(item["date"])}</updated>\n')
+    out.extend(f'    <author><name>{escape(name)}</name></author>\n' for name in item['authors'])
+    if item['description']:
+        out.append(f'    <summary>{escape(item["description"])}</summary>\n')
+    if item['content']:
+        out.append(f'    <content type="html">{escape(item["content"])}</content>\n')
+    out.append('  </entry>\n')
+    return ''.join(out)
+
+
+def _atom_tail():
+    return '</feed>\n'
+
+
+# ---------------------------------------------------------------------------
+# JSON Feed 1.1
+# ---------------------------------------------------------------------------
+
+def _json_head(updated):
+    head = json.dumps({
+        'version':       'https://jsonfeed.org/version/1.1',
+        'title':         SITE_TITLE,
+        'home_page_url': SITE_URL + '/',
+        'feed_url':      SITE_URL + '/feed.json',
+        'description':   SITE_DESCRIPTION,
+        'language':      'en-US',
+    }, ensure_ascii=False, indent=2)
+    # Leave the object open for the streamed items array
+    return head[:-2] + ',\n  "items": [\n'
+
+
+def _json_item(item, first):
+    entry = {'id': item['url'], 'url': item['url'], 'title': item['title']}
+    if item['description']:
+        entry['summary'] = item['description']
+    if item['content']:
+        entry['content_html'] = item['content']
+    else:
+        entry['content_text'] = item['description']
+    if item['date']:
+        entry['date_published'] = _atom_date(item['date'])
+    entry['authors'] = [{'name': name} for name in item['authors']]
+    return ('' if first else ',\n') + '    ' + json.dumps(entry, ensure_ascii=False)
+
+
+def _json_tail():
+    return '\n  ]\n}\n'
+
+
+# format → (head(updated), item(item, first), tail())
+_WRITERS = {
+    'rss':  (_rss_head,  _rss_item,  _rss_tail),
+    'atom': (_atom_head, _atom_item, _atom_tail),
+    'json': (_json_head, _json_item, _json_tail),
+}
+
+
+def generate_rss(posts, output_dir):
+    """Stream feed.xml, atom.xml and feed.json (per FEED_FORMATS) with the most recent posts."""
+    formats = [fmt for fmt in FEED_FORMATS if fmt in _WRITERS]
+    dated = [
+        str(p.get('date', '')) for p in posts
+        if not p.get('coming_soon') and re.fullmatch(r'\d{4}-\d{2}-\d{2}', str(p.get('date', '')))
+    ]
+    updated = datetime.strptime(max(dated), '%Y-%m-%d') if dated else None
+
+    count = 0
+    with ExitStack() as stack:
+        files = {fmt: stack.enter_context(open(output_dir / FEED_FILES[fmt], 'w')) for fmt in formats}
+        for fmt, f in files.items():
+            f.write(_WRITERS[fmt][0](updated))
+        for item in _feed_items(posts, output_dir):
+            for fmt, f in files.items():
+                f.write(_WRITERS[fmt][1](item, count == 0))
+            count += 1
+        for fmt, f in files.items():
+            f.write(_WRITERS[fmt][2]())
 
-    for post in sorted_posts[:20]:
-        item = SubElement(channel, 'item')
-        SubElement(item, 'title').text = post['title']
-        url = f"{SITE_URL}/{post.get('url_path', post['slug'])}"
-        SubElement(item, 'link').text = url
-        SubElement(item, 'guid').text = url
-        if 'description' in post:
-            SubElement(item, 'description').text = post['description']
-        if 'date' in post:
-            try:
-                dt = datetime.strptime(post['date'], '%Y-%m-%d')
-                SubElement(item, 'pubDate').text = dt.strftime('%a, %d %b %Y 00:00:00 +0000')
-            except ValueError:
-                pass
-
-    xml_str = minidom.parseString(tostring(rss)).toprettyxml(indent='  ')
-    with open(output_dir / 'feed.xml', 'w') as f:
-        f.write(xml_str)
-
-    print("✓ Generated feed.xml")
+    print(f"✓ Generated {', '.join(FEED_FILES[fmt] for fmt in formats)} "
+          f"({count} posts, {'full content' if FEED_FULL_CONTENT else 'summaries'})")
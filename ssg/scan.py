@@ -0,0 +1,152 @@
+"""In-memory index of the source trees, scanned once per process.
+
+The first query walks SCAN_ROOTS (posts/, static/, openquestions/) with
+os.scandir and records every directory's files with their size and mtime,
+plus its subdirectories. Post discovery, sequence metadata, widget detection
+and asset copying then query the index instead of globbing the filesystem,
+so a large tree is walked once per build rather than once per stage or post.
+
+The index lives for the process: the dev server keeps it across in-process
+rebuilds and calls rescan() with the paths its watcher saw change, which
+re-lists only the directories containing them. Queries for directories
+outside the scan roots fall through to a direct listing.
+"""
+
+import os
+from pathlib import Path
+
+from ssg.config import SCAN_ROOTS
+
+# {directory: ({file name: (size, mtime_ns)}, [subdirectory names])}, keys
+# normalized relative paths ('posts/perspectives')
+_INDEX = None
+
+
+def _key(path):
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+def _list(directory):
+    """(files, subdirectories) of one directory, or None if it doesn't exist."""
+    files, subdirs = {}, []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files[entry.name] = (st.st_size, st.st_mtime_ns)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    subdirs.sort()
+    return files, subdirs
+
+
+def _scan(directory, index):
+    listing = _list(directory)
+    if listing is None:
+        return
+    index[directory] = listing
+    for name in listing[1]:
+        _scan(f'{directory}/{name}', index)
+
+
+def _drop(directory, index):
+    for key in [k for k in index if k == directory or k.startswith(directory + '/')]:
+        del index[key]
+
+
+def source_index():
+    """The scan index, walking SCAN_ROOTS on first use."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = {}
+        for root in SCAN_ROOTS:
+            _scan(_key(root), _INDEX)
+        count = sum(len(files) for files, _ in _INDEX.values())
+        print(f"✓ Scanned {', '.join(f'{r}/' for r in SCAN_ROOTS)} ({count} files in {len(_INDEX)} directories)")
+    return _INDEX
+
+
+def rescan(paths=None):
+    """Bring the index up to date after changes to paths (all of it if paths is None).
+
+    Each path's nearest indexed directory is re-listed; new subdirectories
+    are scanned and vanished ones dropped.
+    """
+    global _INDEX
+    if paths is None or _INDEX is None:
+        _INDEX = None
+        return
+    for path in paths:
+        key = _key(path)
+        while True:
+            while key not in _INDEX and os.path.dirname(key):
+                key = os.path.dirname(key)
+            if key not in _INDEX:
+                break
+            listing = _list(key)
+            if listing is not None:
+                break
+            # The directory itself went away: drop it and refresh its parent
+            _drop(key, _INDEX)
+        if key not in _INDEX:
+            continue
+        old_subdirs = _INDEX[key][1]
+        _INDEX[key] = listing
+        for name in set(old_subdirs) - set(listing[1]):
+            _drop(f'{key}/{name}', _INDEX)
+        for name in listing[1]:
+            if f'{key}/{name}' not in _INDEX:
+                _scan(f'{key}/{name}', _INDEX)
+
+
+def _entry(directory):
+    """(files, subdirectories) of directory: from the index under the scan roots, else listed directly."""
+    index = source_index()
+    key = _key(directory)
+    if key in index:
+        return index[key]
+    if any(key == root or key.startswith(root + '/') for root in map(_key, SCAN_ROOTS)):
+        return None
+    return _list(key)
+
+
+def listdir(directory):
+    """Paths of the files directly in directory, sorted by name."""
+    entry = _entry(directory)
+    return [Path(directory) / name for name in sorted(entry[0])] if entry else []
+
+
+def subdirs(directory):
+    """Paths of the subdirectories of directory, sorted by name."""
+    entry = _entry(directory)
+    return [Path(directory) / name for name in entry[1]] if entry else []
+
+
+def files(root, suffix=None, name=None):
+    """Paths of every file under root (recursively), sorted, optionally filtered by suffix or exact name."""
+    found = []
+    pending = [Path(root)]
+    while pending:
+        directory = pending.pop()
+        entry = _entry(directory)
+        if not entry:
+            continue
+        for file_name in entry[0]:
+            if (suffix is None or file_name.endswith(suffix)) and (name is None or file_name == name):
+                found.append(directory / file_name)
+        pending.extend(directory / sub for sub in entry[1])
+    return sorted(found)
+
+
+def file_stat(path):
+    """(size, mtime_ns) of a source file from the index, or None if it isn't there."""
+    path = Path(path)
+    entry = _entry(path.parent)
+    return entry[0].get(path.name) if entry else None
+
+
+def is_file(path):
+    return file_stat(path) is not None
@@ -0,0 +1,133 @@
+"""Run build stages as a dependency graph on a thread pool.
+
+Each stage is declared as (name, function, reads, writes), where reads and
+writes name the parts of the build it consumes and produces ('post pages',
+'static', …). Stages are listed in the order a sequential build would run
+them, and a stage depends on every earlier stage that writes something it
+reads or writes, or reads something it writes. So the graph keeps the
+sequential build's results while stages that share nothing run together.
+
+Stages run on STAGE_WORKERS threads. Most of their time is spent in
+subprocesses (pandoc), file I/O or their own process pools, so threads are
+enough. After the run, the critical path is reported: the chain of dependent
+stages with the largest total time. That is the floor for the build's wall
+time however many workers there are.
+"""
+
+import contextlib
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class _LineWriter:
+    """stdout proxy writing whole lines under a lock, so concurrent stages' output doesn't interleave."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.pending = threading.local()
+
+    def write(self, text):
+        lines, newline, rest = (getattr(self.pending, 'text', '') + text).rpartition('\n')
+        self.pending.text = rest
+        if newline:
+            with self.lock:
+                self.stream.write(lines + newline)
+        return len(text)
+
+    def flush(self):
+        """Write this thread's partial line, if any, and flush the stream."""
+        rest = getattr(self.pending, 'text', '')
+        self.pending.text = ''
+        with self.lock:
+            self.stream.write(rest)
+            self.stream.flush()
+
+    def end_stage(self):
+        """Finish this thread's partial line, so the next stage's output starts on its own line."""
+        if getattr(self.pending, 'text', ''):
+            self.write('\n')
+        self.flush()
+
+
+def stage_dependencies(stages):
+    """[set of indices each stage waits for], from the stages' reads and writes."""
+    deps = []
+    for i, (_, _, reads, writes) in enumerate(stages):
+        touches = set(reads) | set(writes)
+        deps.append({
+            j for j, (_, _, earlier_reads, earlier_writes) in enumerate(stages[:i])
+            if touches & set(earlier_writes) or set(writes) & set(earlier_reads)
+        })
+    return deps
+
+
+def _timed(fn, out):
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        # A stage's unterminated last line must not be lost or leak into the next stage's
+        out.end_stage()
+    return start, time.perf_counter()
+
+
+def critical_path(stages, deps, durations):
+    """(total seconds, [stage names]) of the longest chain of dependent stages."""
+    longest = []
+    for i in range(len(stages)):
+        before = max(deps[i], key=lambda j: longest[j][0], default=None)
+        total = durations[i] + (longest[before][0] if before is not None else 0.0)
+        longest.append((total, before))
+    if not longest:
+        return 0.0, []
+    i = max(range(len(longest)), key=lambda k: longest[k][0])
+    total = longest[i][0]
+    path = []
+    while i is not None:
+        path.append(stages[i][0])
+        i = longest[i][1]
+    return total, path[::-1]
+
+
+def run_stages(stages, workers):
+    """Run every stage once its dependencies are done, at most workers at a time.
+
+    A failing stage stops new stages from starting; stages already running
+    finish, then its exception propagates.
+    """
+    deps = stage_dependencies(stages)
+    waiting = {i: set(d) for i, d in enumerate(deps)}
+    durations = [0.0] * len(stages)
+    start = time.perf_counter()
+
+    out = _LineWriter(sys.stdout)
+    with contextlib.redirect_stdout(out), \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running = {}
+
+        def submit_ready():
+            for i in [i for i, d in waiting.items() if not d]:
+                del waiting[i]
+                running[pool.submit(_timed, stages[i][1], out)] = i
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                stage_start, stage_end = future.result()
+                durations[i] = stage_end - stage_start
+                for d in waiting.values():
+                    d.discard(i)
+            submit_ready()
+
+    wall = time.perf_counter() - start
+    total, path = critical_path(stages, deps, durations)
+    print(
+        f"✓ Ran {len(stages)} stages on {workers} worker(s) in {wall:.1f}s "
+        f"({sum(durations):.1f}s of stage time; critical path {total:.1f}s: {' → '.join(path)})"
+    )
+    return durations
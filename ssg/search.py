@@ -0,0 +1,187 @@
+"""Build-time full-text search: a sharded inverted index plus a search page.
+
+Documents are the post bodies build_post wrote (the <article class="post-body">
+of each generated post page) and the open questions in QUESTIONS_FILE (title
+and text, plus the body of their discussion page). Each is tokenized into
+lowercase ASCII terms and counted, with title terms weighted by
+SEARCH_TITLE_WEIGHT.
+
+The index is written under build/search/:
+
+  docs.json         document table (title, URL, kind, excerpt) and the list
+                    of shards that exist
+  shards/<p>.json   {term: postings} for every term starting with prefix p
+                    (the first SEARCH_SHARD_PREFIX characters)
+
+Postings are a term's (doc id delta, weighted tf) pairs as varints, base64
+encoded, so most postings cost two bytes. static/search.js tokenizes a query
+the same way and fetches only the shards its terms fall in; the last term is
+matched as a prefix, so results update while typing.
+
+Per-document term counts are cached by content hash, so a rebuild only
+tokenizes documents that changed; merging is one pass over all postings.
+"""
+
+import base64
+import json
+import re
+import unicodedata
+from collections import Counter
+
+from ssg.cache import read_cache, write_cache
+from ssg.config import SEARCH_SHARD_PREFIX, SEARCH_TITLE_WEIGHT
+from ssg.templates import apply_fragments
+from ssg.utils import content_hash, load_questions_data
+
+SEARCH_DIR = 'search'
+
+# Too common to be useful as search terms; also dropped from queries
+STOPWORDS = frozenset('''
+    a an and are as at be but by can do does for from has have how i if in into
+    is it its of on or so such that the their then there these this to was we
+    what when where which while who why will with you your
+'''.split())
+
+_ARTICLE_RE   = re.compile(r'<article class="post-body[^"]*">(.*?)</article>', re.DOTALL)
+_NON_TEXT_RE  = re.compile(
+    r'<(script|style|svg|nav)\b.*?</\1>'
+    r'|<div class="sequence-toc[^"]*">.*?</div>'
+    r'|<span\s+class="math (?:inline|display)">.*?</span>',
+    re.DOTALL,
+)
+_TAG_RE       = re.compile(r'<[^>]+>')
+_ENTITY_RE    = re.compile(r'&(?:#\d+|#x[0-9a-fA-F]+|\w+);')
+_MATH_TEX_RE  = re.compile(r'\$[^$]*\$')
+_TERM_RE      = re.compile(r'[a-z0-9]+')
+_SPACE_RE     = re.compile(r'\s+')
+
+
+def tokenize(text):
+    """Lowercase ASCII terms of text (accents folded), without stopwords or 1-char terms."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return [t for t in _TERM_RE.findall(text) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _page_text(html):
+    """Plain text of a generated page's post body (math, scripts and the sequence TOC dropped)."""
+    m = _ARTICLE_RE.search(html)
+    if not m:
+        return ''
+    text = _TAG_RE.sub(' ', _NON_TEXT_RE.sub(' ', m.group(1)))
+    return _ENTITY_RE.sub(' ', text)
+
+
+def _plain(text):
+    """Inline TeX and markdown markup stripped from a short string (titles, excerpts)."""
+    text = _MATH_TEX_RE.sub(lambda m: m.group(0).strip('$').replace('\\', ''), text)
+    return _SPACE_RE.sub(' ', re.sub(r'[*_`]', '', text)).strip()
+
+
+def _excerpt(text, limit=160):
+    text = _plain(text)
+    return text if len(text) <= limit else text[:limit].rsplit(' ', 1)[0] + '…'
+
+
+def term_counts(title, body):
+    """{term: weighted tf} for one document, cached by content hash."""
+    key = content_hash(f'{SEARCH_TITLE_WEIGHT}\0{title}\0{body}'.encode('utf-8'), length=20) + '.json'
+    cached = read_cache('search', key)
+    if cached is not None:
+        return json.loads(cached), True
+    counts = Counter(tokenize(body))
+    for term in tokenize(title):
+        counts[term] += SEARCH_TITLE_WEIGHT
+    write_cache('search', key, json.dumps(counts, sort_keys=True))
+    return counts, False
+
+
+def _varint(n, out):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode_postings(postings):
+    """[(doc id, tf), …] in doc id order → base64 of varint (id delta, tf) pairs."""
+    out = bytearray()
+    prev = 0
+    for doc_id, tf in postings:
+        _varint(doc_id - prev, out)
+        _varint(tf, out)
+        prev = doc_id
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+
+def collect_documents(posts, output_dir):
+    """(title, url, kind, excerpt, body text) for every built post and open question."""
+    docs = []
+    for post in posts:
+        if post.get('coming_soon'):
+            continue
+        page = output_dir / post['url_path'] / 'index.html'
+        if not page.exists():
+            continue
+        docs.append((
+            _plain(post.get('title', '')),
+            f"/{post['url_path']}/",
+            'post',
+            _excerpt(post.get('description', '')),
+            _page_text(page.read_text()),
+        ))
+
+    for q in load_questions_data():
+        page = output_dir / 'openquestions' / q['slug'] / 'index.html'
+        body = _page_text(page.read_text()) if page.exists() else q.get('text', '')
+        docs.append((
+            _plain(q['title']),
+            f"/openquestions/{q['slug']}/",
+            'question',
+            _excerpt(q.get('text', '')),
+            body,
+        ))
+    docs.sort(key=lambda d: d[1])
+    return docs
+
+
+def generate_search_index(posts, output_dir):
+    """Write the sharded search index and the search page to build/search/."""
+    docs = collect_documents(posts, output_dir)
+
+    index = {}  # term → [(doc id, tf), …], doc ids ascending
+    cached = 0
+    for doc_id, (title, _, _, _, body) in enumerate(docs):
+        counts, hit = term_counts(title, body)
+        cached += hit
+        for term, tf in counts.items():
+            index.setdefault(term, []).append((doc_id, tf))
+
+    shards = {}
+    for term in sorted(index):
+        shards.setdefault(term[:SEARCH_SHARD_PREFIX], {})[term] = encode_postings(index[term])
+
+    search_dir = output_dir / SEARCH_DIR
+    shard_dir = search_dir / 'shards'
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    shard_bytes = 0
+    for prefix, terms in shards.items():
+        data = json.dumps(terms, separators=(',', ':'))
+        (shard_dir / f'{prefix}.json').write_text(data)
+        shard_bytes += len(data)
+
+    table = {
+        'prefix':    SEARCH_SHARD_PREFIX,
+        'stopwords': sorted(STOPWORDS),
+        'shards':    sorted(shards),
+        'docs':      [[title, url, kind, excerpt] for title, url, kind, excerpt, _ in docs],
+    }
+    (search_dir / 'docs.json').write_text(json.dumps(table, ensure_ascii=False, separators=(',', ':')))
+
+    with open('templates/search.html', 'r') as f:
+        template = f.read()
+    (search_dir / 'index.html').write_text(apply_fragments(template))
+
+    print(
+        f"✓ Search index: {len(docs)} documents, {len(index)} terms in {len(shards)} shards "
+        f"({shard_bytes / 1024:.0f} KB; {len(docs) - cached} tokenized, {cached} from cache)"
+    )
@@ -0,0 +1,114 @@
+"""Sequence navigation, computed once per sequence.
+
+A SequenceGraph holds a sequence's posts in order with each post's position,
+and the end-of-post TOC pre-rendered: every entry is rendered both as a link
+and as the bolded current item, and the links are joined once with their
+offsets recorded. A post's TOC is then the joined links with its own entry
+swapped for the current item (two slices), and its navigation context is a
+dictionary lookup, so building a sequence of n parts is linear in n apart
+from writing each page's copy of the TOC.
+"""
+
+
+def _rgb(color):
+    return f'rgb({color[0]}, {color[1]}, {color[2]})'
+
+
+def _is_rgb(color):
+    return isinstance(color, list) and len(color) == 3
+
+
+class SequenceGraph:
+    """Positions, prev/next links and the pre-rendered TOC of one sequence."""
+
+    def __init__(self, sequence_key, posts):
+        self.key = sequence_key
+        self.posts = posts
+        self.position = {post['slug']: i for i, post in enumerate(posts)}
+
+        # Coming-soon posts aren't built and lack the sequence fields
+        first = next((p for p in posts if 'path_prefix' in p), posts[0])
+        path_prefix = first.get('path_prefix', '')
+        links = []
+        self.current = []
+        for post in posts:
+            display_title = post.get('toc_title', post['title'])
+            post_url = post.get('url_path', f"{post['slug']}") + '/'
+            links.append(f'<li><a href="{path_prefix}{post_url}">{display_title}</a></li>')
+            self.current.append(f'<li><strong>{display_title}</strong></li>')
+
+        self.offsets = [0]
+        for link in links:
+            self.offsets.append(self.offsets[-1] + len(link))
+        self.links = ''.join(links)
+        self.toc_head, self.toc_tail = self._toc_frame(first)
+
+    def _toc_frame(self, metadata):
+        """The TOC markup before and after its <li> items (sequence colors, title, back-to-top)."""
+        sequence_color = metadata.get('sequence_color')
+        sequence_color_dark = metadata.get('sequence_color_dark')
+
+        if _is_rgb(sequence_color):
+            css_class = f'sequence-toc-{self.key}'
+            light_color = _rgb(sequence_color)
+            dark_color = _rgb(sequence_color_dark) if _is_rgb(sequence_color_dark) else light_color
+            sequence_css = (
+                f'<style>'
+                f'.{css_class} {{ background-color: {light_color}; }}'
+                f'[data-theme="dark"] .{css_class} {{ background-color: {dark_color}; }}'
+                f'</style>'
+            )
+            css_class_attr = f' class="sequence-toc {css_class}"'
+        else:
+            sequence_css = ''
+            css_class_attr = ' class="sequence-toc"'
+
+        seq_title = metadata.get('sequence_title', '')
+        head = (
+            f'<hr>{sequence_css}'
+            f'<div{css_class_attr}>'
+            f'<h3>{seq_title}</h3>'
+            f'<ol>'
+        )
+        tail = (
+            f'</ol>'
+            f'</div>'
+            f'<div class="back-to-top"><a href="#top"><i class="fas fa-arrow-circle-up"></i></a></div>'
+        )
+        return head, tail
+
+    def toc_html(self, i):
+        """The sequence TOC block for the post at position i, with that post bolded."""
+        return (
+            self.toc_head
+            + self.links[:self.offsets[i]]
+            + self.current[i]
+            + self.links[self.offsets[i + 1]:]
+            + self.toc_tail
+        )
+
+    def nav(self, slug):
+        """The sequence_nav context build_post expects for the post with this slug."""
+        i = self.position[slug]
+        posts = self.posts
+        prev_post = posts[i - 1] if i > 0 else None
+        next_post = posts[i + 1] if i < len(posts) - 1 else None
+        numbered = posts[i].get('sequence_numbered', True)
+        return {
+            'sequence_title':    posts[i].get('sequence_title', ''),
+            'sequence_part':     i + 1 if numbered else '',
+            'sequence_total':    len(posts),
+            'sequence_first_url':posts[0].get('url_path', posts[0]['slug']) + '/',
+            'sequence_order_1':  i == 0,
+            'prev_title': prev_post['title'] if prev_post else '',
+            'prev_slug':  prev_post['slug']  if prev_post else '',
+            'prev_url':   prev_post.get('url_path', prev_post['slug']) + '/' if prev_post else '',
+            'prev_part':  i if prev_post else '',
+            'next_title': next_post['title'] if next_post else '',
+            'next_slug':  next_post['slug']  if next_post else '',
+            'next_url':   next_post.get('url_path', next_post['slug']) + '/' if next_post else '',
+            'next_source': next_post.get('source_path', '') if next_post else '',
+            'next_part':  i + 2 if next_post else '',
+            'toc_html':   self.toc_html(i),
+        }
+
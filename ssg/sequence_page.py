@@ -3,7 +3,7 @@
 from pathlib import Path
 
 from ssg.contributors import load_contributors, make_author_html
-from ssg.templates import font_awesome_include, nav_html, theme_script
+from ssg.templates import font_awesome_include, nav_html, theme_init_script, theme_script
 from ssg.utils import format_date
 
 
@@ -47,12 +47,13 @@ def generate_sequence_page(seq_key, seq_meta, seq_posts, output_dir):
 <head>
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
+{theme_init_script()}
   <link rel="icon" href="../static/lm_favicon.png" type="image/png">
   <title>{title} — Learning Mechanics</title>
 {font_awesome_include()}
   <link rel="stylesheet" href="../static/style.css">
 </head>
-<body>
+<body data-page="sequence">
 {nav_html('../')}
   <div class="site-page">
     <main>
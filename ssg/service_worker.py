@@ -0,0 +1,171 @@
+"""Generate an offline-capable service worker (build/sw.js) from the build output.
+
+Runs after fingerprinting, so it sees final asset names:
+
+  shell   every local stylesheet and script some page loads (site CSS, nav
+          scripts, widget modules and their imports), precached on install
+          in a cache named by the hash of the whole shell, so a deploy that
+          changes any of them installs a fresh cache and one that doesn't
+          refetches nothing
+  pages   every generated page, served stale-while-revalidate. Each cached
+          copy is stamped with the page's content hash, and on activation
+          copies whose hash changed in this deploy are evicted.
+
+With SW_PRECACHE_SEQUENCES, visiting a sequence landing page also caches
+every part of that sequence for offline reading.
+
+A one-line registration script is added to every page.
+"""
+
+import json
+import re
+from urllib.parse import urljoin
+
+from ssg.config import SW_PRECACHE_SEQUENCES
+from ssg.static import page_assets, page_type
+from ssg.utils import content_hash
+
+SW_FILE = 'sw.js'
+
+_REGISTER_SNIPPET = (
+    "<script>if('serviceWorker' in navigator)"
+    "navigator.serviceWorker.register('/sw.js')</script>"
+)
+_HREF_RE = re.compile(r'<a\b[^>]*\bhref="([^"#?]+)"')
+
+_SW_TEMPLATE = '''\
+// Generated by ssg/service_worker.py — do not edit.
+const SHELL_CACHE = 'lm-shell-%(version)s';
+const PAGES_CACHE = 'lm-pages';
+const SHELL = %(shell)s;
+const PAGES = %(pages)s;
+const SEQUENCES = %(sequences)s;
+
+const shellSet = new Set(SHELL);
+
+function pageKey(url) {
+  return url.pathname.replace(/index\\.html$/, '');
+}
+
+async function cachePage(cache, key, response) {
+  if (!response.ok || response.redirected) return;
+  const headers = new Headers(response.headers);
+  headers.set('x-page-hash', PAGES[key] || '');
+  const body = await response.clone().blob();
+  await cache.put(key, new Response(body, {
+    status: response.status, statusText: response.statusText, headers: headers,
+  }));
+}
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(SHELL))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    for (const name of await caches.keys()) {
+      if (name.startsWith('lm-shell-') && name !== SHELL_CACHE) await caches.delete(name);
+    }
+    // Evict pages whose content changed in this deploy
+    const pages = await caches.open(PAGES_CACHE);
+    for (const request of await pages.keys()) {
+      const key = pageKey(new URL(request.url));
+      const cached = await pages.match(request);
+      if (!(key in PAGES) || cached.headers.get('x-page-hash') !== PAGES[key]) {
+        await pages.delete(request);
+      }
+    }
+    await self.clients.claim();
+  })());
+});
+
+async function staleWhileRevalidate(event, key) {
+  const cache = await caches.open(PAGES_CACHE);
+  const cached = await cache.match(key);
+  const network = fetch(event.request).then(async response => {
+    await cachePage(cache, key, response.clone());
+    return response;
+  });
+  event.waitUntil(network.catch(() => {}));
+  if (SEQUENCES[key]) event.waitUntil(precacheSequence(cache, SEQUENCES[key]));
+  return cached || network;
+}
+
+async function precacheSequence(cache, keys) {
+  for (const key of keys) {
+    if (await cache.match(key)) continue;
+    try {
+      await cachePage(cache, key, await fetch(key));
+    } catch (_) {}
+  }
+}
+
+self.addEventListener('fetch', event => {
+  const url = new URL(event.request.url);
+  if (event.request.method !== 'GET' || url.origin !== location.origin) return;
+  if (shellSet.has(url.pathname)) {
+    event.respondWith(
+      caches.match(url.pathname).then(cached => cached || fetch(event.request))
+    );
+    return;
+  }
+  const key = pageKey(url);
+  if (event.request.mode === 'navigate' || key in PAGES) {
+    event.respondWith(staleWhileRevalidate(event, key));
+  }
+});
+'''
+
+
+def _page_url(rel_path):
+    """build-relative page path → URL path the site serves it at."""
+    url = '/' + rel_path
+    return url[:-len('index.html')] if url.endswith('/index.html') else url
+
+
+def generate_service_worker(output_dir):
+    """Write build/sw.js and register it from every page."""
+    output_root = output_dir.resolve()
+    shell = {}
+    pages = {}
+    sequences = {}
+    for path in sorted(output_dir.rglob('*.html')):
+        html = path.read_text()
+        if _REGISTER_SNIPPET not in html and '</body>' in html:
+            html = html.replace('</body>', _REGISTER_SNIPPET + '</body>', 1)
+            path.write_text(html)
+        url = _page_url(path.relative_to(output_dir).as_posix())
+        pages[url] = content_hash(html.encode('utf-8'))
+
+        for asset in page_assets(path, output_dir):
+            shell['/' + asset.relative_to(output_root).as_posix()] = content_hash(asset.read_bytes())
+
+        if SW_PRECACHE_SEQUENCES and page_type(html) == 'sequence':
+            parts = []
+            for href in _HREF_RE.findall(html):
+                part = urljoin(url, href)
+                if part.startswith(url) and part != url and part not in parts:
+                    parts.append(part)
+            sequences[url] = parts
+
+    # Sequence parts must be pages this build produced
+    for url, parts in sequences.items():
+        sequences[url] = [p for p in parts if p in pages]
+
+    version = content_hash(json.dumps(shell, sort_keys=True).encode('utf-8'))
+    sw = _SW_TEMPLATE % {
+        'version':   version,
+        'shell':     json.dumps(sorted(shell)),
+        'pages':     json.dumps(pages, sort_keys=True),
+        'sequences': json.dumps(sequences, sort_keys=True),
+    }
+    (output_dir / SW_FILE).write_text(sw)
+
+    shell_kb = sum((output_dir / url.lstrip('/')).stat().st_size for url in shell) / 1024
+    print(f"✓ Generated {SW_FILE} (shell {version}: {len(shell)} assets, {shell_kb:.0f} KB; "
+          f"{len(pages)} pages stale-while-revalidate"
+          + (f"; {len(sequences)} sequences precached on visit" if sequences else '') + ')')
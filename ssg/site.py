@@ -0,0 +1,108 @@
+"""The site as known before any page is rendered.
+
+A SiteContext runs the build's first pass: every post's frontmatter (from the
+frontmatter index where unchanged), its sequence fields and URL path, and the
+posts grouped into sequences with a SequenceGraph each. main() builds one per
+build; the lazy dev server (ssg/lazy.py) keeps one across requests and
+rebuilds it only when posts change, so rendering a single page needs nothing
+but a lookup in it.
+"""
+
+from pathlib import Path
+
+from ssg.config import POSTS_DIR
+from ssg.metadata import extract_metadata, load_sequence_metadata, save_frontmatter_index
+from ssg.scan import files
+from ssg.sequence_graph import SequenceGraph
+
+
+class SiteContext:
+    """Post metadata, URL paths and sequence navigation for every post."""
+
+    def __init__(self, posts_dir=POSTS_DIR):
+        self.markdown_files = files(Path(posts_dir), suffix='.md')
+        self.sequence_metadata = {}
+        self.posts_metadata = []
+        self.file_to_metadata = {}
+        self.sequences = {}
+        self.sequence_graphs = {}
+        if not self.markdown_files:
+            return
+
+        self.sequence_metadata = load_sequence_metadata()
+        self._first_pass()
+
+        _, unchanged = save_frontmatter_index()
+        print(f"✓ Frontmatter of {len(self.markdown_files)} files "
+              f"({len(self.markdown_files) - unchanged} parsed, {unchanged} from index)")
+
+        # Group by sequence for navigation
+        for metadata in self.posts_metadata:
+            self.sequences.setdefault(self.sequence_key(metadata), []).append(metadata)
+        for seq in self.sequences.values():
+            seq.sort(key=lambda p: p.get('sequence_order', 1))
+        self.sequence_graphs = {
+            key: SequenceGraph(key, seq) for key, seq in self.sequences.items() if len(seq) > 1
+        }
+
+    def _first_pass(self):
+        """Extract metadata and calculate URL paths."""
+        sequence_metadata = self.sequence_metadata
+        for md_file in self.markdown_files:
+            metadata = extract_metadata(md_file)
+            if not metadata:
+                continue
+
+            sequence_key = metadata.get('sequence', '')
+
+            # Skip hidden posts and posts in hidden sequences entirely
+            if metadata.get('hidden'):
+                continue
+
+            # Coming-soon posts appear on homepage but are not built
+            if metadata.get('coming_soon'):
+                self.posts_metadata.append(metadata)
+                continue
+            if sequence_key and sequence_metadata.get(sequence_key, {}).get('hidden'):
+                continue
+
+            if sequence_key and sequence_key in sequence_metadata:
+                seq_meta = sequence_metadata[sequence_key]
+                metadata['sequence_title']       = seq_meta.get('title', '')
+                metadata['sequence_description'] = seq_meta.get('description', '')
+                metadata['sequence_color']       = seq_meta.get('sequence_color', None)
+                metadata['sequence_color_dark']  = seq_meta.get('sequence_color_dark', None)
+                metadata['sequence_numbered']    = seq_meta.get('numbered', True)
+
+            if sequence_key and sequence_key != f"standalone-{metadata['slug']}":
+                metadata['url_path']    = f"{sequence_key}/{metadata['slug']}"
+                metadata['path_prefix'] = "../../"
+            else:
+                metadata['url_path']    = f"{metadata['slug']}"
+                metadata['path_prefix'] = "../"
+
+            metadata['source_path'] = str(md_file)
+            self.posts_metadata.append(metadata)
+            self.file_to_metadata[str(md_file)] = metadata
+
+    def sequence_key(self, metadata):
+        return metadata.get('sequence', f"standalone-{metadata['slug']}")
+
+    def sequence_nav(self, metadata):
+        """The sequence_nav context build_post expects for a post, or None outside a sequence."""
+        graph = self.sequence_graphs.get(self.sequence_key(metadata))
+        return graph.nav(metadata['slug']) if graph else None
+
+    def landing_sequences(self):
+        """(key, sequence metadata, posts) of every sequence with a landing page (e.g. /perspectives)."""
+        for seq_key, seq_posts in self.sequences.items():
+            if seq_key.startswith('standalone-'):
+                continue
+            seq_meta = self.sequence_metadata.get(seq_key, {})
+            if seq_meta.get('hidden'):
+                continue
+            yield seq_key, seq_meta, seq_posts
+
+    def coming_soon(self):
+        """Coming-soon posts, listed on the homepage but never built."""
+        return [m for m in self.posts_metadata if m.get('coming_soon')]
@@ -1,59 +1,213 @@
-"""Generate sitemap.xml for the site."""
+"""Generate sitemap.xml for the site.
 
+Every generated page is listed (except SITEMAP_EXCLUDE), including the
+/openquestions/<slug>/ discussion pages. lastmod is real rather than the
+build date: each page's content (its <article>, else <main>, else <body>,
+whitespace-normalized so minification doesn't count) is hashed and recorded
+in a build manifest under CACHE_DIR. A page keeps its recorded lastmod while
+its hash is unchanged and gets today's date when it changes; a page the
+manifest hasn't seen yet is dated by the last commit touching its sources
+(post markdown, question files), falling back to today.
+
+Past SITEMAP_MAX_URLS URLs or SITEMAP_MAX_BYTES per file (the protocol
+limits are 50,000 and 50 MB), URLs are split into gzipped shards
+sitemap-<n>.xml.gz listed by a sitemap index at sitemap.xml, each with the
+newest lastmod of its URLs. Compressed shards are cached by content hash.
+"""
+
+import gzip
+import json
+import re
+import subprocess
 from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
 
-from ssg.config import SITE_URL
+from ssg.cache import read_cache, write_cache
+from ssg.config import (
+    CACHE_DIR, OPEN_QUESTIONS_DIR, QUESTIONS_FILE, SITE_URL,
+    SITEMAP_EXCLUDE, SITEMAP_MAX_BYTES, SITEMAP_MAX_URLS,
+)
+from ssg.static import page_type
+from ssg.utils import content_hash, load_questions_data
 
+MANIFEST_FILE = 'build-manifest.json'
 
-def generate_sitemap(posts, output_dir):
-    """Generate sitemap.xml listing all public pages."""
-    today = datetime.today().strftime('%Y-%m-%d')
+# Sitemap priority by <body data-page="…"> type
+_PRIORITY = {
+    'index':     '1.0',
+    'questions': '0.8',
+    'post':      '0.7',
+    'sequence':  '0.6',
+    'question':  '0.5',
+}
 
-    urls = []
+_CONTENT_RES = [
+    re.compile(r'<article\b[^>]*>(.*?)</article>', re.DOTALL),
+    re.compile(r'<main\b[^>]*>(.*?)</main>', re.DOTALL),
+    re.compile(r'<body\b[^>]*>(.*?)</body>', re.DOTALL),
+]
+_SPACE_RE = re.compile(r'\s+')
 
-    # Homepage
-    urls.append({'loc': f'{SITE_URL}/', 'lastmod': today, 'priority': '1.0'})
+_URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+_URLSET_CLOSE = '</urlset>\n'
 
-    # Open questions index
-    urls.append({'loc': f'{SITE_URL}/openquestions', 'lastmod': today, 'priority': '0.8'})
 
-    # About page
-    urls.append({'loc': f'{SITE_URL}/about', 'lastmod': today, 'priority': '0.5'})
+def _page_url(rel_path):
+    url = '/' + rel_path
+    if url.endswith('/index.html'):
+        return url[:-len('index.html')]
+    # Pages are served without their extension (openquestions.html → /openquestions)
+    return url[:-len('.html')] if url.endswith('.html') else url
 
-    # Posts (skip hidden)
-    seen_sequences = set()
-    for post in sorted(posts, key=lambda p: p.get('date', ''), reverse=True):
-        if post.get('hidden') or post.get('coming_soon') or post.get('slug') == 'about':
-            continue
 
-        url_path = post.get('url_path', post['slug'])
-        loc = f'{SITE_URL}/{url_path}'
-        date = post.get('date', today)
-        urls.append({'loc': loc, 'lastmod': date, 'priority': '0.7'})
+def _content_digest(html):
+    """Hash of a page's main content, insensitive to whitespace changes."""
+    for content_re in _CONTENT_RES:
+        m = content_re.search(html)
+        if m:
+            return content_hash(_SPACE_RE.sub(' ', m.group(1)).encode('utf-8'), length=16)
+    return content_hash(html.encode('utf-8'), length=16)
 
-        # Sequence landing page (once per sequence)
-        seq_key = post.get('sequence', '')
-        if seq_key and not seq_key.startswith('standalone-') and seq_key not in seen_sequences:
-            seen_sequences.add(seq_key)
-            urls.append({'loc': f'{SITE_URL}/{seq_key}', 'lastmod': date, 'priority': '0.6'})
 
-    # Build XML
-    entries = []
-    for u in urls:
-        entries.append(
-            f'  <url>\n'
-            f'    <loc>{u["loc"]}</loc>\n'
-            f'    <lastmod>{u["lastmod"]}</lastmod>\n'
-            f'    <priority>{u["priority"]}</priority>\n'
-            f'  </url>'
-        )
-
-    xml = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + '\n'.join(entries)
-        + '\n</urlset>\n'
+def _source_dates():
+    """{source path: date of the last commit touching it}, from one pass over git history."""
+    try:
+        log = subprocess.run(
+            ['git', 'log', '--format=%x00%cs', '--name-only', '--', 'posts', OPEN_QUESTIONS_DIR],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        shallow = subprocess.run(
+            ['git', 'rev-parse', '--is-shallow-repository'],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip() == 'true'
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    if shallow:
+        print("⚠ Shallow git clone: new pages in the sitemap are dated by truncated history "
+              "(fetch full history, e.g. fetch-depth: 0)")
+    dates = {}
+    for commit in log.split('\0')[1:]:
+        lines = commit.strip().splitlines()
+        for path in lines[1:]:
+            dates.setdefault(path, lines[0])
+    return dates
+
+
+def _page_sources(posts):
+    """{page URL: [source paths]} for pages with known sources."""
+    sources = {}
+    for post in posts:
+        if post.get('source_path') and post.get('url_path'):
+            sources.setdefault(f"/{post['url_path']}/", []).append(post['source_path'])
+            seq_key = post.get('sequence', '')
+            if seq_key and not seq_key.startswith('standalone-'):
+                sources.setdefault(f'/{seq_key}/', []).append(post['source_path'])
+    for q in load_questions_data():
+        sources[f"/{OPEN_QUESTIONS_DIR}/{q['slug']}/"] = [QUESTIONS_FILE, f"{OPEN_QUESTIONS_DIR}/{q['id']}.md"]
+    return sources
+
+
+def _url_entry(loc, lastmod, priority):
+    return (
+        f'  <url>\n'
+        f'    <loc>{escape(loc)}</loc>\n'
+        f'    <lastmod>{lastmod}</lastmod>\n'
+        f'    <priority>{priority}</priority>\n'
+        f'  </url>\n'
     )
 
-    (output_dir / 'sitemap.xml').write_text(xml)
-    print(f"✓ Generated sitemap.xml ({len(urls)} URLs)")
+
+def _shards(entries):
+    """Split (lastmod, xml) entries into lists that respect the per-file URL and size limits."""
+    budget = SITEMAP_MAX_BYTES - len(_URLSET_OPEN) - len(_URLSET_CLOSE)
+    shards, current, size = [], [], 0
+    for entry in entries:
+        entry_size = len(entry[1].encode('utf-8'))
+        if current and (len(current) >= SITEMAP_MAX_URLS or size + entry_size > budget):
+            shards.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += entry_size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _gzip_cached(text):
+    data = text.encode('utf-8')
+    key = content_hash(data, length=20) + '.xml.gz'
+    cached = read_cache('sitemap', key)
+    if cached is None:
+        cached = gzip.compress(data, mtime=0)
+        write_cache('sitemap', key, cached)
+    return cached
+
+
+def generate_sitemap(posts, output_dir):
+    """Write sitemap.xml (or a sitemap index with gzipped shards) for every generated page."""
+    today = datetime.today().strftime('%Y-%m-%d')
+    manifest_path = Path(CACHE_DIR) / MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    sources = _page_sources(posts)
+    source_dates = None
+    new_manifest = {}
+    entries = []
+    changed = 0
+    for path in sorted(output_dir.rglob('*.html')):
+        rel = path.relative_to(output_dir).as_posix()
+        if rel in SITEMAP_EXCLUDE:
+            continue
+        html = path.read_text()
+        if 'name="robots" content="noindex' in html:
+            continue
+        url = _page_url(rel)
+        digest = _content_digest(html)
+
+        previous = manifest.get(url)
+        if previous and previous['hash'] == digest:
+            lastmod = previous['lastmod']
+        elif previous:
+            lastmod = today
+            changed += 1
+        else:
+            if source_dates is None:
+                source_dates = _source_dates()
+            dates = [source_dates[s] for s in sources.get(url, []) if s in source_dates]
+            lastmod = max(dates) if dates else today
+            changed += 1
+        new_manifest[url] = {'hash': digest, 'lastmod': lastmod}
+        entries.append((lastmod, _url_entry(SITE_URL + url, lastmod, _PRIORITY.get(page_type(html), '0.5'))))
+
+    shards = _shards(entries)
+    if len(shards) <= 1:
+        (output_dir / 'sitemap.xml').write_text(_URLSET_OPEN + ''.join(e for _, e in entries) + _URLSET_CLOSE)
+        layout = 'sitemap.xml'
+    else:
+        index = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+        for n, shard in enumerate(shards, 1):
+            name = f'sitemap-{n}.xml.gz'
+            (output_dir / name).write_bytes(
+                _gzip_cached(_URLSET_OPEN + ''.join(e for _, e in shard) + _URLSET_CLOSE)
+            )
+            index.append(
+                f'  <sitemap>\n'
+                f'    <loc>{escape(SITE_URL)}/{name}</loc>\n'
+                f'    <lastmod>{max(lastmod for lastmod, _ in shard)}</lastmod>\n'
+                f'  </sitemap>\n'
+            )
+        index.append('</sitemapindex>\n')
+        (output_dir / 'sitemap.xml').write_text(''.join(index))
+        layout = f'sitemap index + {len(shards)} gzipped shards'
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(new_manifest, indent=1, sort_keys=True))
+    print(f"✓ Generated {layout} ({len(entries)} URLs, {changed} new or changed)")
@@ -1,7 +1,14 @@
 """Copy static assets to the build directory; concatenate CSS partials."""
 
+import os
+import re
+import shutil
 from pathlib import Path
 
+from ssg.config import CSS_CORE_PARTIALS, CSS_RUNTIME_PREFIXES
+from ssg.devfs import copy_asset
+from ssg.scan import files, is_file, listdir, subdirs
+
 # Ordered list of CSS partials to concatenate into style.css.
 # Order matters: variables → base → controls → layout → components → questions → theme → media.
 CSS_PARTIALS = [
@@ -23,17 +30,260 @@ def build_css(output_dir):
     output_static = output_dir / 'static'
     output_static.mkdir(parents=True, exist_ok=True)
 
-    chunks = []
+    texts = {}
     for partial in CSS_PARTIALS:
         partial_path = css_dir / partial
-        if partial_path.exists():
-            chunks.append(f'/* === {partial} === */\n')
-            chunks.append(partial_path.read_text())
-            chunks.append('\n')
+        if is_file(partial_path):
+            texts[partial] = partial_path.read_text()
         else:
             print(f"Warning: CSS partial not found: {partial_path}")
 
-    (output_static / 'style.css').write_text(''.join(chunks))
+    (output_static / 'style.css').write_text(concat_css(texts))
+
+
+def concat_css(texts):
+    """Concatenate {partial name: css text} in order, with a banner per partial."""
+    return ''.join(f'/* === {name} === */\n{text}\n' for name, text in texts.items())
+
+
+# ---------------------------------------------------------------------------
+# Per-page-type CSS splitting
+# ---------------------------------------------------------------------------
+
+_CSS_COMMENT_RE  = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_IGNORED_RE  = re.compile(r':not\([^)]*\)|\[[^\]]*\]|"[^"]*"|\'[^\']*\'')
+_CSS_NAME_RE     = re.compile(r'[.#](-?[A-Za-z_][\w-]*)')
+_CSS_TYPE_RE     = re.compile(r'(?<![\w.#:-])([a-z][a-z0-9]*)(?![\w(-])')
+_TOKEN_RE        = re.compile(r'[A-Za-z_][\w-]*')
+_PAGE_TYPE_RE    = re.compile(r'<body[^>]*\bdata-page="([^"]+)"')
+_STYLE_LINK_RE   = re.compile(r'<link rel="stylesheet" href="([^"]*)static/style\.css">')
+_SCRIPT_SRC_RE   = re.compile(r'<script[^>]*\bsrc="([^"]+)"')
+_STYLESHEET_RE   = re.compile(r'<link rel="stylesheet" href="([^"]+)"')
+_JS_IMPORT_RE    = re.compile(r'\b(?:from|import)\s*\(?\s*["\']([^"\']+\.m?js)["\']')
+
+
+def css_blocks(css_text):
+    """Split CSS into top-level (prelude, body) pairs.
+
+    body is the text between the block's braces, or None for brace-less
+    statements such as @import. Comments must already be stripped.
+    """
+    blocks = []
+    i, n = 0, len(css_text)
+    while i < n:
+        brace = css_text.find('{', i)
+        semi = css_text.find(';', i)
+        if brace == -1:
+            if css_text[i:].strip():
+                blocks.append((css_text[i:].strip().rstrip(';'), None))
+            break
+        if semi != -1 and semi < brace:
+            blocks.append((css_text[i:semi].strip(), None))
+            i = semi + 1
+            continue
+        depth, j = 1, brace + 1
+        while j < n and depth:
+            if css_text[j] == '{':
+                depth += 1
+            elif css_text[j] == '}':
+                depth -= 1
+            j += 1
+        blocks.append((css_text[i:brace].strip(), css_text[brace + 1:j - 1]))
+        i = j
+    return blocks
+
+
+def _split_selector_list(prelude):
+    """Split a selector list on top-level commas (not those inside :is(…) etc.)."""
+    parts, depth, current = [], 0, ''
+    for ch in prelude:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += ch
+    parts.append(current)
+    return parts
+
+
+def _selector_used(prelude, vocab, match_elements=False):
+    """True if any selector in the list can match: all its class/id names occur in vocab.
+
+    Class/id names starting with CSS_RUNTIME_PREFIXES always count as used:
+    third-party scripts (KaTeX auto-render, giscus) add them in the browser.
+    With match_elements, element names (h1, pre, …) must occur in vocab too.
+    """
+    for selector in _split_selector_list(prelude):
+        selector = _CSS_IGNORED_RE.sub('', selector)
+        names = [n for n in _CSS_NAME_RE.findall(selector) if not n.startswith(CSS_RUNTIME_PREFIXES)]
+        if match_elements:
+            names += [t for t in _CSS_TYPE_RE.findall(selector) if t not in ('html', 'body')]
+        if all(name in vocab for name in names):
+            return True
+    return False
+
+
+def shake_css(css_text, vocab, match_elements=False):
+    """Drop style rules whose selectors cannot match anything in vocab.
+
+    Rules without class/id selectors (element rules, :root) and at-rules such
+    as @font-face are always kept, unless match_elements is set, in which
+    case element rules are kept only for elements in vocab. @media/@supports
+    blocks are filtered recursively and dropped when empty.
+    """
+    out = []
+    for prelude, body in css_blocks(_CSS_COMMENT_RE.sub('', css_text)):
+        if body is None:
+            out.append(f'{prelude};\n')
+        elif prelude.startswith(('@media', '@supports')):
+            inner = shake_css(body, vocab, match_elements)
+            if inner:
+                out.append(f'{prelude} {{\n{inner}}}\n')
+        elif prelude.startswith('@') or _selector_used(prelude, vocab, match_elements):
+            out.append(f'{prelude} {{{body}}}\n')
+    return ''.join(out)
+
+
+def page_type(html):
+    """Return the page type a generated page declares via <body data-page="…">."""
+    m = _PAGE_TYPE_RE.search(html)
+    return m.group(1) if m else 'page'
+
+
+def resolve_local(ref, from_file, output_dir):
+    """Resolve a script/import URL to a file in output_dir, or None if external."""
+    ref = ref.split('?')[0].split('#')[0]
+    if '://' in ref or ref.startswith('//'):
+        return None
+    path = output_dir / ref.lstrip('/') if ref.startswith('/') else from_file.parent / ref
+    # Made absolute lexically: dev builds symlink large media to the source tree,
+    # and following the link would send writes next to it (image variants)
+    path = Path(os.path.abspath(path))
+    return path if path.is_file() else None
+
+
+def page_vocabulary(html_path, output_dir):
+    """Collect every identifier-like token in a page and the local scripts it loads.
+
+    Scripts matter because widgets and tooltips create elements (and toggle
+    classes) from JS; their class names never appear in the static markup.
+    """
+    html = html_path.read_text()
+    tokens = set(_TOKEN_RE.findall(html))
+    seen = set()
+    pending = [resolve_local(src, html_path, output_dir) for src in _SCRIPT_SRC_RE.findall(html)]
+    while pending:
+        script = pending.pop()
+        if script is None or script in seen:
+            continue
+        seen.add(script)
+        js = script.read_text()
+        tokens.update(_TOKEN_RE.findall(js))
+        pending.extend(resolve_local(spec, script, output_dir) for spec in _JS_IMPORT_RE.findall(js))
+    return tokens
+
+
+def page_assets(html_path, output_dir):
+    """Local stylesheets and scripts a page loads, including JS module imports."""
+    html = html_path.read_text()
+    assets = {resolve_local(href, html_path, output_dir) for href in _STYLESHEET_RE.findall(html)}
+    pending = [resolve_local(src, html_path, output_dir) for src in _SCRIPT_SRC_RE.findall(html)]
+    while pending:
+        script = pending.pop()
+        if script is None or script in assets:
+            continue
+        assets.add(script)
+        pending.extend(resolve_local(spec, script, output_dir) for spec in _JS_IMPORT_RE.findall(script.read_text()))
+    assets.discard(None)
+    return assets
+
+
+def split_css(output_dir):
+    """Replace the single style.css with a shared core bundle plus per-page-type bundles.
+
+    Each generated page declares its type via <body data-page="…">. The
+    core bundle holds the leading partials named in CSS_CORE_PARTIALS,
+    tree-shaken against every page of the site, so every page shares one
+    cached copy of the base and layout rules. The remaining partials are
+    tree-shaken per type, against the union of every page of that type (its
+    markup plus the scripts it loads), into style-<type>.css. The core comes
+    first in CSS_PARTIALS order, so cascade order is unchanged.
+    """
+    css_dir = Path('static/css')
+    output_static = output_dir / 'static'
+
+    partials = {}
+    for partial in CSS_PARTIALS:
+        partial_path = css_dir / partial
+        if is_file(partial_path):
+            partials[partial] = partial_path.read_text()
+    full_size = len(concat_css(partials).encode('utf-8'))
+
+    # --- Collect the vocabulary of each page type ---
+    pages_by_type = {}
+    vocab_by_type = {}
+    for html_path in sorted(output_dir.rglob('*.html')):
+        html = html_path.read_text()
+        if not _STYLE_LINK_RE.search(html):
+            continue
+        kind = page_type(html)
+        pages_by_type.setdefault(kind, []).append(html_path)
+        vocab_by_type.setdefault(kind, set()).update(page_vocabulary(html_path, output_dir))
+
+    if not pages_by_type:
+        return
+
+    # --- Core bundle: the leading CSS_CORE_PARTIALS, shaken against the whole site ---
+    prefix_len = 0
+    for name in partials:
+        if name not in CSS_CORE_PARTIALS:
+            break
+        prefix_len += 1
+    site_vocab = set().union(*vocab_by_type.values())
+    core = {}
+    for name in list(partials)[:prefix_len]:
+        text = shake_css(partials[name], site_vocab)
+        if text:
+            core[name] = text
+
+    rest = list(partials)[prefix_len:]
+    shaken = {
+        kind: {name: shake_css(partials[name], vocab) for name in rest}
+        for kind, vocab in vocab_by_type.items()
+    }
+
+    core_text = concat_css(core)
+    (output_static / 'style.css').write_text(core_text)
+    core_size = len(core_text.encode('utf-8'))
+    print(f"✓ Split CSS: core bundle {core_size / 1024:.1f} KB ({', '.join(core)})")
+
+    for kind, pages in sorted(pages_by_type.items()):
+        extra = {name: shaken[kind][name] for name in rest if shaken[kind][name]}
+        bundle_size = 0
+        link_extra = ''
+        if extra:
+            bundle_text = concat_css(extra)
+            bundle_name = f'style-{kind}.css'
+            (output_static / bundle_name).write_text(bundle_text)
+            bundle_size = len(bundle_text.encode('utf-8'))
+            link_extra = f'\n  <link rel="stylesheet" href="\\1static/{bundle_name}">'
+
+        for html_path in pages:
+            html = html_path.read_text()
+            html = _STYLE_LINK_RE.sub(
+                r'<link rel="stylesheet" href="\1static/style.css">' + link_extra, html, count=1
+            )
+            html_path.write_text(html)
+
+        page_size = core_size + bundle_size
+        print(
+            f"  {kind:<10} {len(pages):>3} pages: {page_size / 1024:5.1f} KB of "
+            f"{full_size / 1024:.1f} KB (saves {(full_size - page_size) / 1024:.1f} KB per page)"
+        )
 
 
 def copy_static_files(output_dir):
@@ -42,22 +292,25 @@ def copy_static_files(output_dir):
     output_static = output_dir / 'static'
     output_static.mkdir(parents=True, exist_ok=True)
 
-    for file in static_dir.glob('*'):
-        if file.is_file() and file.name != 'style.css':
-            (output_static / file.name).write_bytes(file.read_bytes())
-        elif file.is_dir() and file.name != 'css':
-            out_subdir = output_static / file.name
-            out_subdir.mkdir(parents=True, exist_ok=True)
-            for subfile in file.rglob('*'):
-                if subfile.is_file():
-                    dest = out_subdir / subfile.relative_to(file)
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    dest.write_bytes(subfile.read_bytes())
+    for file in listdir(static_dir):
+        if file.name != 'style.css':
+            copy_asset(file, output_static / file.name, copy=shutil.copyfile)
+    for subdir in subdirs(static_dir):
+        if subdir.name == 'css':
+            continue
+        out_subdir = output_static / subdir.name
+        out_subdir.mkdir(parents=True, exist_ok=True)
+        for subfile in files(subdir):
+            dest = out_subdir / subfile.relative_to(subdir)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            copy_asset(subfile, dest, copy=shutil.copyfile)
 
     # Also copy css/ subdirectory files (for source reference)
     css_out = output_static / 'css'
     css_out.mkdir(parents=True, exist_ok=True)
-    for file in (static_dir / 'css').glob('*.css'):
+    for file in listdir(static_dir / 'css'):
+        if file.suffix != '.css':
+            continue
         (css_out / file.name).write_bytes(file.read_bytes())
 
     build_css(output_dir)
@@ -1,12 +1,16 @@
 """Generate shared HTML fragments for templates, from config."""
 
+import re
+
 from ssg.config import (
     GA_ID, GA_DOMAINS, WEB_FONT_URL, FONT_AWESOME_URL,
     KATEX_CSS_URL, KATEX_JS_URL, KATEX_RENDER_URL,
     SITE_TITLE,
     GISCUS_REPO, GISCUS_REPO_ID, GISCUS_CATEGORY_ID,
     GISCUS_CATEGORY_POSTS, GISCUS_CATEGORY_OQ,
+    FEED_FORMATS,
 )
+from ssg.rss import FEED_FILES, FEED_TYPES
 
 
 def ga_script():
@@ -55,105 +59,25 @@ def font_awesome_include():
     )
 
 
+def theme_init_script():
+    """Inline <head> snippet that applies the saved theme before first paint."""
+    return (
+        "  <script>document.documentElement.setAttribute("
+        "'data-theme', localStorage.getItem('theme') || 'light');</script>"
+    )
+
+
 def theme_script():
-    """Theme toggle and persistence script."""
-    return '''\
-  <script>
-    function toggleTheme() {
-      var current = document.documentElement.getAttribute('data-theme');
-      var next = current === 'dark' ? 'light' : 'dark';
-      document.documentElement.setAttribute('data-theme', next);
-      localStorage.setItem('theme', next);
-      var icon = document.querySelector('.nav-theme-toggle i');
-      if (icon) icon.className = next === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
-    }
-    document.addEventListener('DOMContentLoaded', function() {
-      var saved = localStorage.getItem('theme') || 'light';
-      document.documentElement.setAttribute('data-theme', saved);
-      var icon = document.querySelector('.nav-theme-toggle i');
-      if (icon) icon.className = saved === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
-    });
-  </script>'''
+    """Theme toggle and persistence script (static/theme.js)."""
+    return '  <script defer src="/static/theme.js"></script>'
 
 
 def post_theme_script():
-    """Theme toggle script for post pages, including giscus sync and footnote click."""
-    return '''\
-  <script>
-    function toggleTheme() {
-      var current = document.documentElement.getAttribute('data-theme');
-      var next = current === 'dark' ? 'light' : 'dark';
-      document.documentElement.setAttribute('data-theme', next);
-      localStorage.setItem('theme', next);
-
-      var icon = document.querySelector('.nav-theme-toggle i');
-      icon.className = next === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
-
-      var giscus = document.querySelector('iframe.giscus-frame');
-      if (giscus) {
-        giscus.contentWindow.postMessage(
-          { giscus: { setConfig: { theme: next } } },
-          'https://giscus.app'
-        );
-      }
-    }
-
-    document.addEventListener('DOMContentLoaded', function() {
-      var saved = localStorage.getItem('theme') || 'light';
-      document.documentElement.setAttribute('data-theme', saved);
-      var icon = document.querySelector('.nav-theme-toggle i');
-      if (icon) icon.className = saved === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
-
-      // Footnote click-to-toggle on touch/mobile
-      document.querySelectorAll('span.fn').forEach(function(fn) {
-        fn.addEventListener('click', function(e) {
-          if (e.target.closest('a')) return;
-          e.stopPropagation();
-          var open = fn.classList.toggle('fn--open');
-          // Close all others
-          if (open) {
-            document.querySelectorAll('span.fn.fn--open').forEach(function(other) {
-              if (other !== fn) other.classList.remove('fn--open');
-            });
-          }
-        });
-      });
-      document.addEventListener('click', function(e) {
-        if (e.target.closest('span.fn-tooltip')) return;
-        document.querySelectorAll('span.fn.fn--open').forEach(function(fn) {
-          fn.classList.remove('fn--open');
-        });
-      });
-
-      // TOC scroll-spy
-      (function() {
-        var tocLinks = document.querySelectorAll('nav.post-toc a');
-        if (!tocLinks.length) return;
-        var headingIds = Array.from(tocLinks).map(function(a) {
-          return a.getAttribute('href').slice(1);
-        });
-        var headings = headingIds.map(function(id) {
-          return document.getElementById(id);
-        }).filter(Boolean);
-
-        function onScroll() {
-          var scrollY = window.scrollY || window.pageYOffset;
-          var active = null;
-          for (var i = 0; i < headings.length; i++) {
-            if (headings[i].getBoundingClientRect().top <= 120) {
-              active = headingIds[i];
-            }
-          }
-          tocLinks.forEach(function(a) {
-            var isActive = a.getAttribute('href') === '#' + active;
-            a.classList.toggle('toc-active', isActive);
-          });
-        }
-        window.addEventListener('scroll', onScroll, { passive: true });
-        onScroll();
-      })();
-    });
-  </script>'''
+    """Theme toggle plus post-page behaviour: footnote click and TOC scroll-spy."""
+    return (
+        '  <script defer src="/static/theme.js"></script>\n'
+        '  <script defer src="/static/post.js"></script>'
+    )
 
 
 def mailerlite_includes():
@@ -161,6 +85,14 @@ def mailerlite_includes():
     return '  <link rel="stylesheet" href="/static/css/mailerlite.css">'
 
 
+def feed_links():
+    """<link rel="alternate"> tags for the feeds FEED_FORMATS builds."""
+    return '\n'.join(
+        f'  <link rel="alternate" type="{FEED_TYPES[fmt]}" title="{SITE_TITLE}" href="/{FEED_FILES[fmt]}">'
+        for fmt in FEED_FORMATS if fmt in FEED_FILES
+    )
+
+
 def footer_html():
     """Sitewide footer with newsletter signup and RSS link."""
     return '''\
@@ -187,63 +119,22 @@ def footer_html():
 
     </div>
   </footer>
-  <script>
-    document.getElementById('footer-ml-form').addEventListener('submit', function(e) {
-      e.preventDefault();
-      var email = this.querySelector('input[type="email"]').value;
-      var body = new URLSearchParams({
-        'fields[email]': email,
-        'ml-submit': '1',
-        'anticsrf': 'true'
-      });
-      fetch('https://assets.mailerlite.com/jsonp/2258033/forms/184317804357355303/subscribe', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-        body: body.toString()
-      }).then(function(r) { return r.json(); }).then(function(data) {
-        if (data.success) {
-          document.getElementById('footer-ml-form').style.display = 'none';
-          document.getElementById('footer-ml-success').style.display = '';
-        } else {
-          document.getElementById('footer-ml-error').style.display = '';
-        }
-      }).catch(function() {
-        document.getElementById('footer-ml-error').style.display = '';
-      });
-    });
-  </script>'''
+  <script defer src="/static/subscribe.js"></script>'''
 
 
 def giscus_script(category):
     """Giscus comments embed script. category: one of GISCUS_CATEGORY_POSTS or GISCUS_CATEGORY_OQ."""
-    return f'''\
-    <script>
-      (function() {{
-        var theme = localStorage.getItem('theme') || 'light';
-        var s = document.createElement('script');
-        s.src = 'https://giscus.app/client.js';
-        s.setAttribute('data-repo', '{GISCUS_REPO}');
-        s.setAttribute('data-repo-id', '{GISCUS_REPO_ID}');
-        s.setAttribute('data-category', '{category}');
-        s.setAttribute('data-category-id', '{GISCUS_CATEGORY_ID}');
-        s.setAttribute('data-mapping', 'pathname');
-        s.setAttribute('data-strict', '0');
-        s.setAttribute('data-reactions-enabled', '0');
-        s.setAttribute('data-emit-metadata', '0');
-        s.setAttribute('data-input-position', 'bottom');
-        s.setAttribute('data-theme', theme);
-        s.setAttribute('data-lang', 'en');
-        s.setAttribute('crossorigin', 'anonymous');
-        s.async = true;
-        document.currentScript.parentNode.appendChild(s);
-      }})();
-    </script>'''
+    return (
+        f'    <script defer src="/static/giscus.js"'
+        f' data-repo="{GISCUS_REPO}" data-repo-id="{GISCUS_REPO_ID}"'
+        f' data-category="{category}" data-category-id="{GISCUS_CATEGORY_ID}"></script>'
+    )
 
 
 def apply_fragments(template, katex=False, giscus_category=None, **extra):
     """Replace all standard <!-- PLACEHOLDER --> fragments in a template string.
 
-    Always injects: GA_SCRIPT, FONT_AWESOME, MAILERLITE, NAV, FOOTER, THEME_SCRIPT.
+    Always injects: GA_SCRIPT, FONT_AWESOME, MAILERLITE, FEED_LINKS, NAV, FOOTER, THEME_INIT, THEME_SCRIPT.
     Pass katex=True to also inject KATEX.
     Pass giscus_category=<category string> to also inject GISCUS.
     Pass extra keyword args as additional {placeholder: html} replacements.
@@ -253,8 +144,10 @@ def apply_fragments(template, katex=False, giscus_category=None, **extra):
         '<!-- WEB_FONT -->':     web_font_include(),
         '<!-- FONT_AWESOME -->': font_awesome_include(),
         '<!-- MAILERLITE -->':   mailerlite_includes(),
+        '<!-- FEED_LINKS -->':   feed_links(),
         '<!-- NAV -->':          nav_html(),
         '<!-- FOOTER -->':       footer_html(),
+        '<!-- THEME_INIT -->':   theme_init_script(),
         '<!-- THEME_SCRIPT -->': theme_script(),
     }
     if katex:
@@ -269,18 +162,50 @@ def apply_fragments(template, katex=False, giscus_category=None, **extra):
     return template
 
 
+def compile_template(template, slots, katex=False, giscus_category=None, **extra):
+    """Apply the standard fragments once and split a template at its streamed slots.
+
+    slots is a list of placeholders whose content is only known per page (or is
+    too large to splice in with str.replace). Returns the template as a list
+    alternating literal text and slot placeholders, for write_template.
+    """
+    template = apply_fragments(template, katex=katex, giscus_category=giscus_category, **extra)
+    pattern = '(' + '|'.join(re.escape(slot) for slot in slots) + ')'
+    return re.split(pattern, template)
+
+
+def write_template(f, compiled, slots):
+    """Write a compiled template to f, streaming each slot's chunks in place.
+
+    slots maps placeholder → a string or an iterable of strings; missing
+    slots are left empty. Returns the number of bytes written.
+    """
+    size = 0
+    for i, part in enumerate(compiled):
+        if i % 2:
+            value = slots.get(part, '')
+            chunks = (value,) if isinstance(value, str) else value
+        else:
+            chunks = (part,)
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk.encode('utf-8'))
+    return size
+
+
 def nav_html(path_prefix=''):
     """Site navigation bar HTML."""
     return f'''\
   <nav class="site-nav">
     <div class="nav-content">
       <a href="/" class="nav-logo">
-        <img src="/static/lm_favicon.png" alt="LM logo">
+        <img src="/static/lm_favicon.png" alt="LM logo" sizes="28px">
         Learning Mechanics
       </a>
       <div class="nav-links">
         <a href="/openquestions">Open Questions</a>
         <a href="/about">About</a>
+        <a href="/search/">Search</a>
         <a href="https://discord.gg/GTHfUnf7hz">Discord</a>
       </div>
     </div>
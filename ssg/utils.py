@@ -1,5 +1,6 @@
 """Shared utilities used across the SSG."""
 
+import hashlib
 import re
 import subprocess
 import tempfile
@@ -18,6 +19,13 @@ def format_date(date_str):
         return date_str
 
 
+def content_hash(data, length=10):
+    """Return a short hex SHA-256 digest of a str or bytes value."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
 _QUESTIONS_CACHE = None
 
 def load_questions_data():
@@ -34,6 +42,12 @@ def load_questions_data():
     return _QUESTIONS_CACHE
 
 
+def reset_questions_cache():
+    """Forget the loaded questions so the next load_questions_data() rereads QUESTIONS_FILE."""
+    global _QUESTIONS_CACHE
+    _QUESTIONS_CACHE = None
+
+
 def _process_sidenotes(md_text):
     """Convert [>text<] to a floating <aside class="sidenote"> prepended to its paragraph.
 
@@ -66,7 +80,7 @@ def markdown_to_html(md_text):
         tmp_path = f.name
     try:
         result = subprocess.run(
-            ['pandoc', tmp_path, '--from=markdown', '--to=html'],
+            ['pandoc', tmp_path, '--from=markdown', '--to=html', '--mathjax'],
             capture_output=True, text=True, check=True
         )
         return result.stdout.strip()
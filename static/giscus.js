@@ -0,0 +1,43 @@
+/**
+ * Giscus comments loader.
+ *
+ * Include with the repo/category settings as data attributes; the giscus
+ * client is inserted next to this script tag once the comment section is
+ * about to scroll into view:
+ *
+ *   <script defer src="/static/giscus.js" data-repo="…" data-repo-id="…"
+ *           data-category="…" data-category-id="…"></script>
+ */
+(function() {
+  var config = document.currentScript;
+
+  function load() {
+    var theme = localStorage.getItem('theme') || 'light';
+    var s = document.createElement('script');
+    s.src = 'https://giscus.app/client.js';
+    ['repo', 'repo-id', 'category', 'category-id'].forEach(function(name) {
+      s.setAttribute('data-' + name, config.getAttribute('data-' + name));
+    });
+    s.setAttribute('data-mapping', 'pathname');
+    s.setAttribute('data-strict', '0');
+    s.setAttribute('data-reactions-enabled', '0');
+    s.setAttribute('data-emit-metadata', '0');
+    s.setAttribute('data-input-position', 'bottom');
+    s.setAttribute('data-theme', theme);
+    s.setAttribute('data-lang', 'en');
+    s.setAttribute('crossorigin', 'anonymous');
+    s.async = true;
+    config.parentNode.appendChild(s);
+  }
+
+  if (!('IntersectionObserver' in window)) {
+    load();
+    return;
+  }
+  var observer = new IntersectionObserver(function(entries) {
+    if (!entries.some(function(e) { return e.isIntersecting; })) return;
+    observer.disconnect();
+    load();
+  }, { rootMargin: '600px 0px' });
+  observer.observe(config.parentNode);
+})();
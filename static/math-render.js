@@ -6,16 +6,21 @@ document.addEventListener("DOMContentLoaded", function() {
   const postMacros = postMacrosEl ? JSON.parse(postMacrosEl.textContent) : {};
   const allMacros = Object.assign({}, katexMacros, window.LATEX_MACROS || {}, postMacros);
 
-  renderMathInElement(document.body, {
-    delimiters: [
-      {left: "\\[", right: "\\]", display: true},
-      {left: "\\(", right: "\\)", display: false},
-      {left: "$$", right: "$$", display: true},
-      {left: "$", right: "$", display: false}
-    ],
-    throwOnError: false,
-    macros: allMacros,
-  });
+  // Pages whose math was rendered at build time (MATH_RENDERING) skip the
+  // body scan, and may not load KaTeX at all if they have no eq-tips.
+  const hasKatex = typeof katex !== "undefined" && typeof renderMathInElement !== "undefined";
+  if (hasKatex && !document.documentElement.hasAttribute("data-math-prerendered")) {
+    renderMathInElement(document.body, {
+      delimiters: [
+        {left: "\\[", right: "\\]", display: true},
+        {left: "\\(", right: "\\)", display: false},
+        {left: "$$", right: "$$", display: true},
+        {left: "$", right: "$", display: false}
+      ],
+      throwOnError: false,
+      macros: allMacros,
+    });
+  }
 
   // ── Math equation tooltips ─────────────────────────────────────────────────
   // Build tooltip DOM from the data-tip attribute (raw LaTeX string).
@@ -89,7 +94,7 @@ document.addEventListener("DOMContentLoaded", function() {
     return div;
   }
 
-  document.querySelectorAll("span.eq-tip").forEach(function(span) {
+  if (hasKatex) document.querySelectorAll("span.eq-tip").forEach(function(span) {
     span.setAttribute("tabindex", "0");
     // Render the equation LaTeX stored in data-eq (avoids pandoc processing issues)
     const eqLatex = span.getAttribute("data-eq") || "";
@@ -0,0 +1,53 @@
+/**
+ * Post-page behaviour: footnote click-to-toggle on touch/mobile and
+ * TOC scroll-spy.
+ */
+document.addEventListener('DOMContentLoaded', function() {
+  // Footnote click-to-toggle on touch/mobile
+  document.querySelectorAll('span.fn').forEach(function(fn) {
+    fn.addEventListener('click', function(e) {
+      if (e.target.closest('a')) return;
+      e.stopPropagation();
+      var open = fn.classList.toggle('fn--open');
+      // Close all others
+      if (open) {
+        document.querySelectorAll('span.fn.fn--open').forEach(function(other) {
+          if (other !== fn) other.classList.remove('fn--open');
+        });
+      }
+    });
+  });
+  document.addEventListener('click', function(e) {
+    if (e.target.closest('span.fn-tooltip')) return;
+    document.querySelectorAll('span.fn.fn--open').forEach(function(fn) {
+      fn.classList.remove('fn--open');
+    });
+  });
+
+  // TOC scroll-spy
+  (function() {
+    var tocLinks = document.querySelectorAll('nav.post-toc a');
+    if (!tocLinks.length) return;
+    var headingIds = Array.from(tocLinks).map(function(a) {
+      return a.getAttribute('href').slice(1);
+    });
+    var headings = headingIds.map(function(id) {
+      return document.getElementById(id);
+    }).filter(Boolean);
+
+    function onScroll() {
+      var active = null;
+      for (var i = 0; i < headings.length; i++) {
+        if (headings[i].getBoundingClientRect().top <= 120) {
+          active = headingIds[i];
+        }
+      }
+      tocLinks.forEach(function(a) {
+        var isActive = a.getAttribute('href') === '#' + active;
+        a.classList.toggle('toc-active', isActive);
+      });
+    }
+    window.addEventListener('scroll', onScroll, { passive: true });
+    onScroll();
+  })();
+});
@@ -0,0 +1,170 @@
+/**
+ * Client for the static search index written by ssg/search.py.
+ *
+ * Loads the document table (search/docs.json) once, then for each query
+ * fetches only the shards its terms fall in (search/shards/<prefix>.json,
+ * memoized). Queries are tokenized exactly like the index: accents folded,
+ * lowercase ASCII words, stopwords and 1-char words dropped. Every term
+ * must match; the last one also matches as a prefix while it is being typed.
+ */
+(function() {
+  var input = document.getElementById('search-input');
+  var status = document.getElementById('search-status');
+  var list = document.getElementById('search-results');
+  if (!input || !list) return;
+
+  var MAX_RESULTS = 30;
+  var table = null;
+  var shards = {};
+  var latest = 0;
+
+  function loadTable() {
+    if (!table) {
+      table = fetch('/search/docs.json').then(function(r) { return r.json(); }).then(function(t) {
+        t.stopwords = new Set(t.stopwords);
+        t.shardSet = new Set(t.shards);
+        return t;
+      });
+    }
+    return table;
+  }
+
+  function loadShard(prefix) {
+    if (!shards[prefix]) {
+      shards[prefix] = fetch('/search/shards/' + prefix + '.json')
+        .then(function(r) { return r.ok ? r.json() : {}; })
+        .catch(function() { return {}; });
+    }
+    return shards[prefix];
+  }
+
+  function tokenize(text, t) {
+    var words = text.normalize('NFKD').replace(/[^\x00-\x7f]/g, '').toLowerCase().match(/[a-z0-9]+/g) || [];
+    return words.filter(function(w) { return w.length > 1 && !t.stopwords.has(w); });
+  }
+
+  // base64 varint (doc id delta, tf) pairs → [[doc id, tf], …]
+  function decode(postings) {
+    var bytes = atob(postings);
+    var out = [];
+    var pos = 0;
+    var doc = 0;
+    function varint() {
+      var n = 0, shift = 0, b;
+      do {
+        b = bytes.charCodeAt(pos++);
+        n += (b & 0x7f) * Math.pow(2, shift);
+        shift += 7;
+      } while (b & 0x80);
+      return n;
+    }
+    while (pos < bytes.length) {
+      doc += varint();
+      out.push([doc, varint()]);
+    }
+    return out;
+  }
+
+  function shardsFor(term, t) {
+    if (term.length >= t.prefix) {
+      var p = term.slice(0, t.prefix);
+      return t.shardSet.has(p) ? [p] : [];
+    }
+    return t.shards.filter(function(s) { return s.indexOf(term) === 0; });
+  }
+
+  // {doc id: score} for one query term, tf·idf summed over the terms it matches
+  function termScores(term, isPrefix, t) {
+    return Promise.all(shardsFor(term, t).map(loadShard)).then(function(loaded) {
+      var scores = {};
+      loaded.forEach(function(shard) {
+        Object.keys(shard).forEach(function(key) {
+          if (key !== term && !(isPrefix && key.indexOf(term) === 0)) return;
+          var postings = decode(shard[key]);
+          var idf = Math.log(1 + t.docs.length / postings.length);
+          postings.forEach(function(p) {
+            scores[p[0]] = (scores[p[0]] || 0) + p[1] * idf;
+          });
+        });
+      });
+      return scores;
+    });
+  }
+
+  function render(results, t, hasQuery) {
+    list.textContent = '';
+    results.slice(0, MAX_RESULTS).forEach(function(r) {
+      var doc = t.docs[r[0]];
+      var li = document.createElement('li');
+      li.className = 'search-result';
+      var a = document.createElement('a');
+      a.href = doc[1];
+      a.textContent = doc[0];
+      var kind = document.createElement('span');
+      kind.className = 'search-result-kind';
+      kind.textContent = doc[2] === 'question' ? 'Open question' : 'Post';
+      li.appendChild(kind);
+      li.appendChild(a);
+      if (doc[3]) {
+        var p = document.createElement('p');
+        p.textContent = doc[3];
+        li.appendChild(p);
+      }
+      list.appendChild(li);
+    });
+    if (status) {
+      status.textContent = !hasQuery ? '' : results.length
+        ? results.length + (results.length === 1 ? ' result' : ' results')
+        : 'No results.';
+    }
+  }
+
+  function search(query) {
+    var id = ++latest;
+    loadTable().then(function(t) {
+      var terms = tokenize(query, t);
+      var prefixLast = !/\s$/.test(query);
+      return Promise.all(terms.map(function(term, i) {
+        return termScores(term, prefixLast && i === terms.length - 1, t);
+      })).then(function(perTerm) {
+        if (id !== latest) return;
+        var results = [];
+        if (perTerm.length) {
+          Object.keys(perTerm[0]).forEach(function(doc) {
+            var total = 0;
+            for (var i = 0; i < perTerm.length; i++) {
+              if (!(doc in perTerm[i])) return;
+              total += perTerm[i][doc];
+            }
+            results.push([+doc, total]);
+          });
+          results.sort(function(a, b) { return b[1] - a[1]; });
+        }
+        render(results, t, terms.length > 0);
+      });
+    });
+  }
+
+  var timer = null;
+  input.addEventListener('input', function() {
+    clearTimeout(timer);
+    timer = setTimeout(function() {
+      var url = new URL(location.href);
+      if (input.value) url.searchParams.set('q', input.value);
+      else url.searchParams.delete('q');
+      history.replaceState(null, '', url);
+      search(input.value);
+    }, 120);
+  });
+  input.form.addEventListener('submit', function(e) {
+    e.preventDefault();
+    search(input.value);
+  });
+
+  var initial = new URLSearchParams(location.search).get('q');
+  if (initial) {
+    input.value = initial;
+    search(initial);
+  }
+  input.focus();
+})();
@@ -0,0 +1,32 @@
+/**
+ * Footer newsletter signup: posts the email to MailerLite and swaps in the
+ * success or error message.
+ */
+(function() {
+  var form = document.getElementById('footer-ml-form');
+  if (!form) return;
+
+  form.addEventListener('submit', function(e) {
+    e.preventDefault();
+    var email = this.querySelector('input[type="email"]').value;
+    var body = new URLSearchParams({
+      'fields[email]': email,
+      'ml-submit': '1',
+      'anticsrf': 'true'
+    });
+    fetch('https://assets.mailerlite.com/jsonp/2258033/forms/184317804357355303/subscribe', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+      body: body.toString()
+    }).then(function(r) { return r.json(); }).then(function(data) {
+      if (data.success) {
+        form.style.display = 'none';
+        document.getElementById('footer-ml-success').style.display = '';
+      } else {
+        document.getElementById('footer-ml-error').style.display = '';
+      }
+    }).catch(function() {
+      document.getElementById('footer-ml-error').style.display = '';
+    });
+  });
+})();
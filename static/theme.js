@@ -0,0 +1,38 @@
+/**
+ * Theme toggle and persistence, shared by every page.
+ *
+ * The saved theme is applied to <html> by the tiny inline snippet from
+ * theme_init_script() before first paint; this file only wires up the
+ * toggle and keeps the nav icon and giscus iframe in sync.
+ */
+function setThemeIcon(theme) {
+  var name = theme === 'dark' ? 'fa-sun' : 'fa-moon';
+  // Inline SVG sprite icon (ssg/icons.py), or Font Awesome <i> markup
+  var use = document.querySelector('.nav-theme-toggle svg use');
+  if (use) use.setAttribute('href', '#' + name);
+  var icon = document.querySelector('.nav-theme-toggle i');
+  if (icon) icon.className = 'fas ' + name;
+}
+
+function toggleTheme() {
+  var current = document.documentElement.getAttribute('data-theme');
+  var next = current === 'dark' ? 'light' : 'dark';
+  document.documentElement.setAttribute('data-theme', next);
+  localStorage.setItem('theme', next);
+
+  setThemeIcon(next);
+
+  var giscus = document.querySelector('iframe.giscus-frame');
+  if (giscus) {
+    giscus.contentWindow.postMessage(
+      { giscus: { setConfig: { theme: next } } },
+      'https://giscus.app'
+    );
+  }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+  var saved = localStorage.getItem('theme') || 'light';
+  document.documentElement.setAttribute('data-theme', saved);
+  setThemeIcon(saved);
+});
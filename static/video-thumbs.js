@@ -0,0 +1,30 @@
+/**
+ * Homepage video thumbnails: play only while near the viewport.
+ *
+ * generate_index() emits <video preload="none" poster="…">, so nothing is
+ * downloaded until a thumbnail scrolls close to view; it is then played,
+ * and paused again once it leaves. Readers who prefer reduced motion keep
+ * the poster.
+ */
+(function() {
+  var videos = document.querySelectorAll('.post-thumbnail video');
+  if (!videos.length) return;
+  if (window.matchMedia && window.matchMedia('(prefers-reduced-motion: reduce)').matches) return;
+
+  function play(video) {
+    var p = video.play();
+    if (p && p.catch) p.catch(function() {});
+  }
+
+  if (!('IntersectionObserver' in window)) {
+    videos.forEach(play);
+    return;
+  }
+  var observer = new IntersectionObserver(function(entries) {
+    entries.forEach(function(entry) {
+      if (entry.isIntersecting) play(entry.target);
+      else entry.target.pause();
+    });
+  }, { rootMargin: '200px 0px' });
+  videos.forEach(function(video) { observer.observe(video); });
+})();
@@ -0,0 +1,49 @@
+"""prune_includes keeps KaTeX for pages whose widgets render math themselves."""
+
+from ssg.config import KATEX_CSS_URL, KATEX_JS_URL
+from ssg.includes import prune_includes
+
+PAGE = f'''<!DOCTYPE html>
+<html lang="en" data-math-prerendered>
+<head>
+  <link rel="stylesheet" href="{KATEX_CSS_URL}">
+  <script defer src="{KATEX_JS_URL}"></script>
+  <script defer src="/static/math-render.js"></script>
+  {{widget}}
+</head>
+<body><p>Pre-rendered math only.</p></body>
+</html>
+'''
+
+
+def build_site(tmp_path):
+    (tmp_path / 'static').mkdir()
+    (tmp_path / 'static' / 'math-render.js').write_text('renderMathInElement(document.body); window.katex;\n')
+    for name, widget in (('widget', '<script type="module" src="widget.js"></script>'), ('plain', '')):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'index.html').write_text(PAGE.replace('{widget}', widget))
+    (tmp_path / 'widget' / 'widget.js').write_text(
+        'label.innerHTML = window.katex.renderToString("\\\\mathcal{L}(t)");\n'
+    )
+
+
+def test_widget_using_katex_keeps_katex(tmp_path, monkeypatch):
+    monkeypatch.setattr('ssg.includes.CACHE_DIR', str(tmp_path / 'cache'))
+    build_site(tmp_path)
+    prune_includes(tmp_path)
+
+    widget = (tmp_path / 'widget' / 'index.html').read_text()
+    assert KATEX_CSS_URL in widget
+    assert KATEX_JS_URL in widget
+
+
+def test_prerendered_page_drops_katex(tmp_path, monkeypatch):
+    monkeypatch.setattr('ssg.includes.CACHE_DIR', str(tmp_path / 'cache'))
+    build_site(tmp_path)
+    prune_includes(tmp_path)
+
+    # math-render.js mentions katex too, but it is one of the pruned includes
+    plain = (tmp_path / 'plain' / 'index.html').read_text()
+    assert KATEX_CSS_URL not in plain
+    assert KATEX_JS_URL not in plain
+    assert 'math-render.js' not in plain